@@ -1,4 +1,20 @@
+from .adaptive_concurrency import AdaptiveConcurrency
+from .coalescing_uploader import CoalescingUploader
+from .dead_letter import DeadLetterQueue
+from .ingest_index import IngestIndex
 from .insert import Insert
+from .pipeline import IngestPipeline, PipelineStage
+from .run_journal import RunJournal
 from .settings import Settings
 
-__all__ = ["Insert", "Settings"]
+__all__ = [
+    "AdaptiveConcurrency",
+    "CoalescingUploader",
+    "DeadLetterQueue",
+    "IngestIndex",
+    "IngestPipeline",
+    "Insert",
+    "PipelineStage",
+    "RunJournal",
+    "Settings",
+]
@@ -0,0 +1,223 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+DEFAULT_MIN_LIMIT = 1
+""" 同時に送信するリクエスト数の下限の初期値 """
+
+DEFAULT_MAX_LIMIT = 16
+""" 同時に送信するリクエスト数の上限の初期値 """
+
+DEFAULT_DECREASE_FACTOR = 0.5
+""" 過負荷を検知した際に同時実行数に掛ける係数の初期値 """
+
+DEFAULT_LATENCY_TOLERANCE = 2.0
+""" 最小のレイテンシの何倍を超えたら過負荷とみなすかの初期値 """
+
+DEFAULT_COOLDOWN = 1.0
+""" 同時実行数を続けて減らさない時間(秒)の初期値 """
+
+OVERLOAD_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+""" 過負荷とみなすレスポンスのステータスコード """
+
+EWMA_WEIGHT = 0.2
+""" レイテンシの指数移動平均の重み """
+
+BASELINE_DECAY = 0.05
+""" 基準のレイテンシを1件ごとに指数移動平均へ近づける重み """
+
+
+def is_overloaded_response(result: Any) -> bool:
+    """レスポンスのステータスコードが過負荷を示すか判定する"""
+    return getattr(result, "status_code", None) in OVERLOAD_STATUS_CODES
+
+
+class AdaptiveConcurrency:
+    """同時に送信するリクエスト数をAIMDで調整するクラス
+
+    リクエストが成功し、レイテンシが許容範囲内の場合は同時実行数を
+    加算的に増やし(同時実行数の件数だけ成功するごとに+increase)、
+    例外、過負荷を示すレスポンス、レイテンシの悪化を検知した場合は
+    decrease_factorを掛けて乗算的に減らします。
+    同時に実行中のリクエストがまとめて失敗した場合に減らしすぎないよう、
+    減らした後cooldown秒間は再度減らしません。
+    レイテンシの基準はlatency_targetで指定でき、省略した場合は
+    観測した指数移動平均の最小値のlatency_tolerance倍です。
+    最小値は1件ごとにBASELINE_DECAYの重みで指数移動平均へ近づけ、
+    一時的に速かった応答で基準が固定されないようにします。
+    レイテンシの指数移動平均と最小値は、keyごと(エンドポイントごと)に
+    記録します。ペイロードの大きさが異なるリクエストを比較しないよう、
+    keyには送信先のエンドポイントを指定してください。
+    レイテンシの判定には1件ごとの値ではなく指数移動平均を使用します。
+    """
+
+    def __init__(
+        self,
+        min_limit: int = DEFAULT_MIN_LIMIT,
+        max_limit: int = DEFAULT_MAX_LIMIT,
+        initial_limit: Optional[int] = None,
+        increase: float = 1.0,
+        decrease_factor: float = DEFAULT_DECREASE_FACTOR,
+        latency_target: Optional[float] = None,
+        latency_tolerance: float = DEFAULT_LATENCY_TOLERANCE,
+        cooldown: float = DEFAULT_COOLDOWN,
+        is_overloaded: Callable[[Any], bool] = is_overloaded_response,
+    ) -> None:
+        """
+        Parameters:
+            min_limit (int): 同時実行数の下限
+            max_limit (int): 同時実行数の上限
+            initial_limit (int): 同時実行数の初期値(省略時はmin_limit)
+            increase (float): 成功時に増やす量(同時実行数の件数あたり)
+            decrease_factor (float): 過負荷時に同時実行数に掛ける係数
+            latency_target (float): 過負荷とみなすレイテンシ(秒)
+            latency_tolerance (float): latency_target省略時に、最小の
+                レイテンシの何倍を超えたら過負荷とみなすか
+            cooldown (float): 同時実行数を続けて減らさない時間(秒)
+            is_overloaded (Callable): 結果が過負荷を示すか判定する関数
+        """
+        if min_limit < 1 or max_limit < min_limit:
+            raise ValueError(
+                f"1 <= min_limit <= max_limitとなるように指定してください。[{min_limit}, {max_limit}]"
+            )
+        if not 0 < decrease_factor < 1:
+            raise ValueError(
+                f"decrease_factorは0より大きく1未満で指定してください。[{decrease_factor}]"
+            )
+        self.__min_limit = min_limit
+        self.__max_limit = max_limit
+        self.__limit = float(
+            min(max(initial_limit or min_limit, min_limit), max_limit)
+        )
+        self.__increase = increase
+        self.__decrease_factor = decrease_factor
+        self.__latency_target = latency_target
+        self.__latency_tolerance = latency_tolerance
+        self.__cooldown = cooldown
+        self.__is_overloaded = is_overloaded
+        self.__condition = threading.Condition()
+        self.__in_flight = 0
+        # keyごとの[レイテンシの指数移動平均, 基準(最小値)]
+        self.__latencies: Dict[Hashable, List[float]] = {}
+        self.__last_decrease = float("-inf")
+
+    @property
+    def min_limit(self):
+        return self.__min_limit
+
+    @property
+    def max_limit(self):
+        return self.__max_limit
+
+    @property
+    def limit(self) -> int:
+        """現在の同時実行数の上限"""
+        with self.__condition:
+            return int(self.__limit)
+
+    @property
+    def in_flight(self) -> int:
+        """実行中のリクエスト数"""
+        with self.__condition:
+            return self.__in_flight
+
+    def get_latency(self, key: Hashable = None) -> Optional[float]:
+        """keyのレイテンシ(秒)の指数移動平均を取得する"""
+        with self.__condition:
+            latencies = self.__latencies.get(key)
+            return latencies[0] if latencies is not None else None
+
+    def get_baseline(self, key: Hashable = None) -> Optional[float]:
+        """keyの基準のレイテンシ(秒)を取得する"""
+        with self.__condition:
+            latencies = self.__latencies.get(key)
+            return latencies[1] if latencies is not None else None
+
+    def call(self, func: Callable[[], T], key: Hashable = None) -> T:
+        """同時実行数の枠を確保してfuncを実行し、結果から同時実行数を調整する
+
+        funcが送出した例外はそのまま送出します。
+
+        Parameters:
+            func (Callable): 実行する関数
+            key (Hashable): レイテンシを記録するキー(エンドポイント)
+        """
+        self.acquire()
+        start = time.perf_counter()
+        try:
+            result = func()
+        except Exception:
+            self.release(False, time.perf_counter() - start, key)
+            raise
+        self.release(
+            not self.__is_overloaded(result),
+            time.perf_counter() - start,
+            key,
+        )
+        return result
+
+    def acquire(self):
+        """同時実行数の枠が空くまで待機して確保する"""
+        with self.__condition:
+            while self.__in_flight >= int(self.__limit):
+                self.__condition.wait()
+            self.__in_flight += 1
+
+    def release(
+        self, is_success: bool, latency: float, key: Hashable = None
+    ):
+        """確保した枠を解放し、結果から同時実行数を調整する
+
+        Parameters:
+            is_success (bool): リクエストが成功したかどうか
+            latency (float): リクエストのレイテンシ(秒)
+            key (Hashable): レイテンシを記録するキー(エンドポイント)
+        """
+        with self.__condition:
+            self.__in_flight -= 1
+            if is_success:
+                self.__observe(key, latency)
+            if is_success and not self.__is_slow(key):
+                # 加算的に増やす
+                self.__limit = min(
+                    self.__max_limit,
+                    self.__limit + self.__increase / self.__limit,
+                )
+            else:
+                # 乗算的に減らす
+                now = time.monotonic()
+                if now - self.__last_decrease >= self.__cooldown:
+                    self.__limit = max(
+                        self.__min_limit,
+                        self.__limit * self.__decrease_factor,
+                    )
+                    self.__last_decrease = now
+            self.__condition.notify_all()
+
+    def __observe(self, key: Hashable, latency: float):
+        """keyのレイテンシの指数移動平均と、基準(最小値)を更新する
+
+        基準は指数移動平均を下回った場合に更新し、それ以外の場合は
+        BASELINE_DECAYの重みで指数移動平均に近づけます。
+        """
+        latencies = self.__latencies.get(key)
+        if latencies is None:
+            self.__latencies[key] = [latency, latency]
+            return
+        latencies[0] += EWMA_WEIGHT * (latency - latencies[0])
+        if latencies[0] < latencies[1]:
+            latencies[1] = latencies[0]
+        else:
+            latencies[1] += BASELINE_DECAY * (latencies[0] - latencies[1])
+
+    def __is_slow(self, key: Hashable) -> bool:
+        """keyのレイテンシの指数移動平均が許容範囲を超えているか判定する"""
+        latencies = self.__latencies.get(key)
+        if latencies is None:
+            return False
+        latency, baseline = latencies
+        if self.__latency_target is not None:
+            return latency > self.__latency_target
+        return latency > baseline * self.__latency_tolerance
@@ -0,0 +1,287 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.utils.utils import Utils
+
+DEFAULT_MAX_ROWS = 2000
+""" 1リクエストで送信する行数の上限の初期値 """
+
+DEFAULT_MAX_BYTES = 1024 * 1024
+""" 1リクエストで送信するJSONのバイト数の上限の初期値 """
+
+DEFAULT_MAX_DELAY = 5.0
+""" 行をバッファに保持する時間(秒)の上限の初期値 """
+
+DEFAULT_MAX_WORKERS = 8
+""" flushでエンドポイントごとの送信を並列に行うスレッド数の初期値 """
+
+Batch = List[Tuple[str, bytes]]
+""" 送信単位の行の一覧((head_item_key, エンコード済みの行)のリスト) """
+
+
+class CoalescingUploader:
+    """複数のXBRLファイルの行をエンドポイントごとにまとめて送信するクラス
+
+    addで受け取った行をエンドポイントごとのバッファにエンコードして溜め、
+    行数またはバイト数の上限に達した場合と、最も古い行が
+    max_delay秒以上バッファに残っている場合に1リクエストで送信します。
+    sealで行の追加が終わったXBRLファイルは、全ての行の送信が終わった
+    時点でon_completeに(head_item_key, 全て成功したか)が渡されます。
+    sendが例外を送出した場合は、その行の送信は失敗として扱います。
+    時間の上限は、次のXBRLファイルの解析中でも送信できるよう、
+    バックグラウンドのスレッドで確認します。そのため、sendと
+    on_completeはこのスレッドから呼び出される場合があります。
+    バッファはロックを取得して取り出し、sendとon_completeは
+    ロックを解放してから呼び出すため、送信中もaddとsealは待機しません。
+    on_completeの例外は、どちらのスレッドでも表示するのみで続行します。
+    add、seal、flushは1つのスレッドから呼び出し、最後にcloseで
+    スレッドを停止してください。
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str, Batch], bool],
+        on_complete: Callable[[str, bool], None],
+        max_rows: int = DEFAULT_MAX_ROWS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_delay: float = DEFAULT_MAX_DELAY,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+    ) -> None:
+        """
+        Parameters:
+            send (Callable): (エンドポイント, 行の一覧)を送信し、
+                成功したかどうかを返す関数
+            on_complete (Callable): XBRLファイルの全ての行の送信後に
+                (head_item_key, 全て成功したか)で呼び出す関数
+            max_rows (int): 1リクエストで送信する行数の上限
+            max_bytes (int): 1リクエストで送信するJSONのバイト数の上限
+            max_delay (float): 行をバッファに保持する時間(秒)の上限
+            max_workers (int): flushで送信を並列に行うスレッド数
+        """
+        self.__send = send
+        self.__on_complete = on_complete
+        self.__max_rows = max_rows
+        self.__max_bytes = max_bytes
+        self.__max_delay = max_delay
+        self.__max_workers = max_workers
+        # エンドポイントごとの[行の一覧, バイト数, 最初の行の追加時刻]
+        self.__buffers: Dict[str, list] = {}
+        self.__pending: Dict[str, int] = {}
+        self.__sealed: Set[str] = set()
+        self.__failed: Set[str] = set()
+        self.__request_count = 0
+        # バッファと送信状態はロックを取得して操作する
+        # (送信と完了の通知はロックの外で行う)
+        self.__condition = threading.Condition(threading.RLock())
+        self.__timer: Optional[threading.Thread] = None
+        self.__is_closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def request_count(self):
+        """送信したリクエスト数"""
+        with self.__condition:
+            return self.__request_count
+
+    @property
+    def pending_heads(self) -> List[str]:
+        """送信が完了していないhead_item_keyの一覧"""
+        with self.__condition:
+            return list(self.__pending)
+
+    def add(self, head_item_key: str, endpoint: str, rows: Iterable):
+        """XBRLファイルの行をエンドポイントのバッファに追加する
+
+        Parameters:
+            head_item_key (str): IX_HEAD_TITLEのキー
+            endpoint (str): 送信先のエンドポイント
+            rows (Iterable): 行の一覧
+        """
+        head_item_key = str(head_item_key)
+        batches = []
+        with self.__condition:
+            self.__pending.setdefault(head_item_key, 0)
+            for row in rows:
+                encoded = Utils.json_dumps(row)
+                # 区切りのカンマ分を加算
+                row_bytes = len(encoded) + 1
+                buffer = self.__buffers.get(endpoint)
+                if buffer is not None and (
+                    len(buffer[0]) >= self.__max_rows
+                    or buffer[1] + row_bytes > self.__max_bytes
+                ):
+                    batches.append((endpoint, self.__take(endpoint)))
+                    buffer = None
+                if buffer is None:
+                    buffer = self.__buffers[endpoint] = [
+                        [],
+                        0,
+                        time.monotonic(),
+                    ]
+                    # 保持時間の上限を確認するスレッドに知らせる
+                    self.__start_timer()
+                    self.__condition.notify_all()
+                buffer[0].append((head_item_key, encoded))
+                buffer[1] += row_bytes
+                self.__pending[head_item_key] += 1
+            batches.extend(self.__take_expired())
+        self.__send_batches(batches)
+
+    def seal(self, head_item_key: str):
+        """XBRLファイルの行の追加が終わったことを通知する"""
+        head_item_key = str(head_item_key)
+        with self.__condition:
+            self.__pending.setdefault(head_item_key, 0)
+            self.__sealed.add(head_item_key)
+            completed = self.__complete([head_item_key])
+            batches = self.__take_expired()
+        self.__notify(completed)
+        self.__send_batches(batches)
+
+    def flush(self):
+        """全てのバッファを送信する"""
+        with self.__condition:
+            batches = [
+                (endpoint, self.__take(endpoint))
+                for endpoint in list(self.__buffers)
+            ]
+        self.__send_batches(batches)
+
+    def close(self):
+        """全てのバッファを送信し、保持時間を確認するスレッドを停止する"""
+        self.flush()
+        with self.__condition:
+            self.__is_closed = True
+            self.__condition.notify_all()
+            timer = self.__timer
+        if timer is not None and timer is not threading.current_thread():
+            timer.join()
+
+    def __start_timer(self):
+        """保持時間の上限を確認するスレッドを開始する(初回のみ)"""
+        if self.__timer is not None or self.__is_closed:
+            return
+        self.__timer = threading.Thread(
+            target=self.__watch_expired,
+            name="coalescing-uploader-timer",
+            daemon=True,
+        )
+        self.__timer.start()
+
+    def __watch_expired(self):
+        """最も古い行の保持時間が上限に達したバッファを送信する"""
+        while True:
+            with self.__condition:
+                if self.__is_closed:
+                    return
+                if len(self.__buffers) == 0:
+                    self.__condition.wait()
+                    continue
+                deadline = (
+                    min(buffer[2] for buffer in self.__buffers.values())
+                    + self.__max_delay
+                )
+                timeout = deadline - time.monotonic()
+                if timeout > 0:
+                    self.__condition.wait(timeout)
+                    continue
+                batches = self.__take_expired()
+            self.__send_batches(batches)
+
+    def __take_expired(self) -> List[Tuple[str, Batch]]:
+        """保持時間の上限を超えたバッファを取り出す"""
+        now = time.monotonic()
+        return [
+            (endpoint, self.__take(endpoint))
+            for endpoint, buffer in list(self.__buffers.items())
+            if now - buffer[2] >= self.__max_delay
+        ]
+
+    def __take(self, endpoint: str) -> Batch:
+        """バッファから行を取り出す"""
+        return self.__buffers.pop(endpoint)[0]
+
+    def __send_batches(self, batches: List[Tuple[str, Batch]]):
+        """行の一覧を送信し、送信が完了したXBRLファイルを通知する
+
+        ロックを取得せずに呼び出します。
+        """
+        batches = [(endpoint, rows) for endpoint, rows in batches if rows]
+        if len(batches) == 0:
+            return
+        if len(batches) == 1:
+            results = [self.__send_batch(batches[0])]
+        else:
+            with ThreadPoolExecutor(
+                max_workers=min(self.__max_workers, len(batches))
+            ) as executor:
+                results = list(executor.map(self.__send_batch, batches))
+
+        with self.__condition:
+            self.__request_count += len(batches)
+            heads = []
+            for (_, rows), is_ok in zip(batches, results):
+                for head_item_key, _ in rows:
+                    self.__pending[head_item_key] -= 1
+                    if not is_ok:
+                        self.__failed.add(head_item_key)
+                    heads.append(head_item_key)
+            completed = self.__complete(dict.fromkeys(heads))
+        self.__notify(completed)
+
+    def __send_batch(self, batch: Tuple[str, Batch]) -> bool:
+        """1つのエンドポイントの行を送信する
+
+        sendが例外を送出した場合は失敗として扱い、送信待ちの行数を
+        必ず減らせるようにします。
+        """
+        endpoint, rows = batch
+        try:
+            return bool(self.__send(endpoint, rows))
+        except Exception as e:
+            print(f"送信中にエラーが発生しました。[{endpoint}] {e}")
+            return False
+
+    def __complete(
+        self, head_item_keys: Iterable[str]
+    ) -> List[Tuple[str, bool]]:
+        """全ての行の送信が終わったXBRLファイルを取り出す
+
+        ロックを取得して呼び出し、通知は戻り値でロックの外から行います。
+
+        Returns:
+            list: (head_item_key, 全て成功したか)の一覧
+        """
+        completed = []
+        for head_item_key in head_item_keys:
+            if (
+                head_item_key in self.__sealed
+                and self.__pending.get(head_item_key) == 0
+            ):
+                del self.__pending[head_item_key]
+                self.__sealed.discard(head_item_key)
+                is_ok = head_item_key not in self.__failed
+                self.__failed.discard(head_item_key)
+                completed.append((head_item_key, is_ok))
+        return completed
+
+    def __notify(self, completed: List[Tuple[str, bool]]):
+        """送信が完了したXBRLファイルをon_completeに渡す
+
+        on_completeの例外は呼び出したスレッドによらず表示するのみで、
+        残りのXBRLファイルの通知を続けます。
+        """
+        for head_item_key, is_ok in completed:
+            try:
+                self.__on_complete(head_item_key, is_ok)
+            except Exception as e:
+                print(
+                    f"完了の通知中にエラーが発生しました。[{head_item_key}] {e}"
+                )
@@ -0,0 +1,172 @@
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.utils.utils import Utils
+
+DEFAULT_DEAD_LETTER_DIR = "dead_letters"
+""" 出力先ディレクトリに作成するデッドレターのディレクトリ名の初期値 """
+
+DEAD_LETTER_SUFFIX = ".jsonl"
+""" デッドレターのファイルの拡張子 """
+
+
+class DeadLetterQueue:
+    """送信に失敗したペイロードを保存するディレクトリ
+
+    再試行しても送信できなかったペイロードを1件1ファイルで保存します。
+    ファイルは1行目が送信先の情報(メタデータ)、2行目がペイロードの
+    JSONです。XBRLファイルを再度解析せずに、後から再送信できます。
+    ファイルは一時ファイルに書き込んでから置き換えるため、
+    書き込み途中のファイルが読み込まれることはありません。
+    後の実行で送信に成功したタスクやXBRLファイルのペイロードは、
+    discardで削除して二重に再送信しないようにします。
+    """
+
+    def __init__(self, directory: str) -> None:
+        """
+        Parameters:
+            directory (str): デッドレターを保存するディレクトリ
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.__directory = directory
+        self.__lock = threading.Lock()
+        # head_item_keyごとの{ファイルのパス: タスクのID}(discardで初めて作成)
+        self.__heads: Optional[Dict[str, Dict[str, Optional[str]]]] = None
+
+    @property
+    def directory(self):
+        return self.__directory
+
+    def __len__(self) -> int:
+        return len(self.entries())
+
+    def put(
+        self,
+        endpoint: str,
+        data: Any,
+        head_item_key: Optional[str] = None,
+        task_id: Optional[str] = None,
+        zip_path: Optional[str] = None,
+        status_code: Optional[int] = None,
+        error: Optional[str] = None,
+    ) -> str:
+        """ペイロードを保存する
+
+        Parameters:
+            endpoint (str): 送信に使用するInsertのメソッド名
+            data (Any): ペイロード(エンコード済みのJSONの場合はbytes)
+            head_item_key (str): IX_HEAD_TITLEのキー
+            task_id (str): タスクのID
+            zip_path (str): 解析したXBRLファイルのzipファイルのパス
+            status_code (int): 最後のレスポンスのステータスコード
+            error (str): 最後に発生した例外
+
+        Returns:
+            str: 保存したファイルのパス
+        """
+        meta = {
+            "endpoint": endpoint,
+            "head_item_key": (
+                str(head_item_key) if head_item_key is not None else None
+            ),
+            "task_id": task_id,
+            "zip_path": str(zip_path) if zip_path is not None else None,
+            "status_code": status_code,
+            "error": error,
+            "at": datetime.now().isoformat(),
+        }
+        payload = (
+            data if isinstance(data, bytes) else Utils.json_dumps(data)
+        )
+
+        name = f"{time.time_ns()}_{endpoint}_{uuid.uuid4().hex[:8]}"
+        path = os.path.join(self.__directory, name + DEAD_LETTER_SUFFIX)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(Utils.json_dumps(meta))
+            f.write(b"\n")
+            f.write(payload)
+            f.write(b"\n")
+        os.replace(tmp_path, path)
+        with self.__lock:
+            if self.__heads is not None:
+                self.__heads.setdefault(meta["head_item_key"], {})[
+                    path
+                ] = task_id
+        return path
+
+    def entries(self) -> List[str]:
+        """保存済みのファイルのパスの一覧(保存順)"""
+        names = sorted(
+            name
+            for name in os.listdir(self.__directory)
+            if name.endswith(DEAD_LETTER_SUFFIX)
+        )
+        return [os.path.join(self.__directory, name) for name in names]
+
+    def load(self, path: str) -> Tuple[Dict[str, Any], Any]:
+        """保存したファイルを読み込む
+
+        Returns:
+            tuple: (メタデータ, ペイロード)
+        """
+        with open(path, "rb") as f:
+            meta = json.loads(f.readline())
+            data = json.loads(f.readline())
+        return meta, data
+
+    def remove(self, path: str):
+        """再送信に成功したファイル、または不要になったファイルを削除する"""
+        with self.__lock:
+            self.__remove(path)
+
+    def discard(
+        self, head_item_key: str, task_id: Optional[str] = None
+    ) -> int:
+        """送信に成功したタスクまたはXBRLファイルのファイルを削除する
+
+        Parameters:
+            head_item_key (str): IX_HEAD_TITLEのキー
+            task_id (str): タスクのID(省略時はXBRLファイルの全てのファイル)
+
+        Returns:
+            int: 削除したファイルの数
+        """
+        with self.__lock:
+            paths = self.__index().get(str(head_item_key), {})
+            targets = [
+                path
+                for path, path_task_id in paths.items()
+                if task_id is None or path_task_id == task_id
+            ]
+            for path in targets:
+                self.__remove(path)
+        return len(targets)
+
+    def __remove(self, path: str):
+        """ファイルを削除し、索引から取り除く(ロックを取得して呼び出す)"""
+        if os.path.exists(path):
+            os.remove(path)
+        if self.__heads is not None:
+            for paths in self.__heads.values():
+                paths.pop(path, None)
+
+    def __index(self) -> Dict[str, Dict[str, Optional[str]]]:
+        """保存済みのファイルの索引を取得する(ロックを取得して呼び出す)"""
+        if self.__heads is None:
+            self.__heads = {}
+            for path in self.entries():
+                try:
+                    with open(path, "rb") as f:
+                        meta = json.loads(f.readline())
+                except (OSError, ValueError):
+                    continue
+                self.__heads.setdefault(meta.get("head_item_key"), {})[
+                    path
+                ] = meta.get("task_id")
+        return self.__heads
@@ -0,0 +1,246 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+DEFAULT_INDEX_NAME = "ingest_index.sqlite3"
+""" 出力先ディレクトリに作成するインデックスファイル名の初期値 """
+
+HASH_CHUNK_SIZE = 1024 * 1024
+""" ファイルのハッシュを計算する際に1回で読み込むバイト数 """
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS heads (
+    head_item_key TEXT PRIMARY KEY,
+    zip_name TEXT,
+    size INTEGER,
+    mtime_ns INTEGER,
+    content_hash TEXT,
+    ingested_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS source_files (
+    source_file_id TEXT PRIMARY KEY,
+    head_item_key TEXT,
+    content_hash TEXT,
+    ingested_at TEXT NOT NULL
+);
+"""
+
+
+def file_hash(file_path: str) -> str:
+    """ファイルの内容のSHA-256を16進数の文字列で返す"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class IngestIndex:
+    """APIに挿入済みのhead_item_keyとsource_file_idを保持するクラス
+
+    SQLiteのファイルに挿入に成功したXBRLファイル(head_item_key)と
+    ソースファイル(source_file_id)を内容のハッシュとともに記録します。
+    再実行時はAPIに問い合わせる前にこのインデックスを参照します。
+    XBRLファイルはサイズと更新日時が記録と一致すれば内容を読まずに
+    挿入済みとし、一致しない場合のみハッシュを計算して比較します。
+    API側のデータと食い違った場合はreconcileで照合できます。
+    """
+
+    def __init__(self, db_path: str) -> None:
+        """
+        Parameters:
+            db_path (str): インデックスのSQLiteファイルのパス
+        """
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.__db_path = db_path
+        self.__lock = threading.Lock()
+        self.__conn = sqlite3.connect(
+            db_path, timeout=30.0, check_same_thread=False
+        )
+        # 複数のプロセスから読み書きできるようにWALモードにする
+        self.__conn.execute("PRAGMA journal_mode=WAL")
+        self.__conn.execute("PRAGMA synchronous=NORMAL")
+        self.__conn.executescript(_SCHEMA)
+        self.__conn.commit()
+
+    @property
+    def db_path(self):
+        return self.__db_path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self) -> int:
+        """記録済みのXBRLファイル数"""
+        with self.__lock:
+            (count,) = self.__conn.execute(
+                "SELECT COUNT(*) FROM heads"
+            ).fetchone()
+        return count
+
+    def close(self):
+        """SQLiteの接続を閉じる"""
+        with self.__lock:
+            self.__conn.close()
+
+    def has_head(
+        self, head_item_key: str, zip_path: Optional[str] = None
+    ) -> bool:
+        """head_item_keyが挿入済みか確認する
+
+        zip_pathを指定した場合は、記録時とファイルの内容が異なる場合に
+        Falseを返します。
+
+        Parameters:
+            head_item_key (str): IX_HEAD_TITLEのキー
+            zip_path (str): XBRLファイルのzipファイルのパス
+        """
+        with self.__lock:
+            row = self.__conn.execute(
+                "SELECT size, mtime_ns, content_hash FROM heads"
+                " WHERE head_item_key = ?",
+                (str(head_item_key),),
+            ).fetchone()
+        if row is None:
+            return False
+        if zip_path is None:
+            return True
+
+        size, mtime_ns, content_hash = row
+        stat = os.stat(zip_path)
+        if stat.st_size == size and stat.st_mtime_ns == mtime_ns:
+            return True
+        if content_hash is None or stat.st_size != size:
+            return False
+
+        # 更新日時のみ異なる場合は内容を比較する
+        if file_hash(zip_path) != content_hash:
+            return False
+        with self.__lock, self.__conn:
+            self.__conn.execute(
+                "UPDATE heads SET mtime_ns = ? WHERE head_item_key = ?",
+                (stat.st_mtime_ns, str(head_item_key)),
+            )
+        return True
+
+    def mark_head(
+        self, head_item_key: str, zip_path: Optional[str] = None
+    ):
+        """head_item_keyを挿入済みとして記録する
+
+        Parameters:
+            head_item_key (str): IX_HEAD_TITLEのキー
+            zip_path (str): XBRLファイルのzipファイルのパス
+        """
+        zip_name = size = mtime_ns = content_hash = None
+        if zip_path is not None:
+            stat = os.stat(zip_path)
+            zip_name = os.path.basename(zip_path)
+            size = stat.st_size
+            mtime_ns = stat.st_mtime_ns
+            content_hash = file_hash(zip_path)
+        with self.__lock, self.__conn:
+            self.__conn.execute(
+                "INSERT OR REPLACE INTO heads VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    str(head_item_key),
+                    zip_name,
+                    size,
+                    mtime_ns,
+                    content_hash,
+                    datetime.now().isoformat(),
+                ),
+            )
+
+    def remove_head(self, head_item_key: str):
+        """head_item_keyと、そのソースファイルの記録を削除する"""
+        with self.__lock, self.__conn:
+            self.__conn.execute(
+                "DELETE FROM heads WHERE head_item_key = ?",
+                (str(head_item_key),),
+            )
+            self.__conn.execute(
+                "DELETE FROM source_files WHERE head_item_key = ?",
+                (str(head_item_key),),
+            )
+
+    def head_item_keys(self) -> List[str]:
+        """記録済みのhead_item_keyの一覧"""
+        with self.__lock:
+            rows = self.__conn.execute(
+                "SELECT head_item_key FROM heads"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def has_source_file(self, source_file_id: str) -> bool:
+        """source_file_idが挿入済みか確認する"""
+        with self.__lock:
+            row = self.__conn.execute(
+                "SELECT 1 FROM source_files WHERE source_file_id = ?",
+                (source_file_id,),
+            ).fetchone()
+        return row is not None
+
+    def mark_source_files(
+        self,
+        source_files: Dict[str, Optional[str]],
+        head_item_key: Optional[str] = None,
+    ):
+        """source_file_idを挿入済みとして記録する
+
+        Parameters:
+            source_files (dict): source_file_idと内容のハッシュの辞書
+            head_item_key (str): ソースファイルを挿入したIX_HEAD_TITLEのキー
+        """
+        ingested_at = datetime.now().isoformat()
+        key = str(head_item_key) if head_item_key is not None else None
+        with self.__lock, self.__conn:
+            self.__conn.executemany(
+                "INSERT OR REPLACE INTO source_files VALUES (?, ?, ?, ?)",
+                [
+                    (source_file_id, key, content_hash, ingested_at)
+                    for source_file_id, content_hash in source_files.items()
+                ],
+            )
+
+    def source_file_ids(self) -> List[str]:
+        """記録済みのsource_file_idの一覧"""
+        with self.__lock:
+            rows = self.__conn.execute(
+                "SELECT source_file_id FROM source_files"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def reconcile(
+        self,
+        is_active_head: Callable[[str], bool],
+        head_item_keys: Optional[Iterable[str]] = None,
+    ) -> List[str]:
+        """記録済みのhead_item_keyをAPIと照合する
+
+        APIで有効になっていないhead_item_keyの記録を削除し、
+        次回の実行で再度挿入されるようにします。
+
+        Parameters:
+            is_active_head (Callable): head_item_keyが有効か確認する関数
+            head_item_keys (Iterable): 照合するキー(省略時は全件)
+
+        Returns:
+            list: 記録を削除したhead_item_keyの一覧
+        """
+        if head_item_keys is None:
+            head_item_keys = self.head_item_keys()
+        removed = []
+        for head_item_key in head_item_keys:
+            if not is_active_head(head_item_key):
+                self.remove_head(head_item_key)
+                removed.append(head_item_key)
+        return removed
@@ -1,125 +1,426 @@
 import gc
+import gzip
+import hashlib
 import pprint
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import random
+import time
+from collections import deque
+from concurrent.futures import (
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+)
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import Dict, List
+from typing import Callable, Dict, List, Optional, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
 from tqdm import tqdm
 
 from app.api import endpoints as ep
 from app.exception.xbrl_model_exception import NotXbrlDirectoryException
 from app.ix_models import XBRLModel
+from app.ix_parser.source_file_lookup import get_source_file_lookup
 from app.utils.utils import Utils
 
+from .adaptive_concurrency import AdaptiveConcurrency
+from .coalescing_uploader import DEFAULT_MAX_DELAY, CoalescingUploader
+from .dead_letter import DeadLetterQueue
 from .exceptions import ApiInsertionException
+from .ingest_index import IngestIndex
+from .pipeline import IngestPipeline, PipelineStage
+from .run_journal import RunJournal
+
+DEFAULT_MAX_WORKERS = 8
+""" APIへの挿入を並列に行うスレッド数(コネクションプールの大きさ)の初期値 """
+
+DEFAULT_TIMEOUT = 60.0
+""" APIリクエストのタイムアウト(秒)の初期値 """
+
+DEFAULT_CHUNK_ROWS = 2000
+""" 1リクエストで送信する行数の上限の初期値 """
+
+DEFAULT_CHUNK_BYTES = 1024 * 1024
+""" 1リクエストで送信するJSONのバイト数の上限の初期値 """
+
+DEFAULT_COMPRESS_LEVEL = 6
+""" 圧縮モードのgzipの圧縮レベルの初期値 """
+
+DEFAULT_RETRIES = 3
+""" 失敗したリクエストを再試行する回数の初期値 """
+
+DEFAULT_BACKOFF = 0.5
+""" 再試行の待機時間(秒)の基準値の初期値(再試行ごとに2倍) """
+
+DEFAULT_BACKOFF_MAX = 30.0
+""" 再試行の待機時間(秒)の上限の初期値 """
+
+RETRY_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+""" 再試行するレスポンスのステータスコード """
+
+DEFAULT_STAGE_WORKERS = {"serialize": 1, "upload": 2, "summary": 1}
+""" パイプラインの段階ごとのスレッド数の初期値(解析はworkersを使用) """
+
+TASK_ID_VERSION = 2
+""" ジャーナルに記録するタスクのIDの形式のバージョン """
+
+_seeded_index_paths = set()
+""" ソースファイルの存在確認に読み込み済みのインデックスのパス """
+
+
+def seed_source_file_lookup(
+    is_exist_source_file_id_api_url: Optional[str],
+    ingest_index_path: Optional[str],
+):
+    """インデックスに記録済みのsource_file_idを存在確認に登録する
+
+    プロセスごとに1回だけインデックスを読み込みます。
+    """
+    lookup = get_source_file_lookup(is_exist_source_file_id_api_url)
+    if lookup is None or ingest_index_path is None:
+        return
+    if ingest_index_path in _seeded_index_paths:
+        return
+    with IngestIndex(ingest_index_path) as index:
+        lookup.add(index.source_file_ids())
+    _seeded_index_paths.add(ingest_index_path)
+
+
+def parse_xbrl_zip(
+    zip_path: str,
+    output_path: str,
+    is_exist_source_file_id_api_url: Optional[str] = None,
+    ingest_index_path: Optional[str] = None,
+) -> Dict[str, any]:
+    """<p>XBRLファイルを解析し、全てのアイテムを取得します。</p>
+    <p>Insert.insert_xbrl_dirのワーカープロセスで実行します。
+    例外は呼び出し元に送らず、errorに格納して返します。
+    解析結果のタグは検証を省略して生成します(trusted)。</p>
+    <h3>Attributes:</h3>
+        zip_path (str): XBRLファイルのzipファイルのパス
+        output_path (str): 出力先ディレクトリ
+        is_exist_source_file_id_api_url (str): ソースファイルIDの存在確認URL
+        ingest_index_path (str): 挿入済みのインデックスのパス
+    <h3>Returns:</h3>
+        dict: zip_path, items, model(表示用の文字列), error
+    """
+    result = {
+        "zip_path": zip_path,
+        "items": None,
+        "model": None,
+        "error": None,
+    }
+    try:
+        seed_source_file_lookup(
+            is_exist_source_file_id_api_url, ingest_index_path
+        )
+        with XBRLModel(
+            zip_path,
+            output_path,
+            is_exist_source_file_id_api_url=is_exist_source_file_id_api_url,
+            extract=False,
+            trusted=True,
+        ) as model:
+            result["items"] = model.get_all_items()
+            result["model"] = str(model)
+    except NotXbrlDirectoryException:
+        result["error"] = "無効なXBRLファイル"
+    except Exception as e:
+        result["error"] = f"解析中にエラーが発生しました({e})"
+    return result
 
 
 class Insert:
     """APIにデータを挿入するためのクラス
     <h3>Attributes:</h3>
         output_path: 出力先ディレクトリ
+        api_base_url: APIのベースURL
+        max_workers: APIへの挿入を並列に行うスレッド数(コネクションプールの大きさ)
+        timeout: APIリクエストのタイムアウト(秒)
+        chunk_rows: 1リクエストで送信する行数の上限
+        chunk_bytes: 1リクエストで送信するJSONのバイト数の上限
+        compress: 本文をgzipで圧縮して送信するかどうか
+        compress_level: gzipの圧縮レベル
+        ingest_index: 挿入済みのXBRLファイルとソースファイルのインデックス
+        journal: 挿入処理の進捗を記録するジャーナル
+            (paramsにjournal_params()と同じ値を指定して作成する)
+        retries: 失敗したリクエストを再試行する回数
+        backoff: 再試行の待機時間(秒)の基準値(再試行ごとに2倍)
+        backoff_max: 再試行の待機時間(秒)の上限
+        dead_letter: 再試行しても送信できなかったペイロードの保存先
+        coalesce_delay: まとめて送信するモードで行を保持する時間(秒)の上限
+        concurrency: 同時に送信するリクエスト数を調整するコントローラー
+            (指定した場合はmax_workersに代わりmax_limitまで並列に送信)
     """
 
-    def __init__(self, output_path: str, api_base_url: str = None):
+    def __init__(
+        self,
+        output_path: str,
+        api_base_url: str = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        timeout: float = DEFAULT_TIMEOUT,
+        chunk_rows: int = DEFAULT_CHUNK_ROWS,
+        chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+        compress: bool = False,
+        compress_level: int = DEFAULT_COMPRESS_LEVEL,
+        ingest_index: Optional[IngestIndex] = None,
+        journal: Optional[RunJournal] = None,
+        retries: int = DEFAULT_RETRIES,
+        backoff: float = DEFAULT_BACKOFF,
+        backoff_max: float = DEFAULT_BACKOFF_MAX,
+        dead_letter: Optional[DeadLetterQueue] = None,
+        coalesce_delay: float = DEFAULT_MAX_DELAY,
+        concurrency: Optional[AdaptiveConcurrency] = None,
+    ):
         self.output_path = output_path
         self.url = api_base_url + "/api/v1"
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.chunk_rows = chunk_rows
+        self.chunk_bytes = chunk_bytes
+        self.compress = compress
+        self.compress_level = compress_level
+        self.concurrency = concurrency
+        # 送信スレッド数とコネクションプールの大きさ
+        self.pool_size = (
+            max(max_workers, concurrency.max_limit)
+            if concurrency is not None
+            else max_workers
+        )
+        self.session = self.__create_session(self.pool_size)
+        self.ingest_index = ingest_index
+        if journal is not None and journal.params != self.journal_params(
+            chunk_rows, chunk_bytes
+        ):
+            # 分割が異なるとタスクのIDが別のチャンクを指すため再開できない
+            raise ValueError(
+                f"ジャーナルのparamsがチャンクの分割と一致しません。[{journal.params}]"
+            )
+        self.journal = journal
+        self.retries = retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.dead_letter = dead_letter
+        self.coalesce_delay = coalesce_delay
+        self.__coalescer: Optional[CoalescingUploader] = None
+        self.__coalesce_jobs = {}
+        self.__coalesce_results = []
+        if ingest_index is not None:
+            seed_source_file_lookup(
+                self.url + ep.IS_EXITS_SOURCE_FILE_ID,
+                ingest_index.db_path,
+            )
+
+    @staticmethod
+    def journal_params(
+        chunk_rows: int = DEFAULT_CHUNK_ROWS,
+        chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+    ) -> Dict[str, int]:
+        """ジャーナルのタスクのIDの前提となるパラメータを取得する
+
+        タスクのIDはソースファイルのID、キー、チャンク番号のため、
+        チャンクの分割が同じ実行の間でのみ再開に使用できます。
+        """
+        return {
+            "task_id_version": TASK_ID_VERSION,
+            "chunk_rows": chunk_rows,
+            "chunk_bytes": chunk_bytes,
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @staticmethod
+    def __create_session(pool_size: int) -> requests.Session:
+        """接続を再利用するセッションを作成する
+
+        コネクションプールの大きさは、APIへの挿入を並列に行うスレッド数に
+        合わせます。接続はKeep-Aliveで維持され、エンドポイントごとに
+        TLSハンドシェイクを行いません。
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def close(self):
+        """セッションを閉じ、プール中の接続を解放する"""
+        self.session.close()
+
+    def __send(
+        self,
+        send: Callable[[], requests.Response],
+        url: Optional[str] = None,
+    ) -> requests.Response:
+        """リクエストを送信し、失敗した場合は指数バックオフで再試行する
+
+        接続エラー、タイムアウト、RETRY_STATUS_CODESのステータスコードの
+        場合に最大retries回再試行します。待機時間は0からbackoff×2^n
+        (上限backoff_max)までのランダムな時間(フルジッター)です。
+        再試行しても失敗した場合は、最後のレスポンスを返すか例外を送出します。
+        同時実行数の調整では、レイテンシをurl(エンドポイント)ごとに
+        比較します。
+        """
+        for attempt in range(self.retries + 1):
+            try:
+                if self.concurrency is not None:
+                    # 同時実行数の枠内で送信し、結果を調整に反映する
+                    response = self.concurrency.call(send, url)
+                else:
+                    response = send()
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.retries:
+                    raise
+            else:
+                if (
+                    response.status_code not in RETRY_STATUS_CODES
+                    or attempt >= self.retries
+                ):
+                    return response
+            delay = min(self.backoff_max, self.backoff * 2**attempt)
+            time.sleep(random.uniform(0, delay))
+
+    def __post_data(self, url: str, data) -> requests.Response:
+        """{"data": data}をPOSTする
+
+        本文は1度だけエンコードし、圧縮モードの場合はgzipで圧縮して
+        Content-Encoding: gzipを付けて送信します。dataがエンコード済みの
+        JSON配列(bytes)の場合は、再度エンコードせずに使用します。
+        """
+        if isinstance(data, bytes):
+            body = b'{"data":' + data + b"}"
+        else:
+            body = Utils.json_dumps({"data": data})
+
+        headers = {"Content-Type": "application/json"}
+        if self.compress:
+            body = gzip.compress(body, compresslevel=self.compress_level)
+            headers["Content-Encoding"] = "gzip"
+        return self.__send(
+            lambda: self.session.post(
+                url, data=body, headers=headers, timeout=self.timeout
+            ),
+            url,
+        )
 
     def ix_head_titles(self, data):
         url = self.url + ep.POST_HEAD_TITLES
-        response = requests.post(url, json={"data": data})
+        response = self.__post_data(url, data)
         return response
 
     def ix_non_numerics(self, data):
         url = self.url + ep.POST_NON_NUMERICS
-        response = requests.post(url, json={"data": data})
+        response = self.__post_data(url, data)
         return response
 
     def ix_non_fractions(self, data):
         url = self.url + ep.POST_NON_FRACTIONS
-        response = requests.post(url, json={"data": data})
+        response = self.__post_data(url, data)
         return response
 
     def label_locs(self, data):
         url = self.url + ep.POST_LABEL_LOCS
-        response = requests.post(url, json={"data": data})
+        response = self.__post_data(url, data)
         return response
 
     def label_arcs(self, data):
         url = self.url + ep.POST_LABEL_ARCS
-        response = requests.post(url, json={"data": data})
+        response = self.__post_data(url, data)
         return response
 
     def label_values(self, data):
         url = self.url + ep.POST_LABEL_VALUES
-        response = requests.post(url, json={"data": data})
+        response = self.__post_data(url, data)
         return response
 
     def cal_locs(self, data):
         url = self.url + ep.POST_CAL_LOCS
-        response = requests.post(url, json={"data": data})
+        response = self.__post_data(url, data)
         return response
 
     def cal_arcs(self, data):
         url = self.url + ep.POST_CAL_ARCS
-        response = requests.post(url, json={"data": data})
+        response = self.__post_data(url, data)
         return response
 
     def pre_locs(self, data):
         url = self.url + ep.POST_PRE_LOCS
-        response = requests.post(url, json={"data": data})
+        response = self.__post_data(url, data)
         return response
 
     def pre_arcs(self, data):
         url = self.url + ep.POST_PRE_ARCS
-        response = requests.post(url, json={"data": data})
+        response = self.__post_data(url, data)
         return response
 
     def def_locs(self, data):
         url = self.url + ep.POST_DEF_LOCS
-        response = requests.post(url, json={"data": data})
+        response = self.__post_data(url, data)
         if response.status_code != 200:
             print(f"エラーが発生しました。(defLocs):{response.json()}")
         return response
 
     def def_arcs(self, data):
         url = self.url + ep.POST_DEF_ARCS
-        response = requests.post(url, json={"data": data})
+        response = self.__post_data(url, data)
         if response.status_code != 200:
             print(f"エラーが発生しました。(defArcs){response.json()}")
         return response
 
     def sources(self, data):
         url = self.url + ep.POST_SOURCES
-        response = requests.post(url, json={"data": data})
+        response = self.__post_data(url, data)
         return response
 
     def schemas(self, data):
         url = self.url + ep.POST_SCHEMAS
-        response = requests.post(url, json={"data": data})
+        response = self.__post_data(url, data)
         return response
 
     def file_path(self, data):
         url = self.url + ep.POST_FILE_PATH
-        response = requests.post(url, json=data)
+        response = self.__send(
+            lambda: self.session.post(
+                url, json=data, timeout=self.timeout
+            ),
+            url,
+        )
         return response
 
     def qualitative(self, data):
         url = self.url + ep.POST_QUALITATIVE
-        response = requests.post(url, json={"data": data})
+        response = self.__post_data(url, data)
         return response
 
     def set_head_active(self, head_item_key):
         url = self.url + ep.UPDATE_HEAD_ACTIVE
-        response = requests.patch(
-            url, params={"head_item_key": head_item_key}
+        response = self.__send(
+            lambda: self.session.patch(
+                url,
+                params={"head_item_key": head_item_key},
+                timeout=self.timeout,
+            ),
+            url,
         )
         return response
 
     def is_active_head(self, head_item_key):
         url = self.url + ep.IS_ACTIVE_HEAD
-        response = requests.get(
-            url, params={"head_item_key": head_item_key}
+        response = self.__send(
+            lambda: self.session.get(
+                url,
+                params={"head_item_key": head_item_key},
+                timeout=self.timeout,
+            ),
+            url,
         )
         if response.status_code == 200:
             return response.json()
@@ -127,8 +428,13 @@ class Insert:
 
     def update_head_generate(self, head_item_key):
         url = self.url + ep.UPDATE_HEAD_GENERATE
-        response = requests.patch(
-            url, params={"head_item_key": head_item_key}
+        response = self.__send(
+            lambda: self.session.patch(
+                url,
+                params={"head_item_key": head_item_key},
+                timeout=self.timeout,
+            ),
+            url,
         )
         return response
 
@@ -142,35 +448,120 @@ class Insert:
         # head_item_keyを生成
         head_item_key = Utils.string_to_uuid(Path(zip_path).name)
         # XBRLModelのインスタンスを作成
-        model = XBRLModel(zip_path, self.output_path)
-        # XBRLファイルから全てのアイテムを取得
-        items = model.get_all_items()
+        with XBRLModel(
+            zip_path, self.output_path, extract=False, trusted=True
+        ) as model:
+            # XBRLファイルから全てのアイテムを取得
+            items = model.get_all_items()
+            model_str = str(model)
         # APIにデータを挿入
         err_endpoints = self.__insert_api_push(items)
         if len(err_endpoints) == 0:
             # サマリーの挿入
             if self.generate_summary(head_item_key):
-                print(f"サマリーを生成しました: {model}")
+                print(f"サマリーを生成しました: {model_str}")
             else:
-                print(f"サマリーの生成に失敗しました: {model}")
-            print(f"Success: {model}")
+                print(f"サマリーの生成に失敗しました: {model_str}")
+            print(f"Success: {model_str}")
         else:
-            print(model)
+            print(model_str)
             print(f"下記のエンドポイントでエラーが発生しました。")
             pprint.pprint(err_endpoints)
 
-    def insert_xbrl_dir(self, dir_path):
+    def insert_xbrl_dir(
+        self,
+        dir_path,
+        workers: int = 1,
+        pipeline: bool = False,
+        stage_workers: Optional[Dict[str, int]] = None,
+        coalesce: bool = False,
+    ):
         """
         <p>XBRLファイルを解析し、APIにデータを挿入します。</p>
         <p>このメソッドは複数のXBRLファイルを解析する際に使用します。</p>
+        <p>workersが2以上の場合は、XBRLファイルの解析を複数のプロセスで
+        並列に行い、解析が終わったものからファイル順にAPIへ挿入します。</p>
+        <p>pipelineがTrueの場合は、解析(展開を含む)、シリアライズ、送信、
+        サマリー生成の各段階を上限付きのキューでつなぎ、段階ごとに
+        並行して処理します。挿入の順序はファイル順になりません。</p>
+        <p>coalesceがTrueの場合は、ヘッダー情報(ファイルパス、タイトル、
+        ソースファイル)をXBRLファイルごとに先に送信し、それ以外の行は
+        複数のXBRLファイルにまたがってエンドポイントごとにまとめて
+        送信します。行数、バイト数(chunk_rows, chunk_bytes)または
+        保持時間(coalesce_delay)の上限で送信し、全ての行を送信できた
+        XBRLファイルから有効にします。保持時間の上限はバックグラウンドの
+        スレッドで確認するため、次のXBRLファイルの解析に時間がかかる
+        場合も送信が遅れません。</p>
         <h3>Attributes:</h3>
             dir_path (str): XBRLファイルのディレクトリのパス
+            workers (int): 解析を行うプロセス数(デフォルトは1)
+            pipeline (bool): 段階ごとに並行して処理するかどうか
+            stage_workers (dict): 段階("serialize", "upload", "summary")
+                ごとのスレッド数
+            coalesce (bool): 複数のXBRLファイルの行をまとめて送信するかどうか
         <h3>Raises:</h3>
             ApiInsertionException: 全てのAPI挿入が失敗した場合
+            ValueError: pipelineとcoalesceを同時に指定した場合
         """
+        if pipeline and coalesce:
+            raise ValueError("pipelineとcoalesceは同時に指定できません。")
 
         zip_paths = list(Path(dir_path).rglob("*.zip"))
 
+        # ジャーナルで完了済みのディレクトリは省略
+        if self.journal is not None and self.journal.is_dir_done(
+            dir_path, len(zip_paths)
+        ):
+            print(f"Already done: {dir_path}")
+            return
+
+        if coalesce:
+            self.__coalescer = CoalescingUploader(
+                self.__send_coalesced,
+                self.__complete_coalesced,
+                max_rows=self.chunk_rows,
+                max_bytes=self.chunk_bytes,
+                max_delay=self.coalesce_delay,
+                max_workers=self.pool_size,
+            )
+        try:
+            if pipeline:
+                all_push_results = self.__insert_xbrl_dir_pipeline(
+                    zip_paths, workers, stage_workers
+                )
+            elif workers > 1:
+                all_push_results = self.__insert_xbrl_dir_parallel(
+                    zip_paths, workers
+                )
+            else:
+                all_push_results = self.__insert_xbrl_dir_serial(zip_paths)
+        finally:
+            if self.__coalescer is not None:
+                # バッファに残っている行を送信し、スレッドを停止する
+                self.__coalescer.close()
+                self.__coalescer = None
+        if coalesce:
+            # 送信の完了はflush後にまとめて判明する
+            all_push_results = [
+                is_push
+                for is_push in all_push_results
+                if is_push is not None
+            ] + self.__coalesce_results
+            self.__coalesce_results = []
+
+        # 1件でも失敗した場合は、次回の実行で再度処理する
+        if self.journal is not None and all(all_push_results):
+            self.journal.mark_dir_done(dir_path, len(zip_paths))
+
+        # 全てのis_pushがFalseの場合、例外を発生させる
+        if not any(all_push_results):
+            raise ApiInsertionException("全てのAPI挿入が失敗しました。")
+
+    def __insert_xbrl_dir_serial(
+        self, zip_paths: List[Path]
+    ) -> List[bool]:
+        """XBRLファイルを1件ずつ解析してAPIに挿入する"""
+
         is_source_file_id_api_url = self.url + ep.IS_EXITS_SOURCE_FILE_ID
 
         all_push_results = []  # 全てのis_push結果を格納するリスト
@@ -178,113 +569,840 @@ class Insert:
         with tqdm(total=len(zip_paths)) as pbar:
             for zip_path in zip_paths:
                 head_item_key = Utils.string_to_uuid(Path(zip_path).name)
-                if self.is_active_head(head_item_key):
+                if self.__is_ingested(zip_path, head_item_key):
                     pbar.write(f"Already exists: {zip_path}")
                     pbar.update(1)
                     continue
                 else:
                     try:
-                        model = XBRLModel(
+                        with XBRLModel(
                             zip_path.as_posix(),
                             self.output_path,
                             is_exist_source_file_id_api_url=is_source_file_id_api_url,
-                        )
-                        items = model.get_all_items()
+                            extract=False,
+                            trusted=True,
+                        ) as model:
+                            # アイテムは送信時に1度だけエンコード
+                            items = model.get_all_items(deferred=True)
+                            model_str = str(model)
                         # APIへの挿入処理
-                        is_push = self.__insert_api_push(
-                            items, head_item_key
+                        is_push = self.__push_items(
+                            items, head_item_key, model_str, pbar, zip_path
                         )
-                        # サマリーの生成
-                        if self.generate_summary(head_item_key):
-                            pbar.write(f"サマリーを生成しました: {model}")
-                        else:
-                            pbar.write(
-                                f"サマリーの生成に失敗しました: {model}"
-                            )
                         # 挿入結果をリストに追加
-                        all_push_results.append(
-                            is_push
-                        )  # 結果をリストに追加
-                        if is_push:
-                            pbar.write(f"Success: {model}")
-                        else:
-                            pbar.write(f"Error: {model}")
+                        all_push_results.append(is_push)
                     except NotXbrlDirectoryException:
-                        pbar.write(f"無効なXBRLファイル: {zip_path}")
+                        all_push_results.append(
+                            self.__fail_zip(
+                                "無効なXBRLファイル",
+                                head_item_key,
+                                pbar,
+                                zip_path,
+                            )
+                        )
                     pbar.update(1)
                     gc.collect()
 
-        # 全てのis_pushがFalseの場合、例外を発生させる
-        if not any(all_push_results):
-            raise ApiInsertionException("全てのAPI挿入が失敗しました。")
+        return all_push_results
+
+    def __insert_xbrl_dir_parallel(
+        self, zip_paths: List[Path], workers: int
+    ) -> List[bool]:
+        """XBRLファイルを複数のプロセスで解析してAPIに挿入する
+
+        解析はワーカープロセスで行い、APIへの挿入はこのプロセスで
+        ファイル順に行います。同時に解析するファイル数はworkersの2倍までに
+        制限し、解析結果がメモリに溜まり続けないようにします。
+        1件の解析に失敗しても、他のファイルの処理は継続します。
+        ワーカープロセスが異常終了した場合は、結果を待っていたファイルを
+        失敗として記録し、プールを作り直して解析中だった他のファイルを
+        投入し直します。
+        """
+
+        is_source_file_id_api_url = self.url + ep.IS_EXITS_SOURCE_FILE_ID
+
+        all_push_results = []  # 全てのis_push結果を格納するリスト
+        pending = deque()  # 解析中のファイル(投入順)
+        ingest_index_path = (
+            self.ingest_index.db_path
+            if self.ingest_index is not None
+            else None
+        )
+        remaining = iter(zip_paths)
+        executor = ProcessPoolExecutor(max_workers=workers)
+
+        def submit(zip_path: Path):
+            """ファイルを解析に投入する
+
+            プールが使用できない場合は、作り直しの対象となるよう
+            BrokenProcessPoolを結果に持つFutureを返します。
+            """
+            try:
+                return executor.submit(
+                    parse_xbrl_zip,
+                    Path(zip_path).as_posix(),
+                    self.output_path,
+                    is_source_file_id_api_url,
+                    ingest_index_path,
+                )
+            except BrokenProcessPool as e:
+                future = Future()
+                future.set_exception(e)
+                return future
+
+        with tqdm(total=len(zip_paths)) as pbar:
+
+            def submit_next() -> bool:
+                """未登録のファイルを1件解析に投入する"""
+                for zip_path in remaining:
+                    head_item_key = Utils.string_to_uuid(
+                        Path(zip_path).name
+                    )
+                    if self.__is_ingested(zip_path, head_item_key):
+                        pbar.write(f"Already exists: {zip_path}")
+                        pbar.update(1)
+                        continue
+                    pending.append(
+                        (zip_path, head_item_key, submit(zip_path))
+                    )
+                    return True
+                return False
+
+            try:
+                for _ in range(workers * 2):
+                    if not submit_next():
+                        break
+
+                while pending:
+                    zip_path, head_item_key, future = pending.popleft()
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool as e:
+                        # ワーカープロセスが異常終了した場合は、プールを
+                        # 作り直して解析中だった他のファイルを投入し直す
+                        executor.shutdown(wait=False)
+                        executor = ProcessPoolExecutor(max_workers=workers)
+                        for _ in range(len(pending)):
+                            path, key, other = pending.popleft()
+                            if not other.done() or isinstance(
+                                other.exception(), BrokenProcessPool
+                            ):
+                                other = submit(path)
+                            pending.append((path, key, other))
+                        result = {
+                            "error": f"解析中にエラーが発生しました({e})"
+                        }
+                    except Exception as e:
+                        result = {
+                            "error": f"解析中にエラーが発生しました({e})"
+                        }
+                    submit_next()
+
+                    if result["error"] is not None:
+                        all_push_results.append(
+                            self.__fail_zip(
+                                result["error"],
+                                head_item_key,
+                                pbar,
+                                zip_path,
+                            )
+                        )
+                    else:
+                        # APIへの挿入処理
+                        is_push = self.__push_items(
+                            result["items"],
+                            head_item_key,
+                            result["model"],
+                            pbar,
+                            zip_path,
+                        )
+                        all_push_results.append(is_push)
+                    pbar.update(1)
+            finally:
+                executor.shutdown()
+
+        return all_push_results
+
+    def __insert_xbrl_dir_pipeline(
+        self,
+        zip_paths: List[Path],
+        workers: int,
+        stage_workers: Optional[Dict[str, int]] = None,
+    ) -> List[bool]:
+        """XBRLファイルを段階ごとのパイプラインで解析してAPIに挿入する
+
+        解析はワーカープロセス、シリアライズ、送信、サマリー生成は
+        このプロセスのスレッドで行います。あるファイルの送信中に
+        次のファイルの解析を進めるため、CPUとネットワークが同時に
+        使われます。段階の間のキューには上限があり、送信が遅い場合は
+        解析が待機するため、解析結果がメモリに溜まり続けません。
+        """
+
+        is_source_file_id_api_url = self.url + ep.IS_EXITS_SOURCE_FILE_ID
+        ingest_index_path = (
+            self.ingest_index.db_path
+            if self.ingest_index is not None
+            else None
+        )
+        stage_workers = {
+            **DEFAULT_STAGE_WORKERS,
+            **(stage_workers or {}),
+        }
+        # 以降の段階に渡らずに失敗した件の結果
+        failed_results = []
+
+        with tqdm(total=len(zip_paths)) as pbar, ProcessPoolExecutor(
+            max_workers=workers
+        ) as executor:
+
+            def parse(zip_path: Path):
+                """挿入済みでないファイルをワーカープロセスで解析する"""
+                head_item_key = Utils.string_to_uuid(Path(zip_path).name)
+                if self.__is_ingested(zip_path, head_item_key):
+                    pbar.write(f"Already exists: {zip_path}")
+                    pbar.update(1)
+                    return None
+                result = executor.submit(
+                    parse_xbrl_zip,
+                    Path(zip_path).as_posix(),
+                    self.output_path,
+                    is_source_file_id_api_url,
+                    ingest_index_path,
+                ).result()
+                if result["error"] is not None:
+                    failed_results.append(
+                        self.__fail_zip(
+                            result["error"], head_item_key, pbar, zip_path
+                        )
+                    )
+                    pbar.update(1)
+                    return None
+                result["zip_path"] = zip_path
+                result["head_item_key"] = head_item_key
+                return result
+
+            def serialize(job: Dict[str, any]):
+                """アイテムを送信単位のチャンクに分割する"""
+                job["tasks"] = self.__build_upload_tasks(job["items"])
+                return job
+
+            def upload(job: Dict[str, any]):
+                """チャンクをAPIに送信する"""
+                job["is_push"] = self.__upload(
+                    job["items"],
+                    job.pop("tasks"),
+                    job["head_item_key"],
+                    job["zip_path"],
+                )
+                return job
+
+            def summary(job: Dict[str, any]):
+                """サマリーを生成し、挿入結果を記録する"""
+                self.__finish_push(
+                    job["is_push"],
+                    job["items"],
+                    job["head_item_key"],
+                    job["model"],
+                    pbar,
+                    job["zip_path"],
+                )
+                pbar.update(1)
+                return job["is_push"]
+
+            def on_error(stage: str, job, e: Exception):
+                zip_path = (
+                    job["zip_path"] if isinstance(job, dict) else job
+                )
+                failed_results.append(
+                    self.__fail_zip(
+                        f"{stage}中にエラーが発生しました({e})",
+                        Utils.string_to_uuid(Path(zip_path).name),
+                        pbar,
+                        zip_path,
+                    )
+                )
+                pbar.update(1)
+
+            ingest_pipeline = IngestPipeline(
+                [
+                    PipelineStage("parse", parse, workers),
+                    PipelineStage(
+                        "serialize", serialize, stage_workers["serialize"]
+                    ),
+                    PipelineStage(
+                        "upload", upload, stage_workers["upload"]
+                    ),
+                    PipelineStage(
+                        "summary", summary, stage_workers["summary"]
+                    ),
+                ],
+                on_error=on_error,
+            )
+            return ingest_pipeline.run(zip_paths) + failed_results
+
+    def __push_items(
+        self,
+        items: List[Dict[str, any]],
+        head_item_key: str,
+        model: str,
+        pbar: tqdm,
+        zip_path: Optional[Path] = None,
+    ) -> bool:
+        """解析済みのアイテムをAPIに挿入し、サマリーを生成する
+
+        まとめて送信するモードの場合は、行をバッファに追加してNoneを返します。
+        """
+        if self.__coalescer is not None:
+            self.__coalesce_items(
+                items, head_item_key, model, pbar, zip_path
+            )
+            return None
+        is_push = self.__insert_api_push(items, head_item_key, zip_path)
+        self.__finish_push(
+            is_push, items, head_item_key, model, pbar, zip_path
+        )
+        return is_push
+
+    def __finish_push(
+        self,
+        is_push: bool,
+        items: List[Dict[str, any]],
+        head_item_key: str,
+        model: str,
+        pbar: tqdm,
+        zip_path: Optional[Path] = None,
+    ):
+        """サマリーを生成し、挿入に成功した場合は挿入済みとして記録する"""
+        # サマリーの生成
+        if self.generate_summary(head_item_key):
+            pbar.write(f"サマリーを生成しました: {model}")
+        else:
+            pbar.write(f"サマリーの生成に失敗しました: {model}")
+        if is_push:
+            self.__mark_source_files(items, head_item_key)
+            if self.dead_letter is not None:
+                # 以前の実行で保存したペイロードは再送信しない
+                self.dead_letter.discard(head_item_key)
+            if self.ingest_index is not None:
+                self.ingest_index.mark_head(head_item_key, zip_path)
+            if self.journal is not None:
+                self.journal.mark_zip_done(head_item_key, zip_path)
+            pbar.write(f"Success: {model}")
+        else:
+            if self.journal is not None:
+                self.journal.mark_zip_failed(head_item_key, zip_path)
+            pbar.write(f"Error: {model}")
+
+    def __fail_zip(
+        self,
+        message: str,
+        head_item_key: str,
+        pbar: tqdm,
+        zip_path: Optional[Path] = None,
+    ) -> bool:
+        """解析または挿入できなかったXBRLファイルを失敗として記録する
+
+        Returns:
+            bool: 挿入結果(常にFalse)
+        """
+        pbar.write(f"{message}: {zip_path}")
+        if self.journal is not None:
+            self.journal.mark_zip_failed(head_item_key, zip_path)
+        return False
+
+    def __is_ingested(self, zip_path: Path, head_item_key) -> bool:
+        """XBRLファイルが挿入済みか確認する
+
+        ジャーナルまたはインデックスに記録済みの場合はAPIに問い合わせません。
+        APIで挿入済みと確認できた場合はインデックスに記録します。
+        """
+        if self.journal is not None and self.journal.is_zip_done(
+            head_item_key
+        ):
+            return True
+        if self.ingest_index is None:
+            return self.is_active_head(head_item_key)
+        if self.ingest_index.has_head(head_item_key, zip_path):
+            return True
+        if self.is_active_head(head_item_key):
+            self.ingest_index.mark_head(head_item_key, zip_path)
+            return True
+        return False
+
+    def __mark_source_files(
+        self, items: List[Dict[str, any]], head_item_key=None
+    ):
+        """挿入したURLのソースファイルを登録済みとして保持する
+
+        以降のXBRLファイルで同じラベルファイルを参照する場合は、
+        APIに存在確認を問い合わせません。
+        インデックスがある場合は、行の内容のハッシュとともに記録します。
+        """
+        lookup = get_source_file_lookup(
+            self.url + ep.IS_EXITS_SOURCE_FILE_ID
+        )
+        source_file_ids = []
+        source_files = {}
+        for item in items:
+            if item and item["key"].endswith("source_file"):
+                for row in item["item"]:
+                    if not isinstance(row, dict):
+                        row = row.__dict__
+                    if row.get("type") == "url":
+                        source_file_ids.append(row["source_file_id"])
+                    if row.get("source_file_id") is not None:
+                        source_files[row["source_file_id"]] = (
+                            hashlib.sha256(
+                                Utils.json_dumps(row)
+                            ).hexdigest()
+                        )
+        lookup.add(source_file_ids)
+        if self.ingest_index is not None:
+            self.ingest_index.mark_source_files(
+                source_files, head_item_key
+            )
 
     def __insert_api_push(
-        self, items: List[Dict[str, any]], head_item_key: str
+        self,
+        items: List[Dict[str, any]],
+        head_item_key: str,
+        zip_path: Optional[Path] = None,
     ) -> bool:
+        tasks = self.__build_upload_tasks(items)
+        return self.__upload(items, tasks, head_item_key, zip_path)
+
+    def __detail_requests(self) -> Dict[str, Callable]:
+        """アイテムのキーと送信メソッドの辞書(ヘッダー情報以外)"""
+        return {
+            "sc_linkbase_ref": self.schemas,
+            "ix_non_numeric": self.ix_non_numerics,
+            "ix_non_fraction": self.ix_non_fractions,
+            "lab_link_locs": self.label_locs,
+            "lab_link_arcs": self.label_arcs,
+            "lab_link_values": self.label_values,
+            "cal_link_locs": self.cal_locs,
+            "cal_link_arcs": self.cal_arcs,
+            "pre_link_locs": self.pre_locs,
+            "pre_link_arcs": self.pre_arcs,
+            "def_link_locs": self.def_locs,
+            "def_link_arcs": self.def_arcs,
+            "qualitative_info": self.qualitative,
+        }
+
+    def __build_upload_tasks(self, items: List[Dict[str, any]]) -> list:
+        """アイテムを送信単位のチャンクに分割する
+
+        大きなデータは行数とバイト数の上限でチャンクに分割します。
+        チャンクは分割時にエンコードしたJSON配列(bytes)で、送信時に
+        再度エンコードしません。
+
+        Returns:
+            list: (タスクのID, 送信メソッド, チャンク)の一覧
+        """
+        requests_by_key = self.__detail_requests()
+
+        tasks = []
+        for item_id, item in zip(self.__item_task_ids(items), items):
+            request = requests_by_key.get(item["key"]) if item else None
+            if request is None:
+                continue
+            for number, chunk in enumerate(
+                Utils.chunk_json(
+                    item["item"], self.chunk_rows, self.chunk_bytes
+                )
+            ):
+                tasks.append((f"{item_id}:{number}", request, chunk))
+        return tasks
+
+    @staticmethod
+    def __item_task_ids(
+        items: List[Dict[str, any]],
+    ) -> List[Optional[str]]:
+        """アイテムごとのタスクのIDを取得する
+
+        アイテムの位置は実行ごとに変わる場合があるため、ソースファイルの
+        ID(id)とキーから作成します。同じ組み合わせのアイテムが複数ある
+        場合は、2件目から出現順の番号を付けます。
+        """
+        item_ids = []
+        counts: Dict[str, int] = {}
         for item in items:
-            response = None
-            if item:
-                data = item["item"]
-                if item["key"] == "ix_file_path":
-                    response = self.file_path(data)
-                elif item["key"] == "ix_head_title":
-                    response = self.ix_head_titles(data)
-                elif item["key"].endswith("source_file"):
-                    response = self.sources(data)
-
-        def send_request(item):
-            data = item["item"]
-            if item["key"] == "sc_linkbase_ref":
-                return self.schemas(data)
-            elif item["key"] == "ix_non_numeric":
-                return self.ix_non_numerics(data)
-            elif item["key"] == "ix_non_fraction":
-                return self.ix_non_fractions(data)
-            elif item["key"] == "lab_link_locs":
-                return self.label_locs(data)
-            elif item["key"] == "lab_link_arcs":
-                return self.label_arcs(data)
-            elif item["key"] == "lab_link_values":
-                return self.label_values(data)
-            elif item["key"] == "cal_link_locs":
-                return self.cal_locs(data)
-            elif item["key"] == "cal_link_arcs":
-                return self.cal_arcs(data)
-            elif item["key"] == "pre_link_locs":
-                return self.pre_locs(data)
-            elif item["key"] == "pre_link_arcs":
-                return self.pre_arcs(data)
-            elif item["key"] == "def_link_locs":
-                return self.def_locs(data)
-            elif item["key"] == "def_link_arcs":
-                return self.def_arcs(data)
-            elif item["key"] == "qualitative_info":
-                return self.qualitative(data)
-            return None
+            if not item:
+                item_ids.append(None)
+                continue
+            item_id = f"{item.get('id') or ''}:{item['key']}"
+            count = counts.get(item_id, 0)
+            counts[item_id] = count + 1
+            item_ids.append(
+                item_id if count == 0 else f"{item_id}#{count}"
+            )
+        return item_ids
+
+    def __upload(
+        self,
+        items: List[Dict[str, any]],
+        tasks: list,
+        head_item_key: str,
+        zip_path: Optional[Path] = None,
+    ) -> bool:
+        """ヘッダー情報とチャンクをAPIに送信する
+
+        ジャーナルがある場合は、タスクごとの結果を記録し、
+        成功済みのタスクは再送信しません。
+        再試行しても送信できなかったペイロードは、デッドレターがある場合は
+        ファイルに保存します。
+        """
+        is_success = self.__upload_headers(items, head_item_key, zip_path)
+
+        tasks = [
+            task
+            for task in tasks
+            if not self.__is_task_done(head_item_key, task[0])
+        ]
 
-        with ThreadPoolExecutor() as executor:
+        # 全てのチャンクが成功した場合のみ成功とする
+        with ThreadPoolExecutor(max_workers=self.pool_size) as executor:
             futures = {
-                executor.submit(send_request, item): item for item in items
+                executor.submit(request, chunk): (task_id, request, chunk)
+                for task_id, request, chunk in tasks
             }
 
             for future in as_completed(futures):
-                item = futures[future]
                 try:
                     response = future.result()
-                    if response and response.status_code != 200:
-                        print(
-                            f"エンドポイント({response.url})にデータを追加できませんでした。ステータスコード: {response.status_code}"
-                        )
-                        return False
                 except Exception as e:
-                    print(f"リクエスト中にエラーが発生しました: {e}")
-                    return False
+                    response = e
+                if not self.__complete_task(
+                    head_item_key, futures[future], response, zip_path
+                ):
+                    is_success = False
+
+        if not is_success:
+            return False
 
-        response = self.set_head_active(head_item_key)
-        response = self.update_head_generate(head_item_key)
+        return self.__activate_head(head_item_key)
 
+    def __activate_head(self, head_item_key: str) -> bool:
+        """XBRLファイルを有効にし、生成済みに更新する
+
+        有効にできなかった場合は、生成済みに更新せずFalseを返します。
+        """
+        try:
+            response = self.set_head_active(head_item_key)
+        except Exception as e:
+            print(f"リクエスト中にエラーが発生しました: {e}")
+            return False
+        if not 200 <= response.status_code < 300:
+            print(
+                f"XBRLファイルを有効にできませんでした。ステータスコード: {response.status_code} [{head_item_key}]"
+            )
+            return False
+        self.update_head_generate(head_item_key)
         return True
 
+    def __upload_headers(
+        self,
+        items: List[Dict[str, any]],
+        head_item_key: str,
+        zip_path: Optional[Path] = None,
+    ) -> bool:
+        """ヘッダー情報(ファイルパス、タイトル、ソースファイル)を送信する
+
+        他のデータが参照するため、XBRLファイルごとに先に送信します。
+        """
+        is_success = True
+        for item_id, item in zip(self.__item_task_ids(items), items):
+            request = None
+            if item:
+                if item["key"] == "ix_file_path":
+                    request = self.file_path
+                elif item["key"] == "ix_head_title":
+                    request = self.ix_head_titles
+                elif item["key"].endswith("source_file"):
+                    request = self.sources
+            if request is None:
+                continue
+            task = (item_id, request, item["item"])
+            if self.__is_task_done(head_item_key, task[0]):
+                continue
+            try:
+                response = request(item["item"])
+            except Exception as e:
+                response = e
+            if not self.__complete_task(
+                head_item_key, task, response, zip_path
+            ):
+                is_success = False
+        return is_success
+
+    def __coalesce_items(
+        self,
+        items: List[Dict[str, any]],
+        head_item_key: str,
+        model: str,
+        pbar: tqdm,
+        zip_path: Optional[Path] = None,
+    ):
+        """ヘッダー情報を送信し、それ以外の行をバッファに追加する"""
+        if not self.__upload_headers(items, head_item_key, zip_path):
+            self.__finish_push(
+                False, items, head_item_key, model, pbar, zip_path
+            )
+            self.__coalesce_results.append(False)
+            return
+
+        key = str(head_item_key)
+        self.__coalesce_jobs[key] = (
+            items,
+            head_item_key,
+            model,
+            pbar,
+            zip_path,
+        )
+        requests_by_key = self.__detail_requests()
+        for item in items:
+            request = requests_by_key.get(item["key"]) if item else None
+            if request is not None:
+                self.__coalescer.add(key, request.__name__, item["item"])
+        self.__coalescer.seal(key)
+
+    def __send_coalesced(
+        self, endpoint: str, rows: List[Tuple[str, bytes]]
+    ) -> bool:
+        """複数のXBRLファイルの行をまとめて送信する
+
+        結果はXBRLファイルごとの行をタスクとして__complete_taskに渡し、
+        ジャーナルに記録します。失敗した場合は、デッドレターに
+        XBRLファイルごとに保存します。タスクのIDはエンドポイントと
+        行の内容のハッシュのため、同じ行を後の実行で送信できた場合は
+        デッドレターから再送信しません。
+        """
+        request = getattr(self, endpoint)
+        body = b"[" + b",".join(encoded for _, encoded in rows) + b"]"
+        try:
+            response = request(body)
+        except Exception as e:
+            # 送信できなかった行はデッドレターに保存する
+            response = e
+
+        rows_by_head: Dict[str, List[bytes]] = {}
+        for key, encoded in rows:
+            rows_by_head.setdefault(key, []).append(encoded)
+        is_success = True
+        for key, encoded_rows in rows_by_head.items():
+            job = self.__coalesce_jobs.get(key)
+            data = b"[" + b",".join(encoded_rows) + b"]"
+            task_id = f"{endpoint}:{hashlib.sha256(data).hexdigest()}"
+            if not self.__complete_task(
+                job[1] if job is not None else key,
+                (task_id, request, data),
+                response,
+                job[4] if job is not None else None,
+            ):
+                is_success = False
+        return is_success
+
+    def __complete_coalesced(self, key: str, is_push: bool):
+        """全ての行を送信したXBRLファイルを有効にし、サマリーを生成する
+
+        送信を確認するスレッドから呼び出される場合もあるため、
+        例外が発生した場合は失敗として記録します。
+        """
+        items, head_item_key, model, pbar, zip_path = (
+            self.__coalesce_jobs.pop(key)
+        )
+        try:
+            if is_push:
+                is_push = self.__activate_head(head_item_key)
+            self.__finish_push(
+                is_push, items, head_item_key, model, pbar, zip_path
+            )
+        except Exception as e:
+            is_push = self.__fail_zip(
+                f"完了の処理中にエラーが発生しました({e})",
+                head_item_key,
+                pbar,
+                zip_path,
+            )
+        self.__coalesce_results.append(is_push)
+
+    def __complete_task(
+        self,
+        head_item_key: str,
+        task: tuple,
+        response,
+        zip_path: Optional[Path] = None,
+    ) -> bool:
+        """タスクの結果を判定し、ジャーナルとデッドレターに記録する
+
+        Parameters:
+            task (tuple): (タスクのID, 送信メソッド, ペイロード)
+            response: レスポンス、または送信中に発生した例外
+
+        Returns:
+            bool: 送信に成功したかどうか
+        """
+        task_id, request, data = task
+        if isinstance(response, Exception):
+            print(f"リクエスト中にエラーが発生しました: {response}")
+            status_code, error = None, str(response)
+        elif response is not None and response.status_code != 200:
+            print(
+                f"エンドポイント({response.url})にデータを追加できませんでした。ステータスコード: {response.status_code}"
+            )
+            status_code, error = response.status_code, None
+        else:
+            self.__mark_task(head_item_key, task_id, response)
+            if self.dead_letter is not None:
+                # 以前の実行で保存した同じタスクのペイロードは再送信しない
+                self.dead_letter.discard(head_item_key, task_id)
+            return True
+
+        if self.journal is not None:
+            self.journal.mark_task(
+                head_item_key, task_id, False, status_code
+            )
+        if self.dead_letter is not None:
+            self.dead_letter.put(
+                request.__name__,
+                data,
+                head_item_key=head_item_key,
+                task_id=task_id,
+                zip_path=zip_path,
+                status_code=status_code,
+                error=error,
+            )
+        return False
+
+    def __is_task_done(self, head_item_key: str, task_id: str) -> bool:
+        """ジャーナルで成功済みのタスクか確認する"""
+        return self.journal is not None and self.journal.is_task_done(
+            head_item_key, task_id
+        )
+
+    def __mark_task(
+        self,
+        head_item_key: str,
+        task_id: str,
+        response: Optional[requests.Response],
+    ):
+        """タスクの結果をジャーナルに記録する"""
+        if self.journal is None:
+            return
+        status_code = (
+            response.status_code if response is not None else None
+        )
+        self.journal.mark_task(
+            head_item_key, task_id, status_code == 200, status_code
+        )
+
+    def replay_dead_letters(
+        self, dead_letter: Optional[DeadLetterQueue] = None
+    ) -> Dict[str, int]:
+        """
+        <p>デッドレターに保存したペイロードを再送信します。</p>
+        <p>XBRLファイルを再度解析せずに送信し、成功したファイルは削除します。
+        あるhead_item_keyのペイロードが全て成功した場合は、
+        XBRLファイルを有効にしてサマリーを生成します。</p>
+        <p>ジャーナルで成功済みのタスクと、既に有効なXBRLファイルの
+        ペイロードは、後の実行で送信済みのため再送信せずに削除します。</p>
+        <h3>Attributes:</h3>
+            dead_letter (DeadLetterQueue): デッドレター(省略時はself.dead_letter)
+        <h3>Returns:</h3>
+            dict: 再送信に成功した件数(replayed)、失敗した件数(failed)、
+                送信済みのため削除した件数(skipped)
+        """
+        dead_letter = dead_letter or self.dead_letter
+        if dead_letter is None:
+            raise ValueError("デッドレターが指定されていません。")
+
+        replayed = failed = skipped = 0
+        heads = {}  # head_item_key -> [zip_path, 全て成功したか]
+        active_heads = {}  # head_item_key -> 有効かどうか
+        for path in dead_letter.entries():
+            meta, data = dead_letter.load(path)
+            head_item_key = meta.get("head_item_key")
+            if head_item_key and self.__is_delivered(
+                head_item_key, meta.get("task_id"), active_heads
+            ):
+                dead_letter.remove(path)
+                skipped += 1
+                continue
+            request = getattr(self, meta["endpoint"], None)
+            if meta["endpoint"].startswith("_") or not callable(request):
+                print(
+                    f"不明なエンドポイントです: {meta['endpoint']} {path}"
+                )
+                continue
+
+            try:
+                response = request(data)
+                is_ok = response.status_code == 200
+            except requests.RequestException as e:
+                print(f"リクエスト中にエラーが発生しました: {e}")
+                is_ok = False
+
+            if is_ok:
+                dead_letter.remove(path)
+                replayed += 1
+                if self.journal is not None and head_item_key:
+                    self.journal.mark_task(
+                        head_item_key, meta["task_id"], True, 200
+                    )
+            else:
+                failed += 1
+            if head_item_key:
+                state = heads.setdefault(
+                    head_item_key, [meta.get("zip_path"), True]
+                )
+                state[1] = state[1] and is_ok
+
+        # 全てのペイロードを送信できたXBRLファイルを有効にする
+        for head_item_key, (zip_path, is_ok) in heads.items():
+            if not is_ok or not self.__activate_head(head_item_key):
+                continue
+            self.generate_summary(head_item_key)
+            if zip_path is not None and not Path(zip_path).exists():
+                zip_path = None
+            if self.ingest_index is not None and zip_path is not None:
+                self.ingest_index.mark_head(head_item_key, zip_path)
+            if self.journal is not None:
+                self.journal.mark_zip_done(head_item_key, zip_path)
+
+        return {"replayed": replayed, "failed": failed, "skipped": skipped}
+
+    def __is_delivered(
+        self,
+        head_item_key: str,
+        task_id: Optional[str],
+        active_heads: Dict[str, bool],
+    ) -> bool:
+        """デッドレターのペイロードが後の実行で送信済みか確認する"""
+        if self.journal is not None:
+            if self.journal.is_zip_done(head_item_key):
+                return True
+            if task_id is not None and self.journal.is_task_done(
+                head_item_key, task_id
+            ):
+                return True
+        if head_item_key not in active_heads:
+            active_heads[head_item_key] = bool(
+                self.is_active_head(head_item_key)
+            )
+        return active_heads[head_item_key]
+
+    def reconcile_ingest_index(self) -> List[str]:
+        """
+        <p>インデックスに記録済みのXBRLファイルをAPIと照合します。</p>
+        <p>APIで有効になっていないものは記録を削除し、次回の実行で
+        再度挿入します。</p>
+        <h3>Returns:</h3>
+            list: 記録を削除したhead_item_keyの一覧
+        """
+        if self.ingest_index is None:
+            return []
+        return self.ingest_index.reconcile(self.is_active_head)
+
     def generate_summary(self, head_item_key: str) -> bool:
         """
         <p>IX_TITLE_SUMMARYを生成する</p>
@@ -292,11 +1410,14 @@ class Insert:
             head_item_key (str): IX_HEAD_TITLEのキー
         """
 
-        response = requests.post(
-            self.url
-            + ep.POST_TITLE_SUMMARY
-            + f"?head_item_key={head_item_key}",
-            headers={"Content-Type": "application/json"},
+        url = self.url + ep.POST_TITLE_SUMMARY
+        response = self.__send(
+            lambda: self.session.post(
+                url + f"?head_item_key={head_item_key}",
+                headers={"Content-Type": "application/json"},
+                timeout=self.timeout,
+            ),
+            url,
         )
         if response.status_code != 200:
             return False
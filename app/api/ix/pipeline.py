@@ -0,0 +1,207 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+_STOP = object()
+""" ステージのワーカーに終了を知らせる番兵 """
+
+
+class PipelineStage:
+    """パイプラインの1段階を表すクラス
+
+    funcは前の段階の出力を1件受け取り、次の段階への出力を返します。
+    Noneを返した場合、その件は以降の段階に渡しません。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[Any], Any],
+        workers: int = 1,
+        queue_size: Optional[int] = None,
+    ) -> None:
+        """
+        Parameters:
+            name (str): 段階の名前
+            func (Callable): 1件を処理する関数
+            workers (int): この段階を並列に処理するスレッド数
+            queue_size (int): この段階の入力キューの上限(省略時はworkersの2倍)
+        """
+        if workers < 1:
+            raise ValueError(
+                f"workersは1以上を指定してください。[{name}: {workers}]"
+            )
+        self.__name = name
+        self.__func = func
+        self.__workers = workers
+        self.__queue_size = (
+            queue_size if queue_size is not None else workers * 2
+        )
+
+    @property
+    def name(self):
+        return self.__name
+
+    @property
+    def func(self):
+        return self.__func
+
+    @property
+    def workers(self):
+        return self.__workers
+
+    @property
+    def queue_size(self):
+        return self.__queue_size
+
+
+class IngestPipeline:
+    """上限付きのキューで段階をつないだパイプライン
+
+    各段階は専用のスレッドで処理し、段階の間は上限付きのキューで
+    つなぎます。後段の処理が追いつかない場合はキューが満杯になり、
+    前段の処理が待機するため、処理中の件数(メモリ使用量)は
+    キューの上限とスレッド数の合計までに制限されます。
+    ある段階で例外が発生した件は、以降の段階に渡さずon_errorに渡します。
+    on_errorで発生した例外は表示するのみで、処理は続行します。
+    """
+
+    def __init__(
+        self,
+        stages: List[PipelineStage],
+        on_error: Optional[Callable[[str, Any, Exception], None]] = None,
+    ) -> None:
+        """
+        Parameters:
+            stages (list): 処理順に並べた段階の一覧
+            on_error (Callable): 例外発生時に(段階の名前, 入力, 例外)で
+                呼び出す関数
+        """
+        if len(stages) == 0:
+            raise ValueError("段階を1つ以上指定してください。")
+        self.__stages = stages
+        self.__on_error = on_error
+        self.__lock = threading.Lock()
+        self.__stats: Dict[str, Dict[str, float]] = {}
+
+    @property
+    def stages(self):
+        return self.__stages
+
+    @property
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """段階ごとの処理件数、破棄件数、エラー件数、処理時間(秒)"""
+        with self.__lock:
+            return {
+                name: dict(stat) for name, stat in self.__stats.items()
+            }
+
+    def run(self, jobs: Iterable[Any]) -> List[Any]:
+        """全ての件をパイプラインで処理する
+
+        Parameters:
+            jobs (Iterable): 最初の段階に渡す入力
+
+        Returns:
+            list: 最後の段階の出力(完了順)
+        """
+        self.__stats = {
+            stage.name: {
+                "processed": 0,
+                "dropped": 0,
+                "errors": 0,
+                "seconds": 0.0,
+            }
+            for stage in self.__stages
+        }
+        queues = [
+            queue.Queue(maxsize=stage.queue_size)
+            for stage in self.__stages
+        ]
+        results = []
+        remaining = [stage.workers for stage in self.__stages]
+        threads = []
+
+        for index, stage in enumerate(self.__stages):
+            for number in range(stage.workers):
+                thread = threading.Thread(
+                    target=self.__work,
+                    args=(index, queues, results, remaining),
+                    name=f"{stage.name}-{number}",
+                    daemon=True,
+                )
+                thread.start()
+                threads.append(thread)
+
+        try:
+            for job in jobs:
+                queues[0].put(job)
+        finally:
+            for _ in range(self.__stages[0].workers):
+                queues[0].put(_STOP)
+            for thread in threads:
+                thread.join()
+
+        return results
+
+    def __handle_error(self, name: str, job: Any, error: Exception):
+        """例外が発生した件をon_errorに渡す
+
+        on_errorで例外が発生してもワーカーを止めないよう、表示して続行します。
+        ワーカーが止まると前段の処理がキューの空きを待ち続けるためです。
+        """
+        if self.__on_error is None:
+            return
+        try:
+            self.__on_error(name, job, error)
+        except Exception as e:
+            print(f"on_errorの実行中にエラーが発生しました。[{name}] {e}")
+
+    def __work(
+        self,
+        index: int,
+        queues: List[queue.Queue],
+        results: List[Any],
+        remaining: List[int],
+    ):
+        """段階のワーカースレッド"""
+        stage = self.__stages[index]
+        is_last = index == len(self.__stages) - 1
+        stat = self.__stats[stage.name]
+
+        try:
+            while True:
+                job = queues[index].get()
+                if job is _STOP:
+                    break
+
+                start = time.perf_counter()
+                try:
+                    output = stage.func(job)
+                except Exception as e:
+                    with self.__lock:
+                        stat["errors"] += 1
+                        stat["seconds"] += time.perf_counter() - start
+                    self.__handle_error(stage.name, job, e)
+                    continue
+
+                with self.__lock:
+                    stat["seconds"] += time.perf_counter() - start
+                    if output is None:
+                        stat["dropped"] += 1
+                        continue
+                    stat["processed"] += 1
+                    if is_last:
+                        results.append(output)
+                        continue
+                # 次の段階のキューが満杯の場合はここで待機する
+                queues[index + 1].put(output)
+        finally:
+            # 最後に終了したワーカーが次の段階に終了を伝える
+            with self.__lock:
+                remaining[index] -= 1
+                is_done = remaining[index] == 0
+            if is_done and not is_last:
+                for _ in range(self.__stages[index + 1].workers):
+                    queues[index + 1].put(_STOP)
@@ -0,0 +1,215 @@
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional, Set
+
+from app.utils.utils import Utils
+
+
+class RunJournal:
+    """挿入処理の進捗を記録する追記専用のジャーナル
+
+    ディレクトリ、XBRLファイル(head_item_key)、エンドポイントへの送信
+    (送信単位のタスク)ごとの完了をJSON Lines形式で1行ずつ追記します。
+    resume=Trueで開いた場合は既存のジャーナルを読み込み、完了済みの
+    ディレクトリとXBRLファイルを省略し、途中まで送信したXBRLファイルは
+    成功していないタスクだけを再送信できるようにします。
+    resume=Falseの場合はジャーナルを空にして新しい実行を記録します。
+    タスクのIDはアイテムの順序とチャンクの分割に依存するため、
+    チャンクの分割のパラメータ(params)を実行の開始ごとに記録し、
+    paramsが異なる実行で記録したタスクは読み込みません。
+    """
+
+    def __init__(
+        self,
+        journal_path: str,
+        resume: bool = False,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """
+        Parameters:
+            journal_path (str): ジャーナルファイルのパス
+            resume (bool): 既存のジャーナルから再開するかどうか
+            params (dict): タスクのIDの前提となるチャンクの分割のパラメータ
+        """
+        directory = os.path.dirname(journal_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.__journal_path = journal_path
+        # 読み込んだ値と比較できるようJSONの値に揃える
+        self.__params = (
+            json.loads(Utils.json_dumps(params))
+            if params is not None
+            else None
+        )
+        self.__lock = threading.Lock()
+        self.__done_dirs: Dict[str, int] = {}
+        self.__done_heads: Set[str] = set()
+        self.__done_tasks: Dict[str, Set[str]] = {}
+
+        if resume and os.path.exists(journal_path):
+            self.__load()
+        self.__file = open(journal_path, "ab" if resume else "wb")
+        if resume and not self.__ends_with_newline():
+            # 書き込み途中で中断した最終行に続けて書き込まないよう改行する
+            self.__file.write(b"\n")
+        self.__write(
+            {
+                "event": "run_start",
+                "resume": resume,
+                "params": self.__params,
+            }
+        )
+
+    @property
+    def journal_path(self):
+        return self.__journal_path
+
+    @property
+    def params(self) -> Optional[Dict[str, Any]]:
+        """タスクのIDの前提となるチャンクの分割のパラメータ"""
+        return self.__params
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """ジャーナルファイルを閉じる"""
+        with self.__lock:
+            if not self.__file.closed:
+                self.__file.close()
+
+    def __load(self):
+        """既存のジャーナルを読み込み、完了済みの処理を復元する
+
+        書き込み途中で中断した最終行は無視します。
+        paramsが異なる実行で記録したタスクは読み込みません。
+        """
+        is_same_params = False
+        with open(self.__journal_path, "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                event = record.get("event")
+                if event == "run_start":
+                    is_same_params = record.get("params") == self.__params
+                elif event == "dir_done":
+                    self.__done_dirs[record["dir"]] = record["zip_count"]
+                elif event == "zip_done":
+                    self.__done_heads.add(record["head_item_key"])
+                elif (
+                    event == "task" and record.get("ok") and is_same_params
+                ):
+                    self.__done_tasks.setdefault(
+                        record["head_item_key"], set()
+                    ).add(record["task_id"])
+
+    def __ends_with_newline(self) -> bool:
+        """ジャーナルファイルが空か、改行で終わっているか確認する"""
+        with open(self.__journal_path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() == 0:
+                return True
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def __write(self, record: Dict[str, any]):
+        """1行追記する"""
+        record["at"] = datetime.now().isoformat()
+        line = Utils.json_dumps(record) + b"\n"
+        with self.__lock:
+            self.__file.write(line)
+            self.__file.flush()
+
+    def is_dir_done(self, dir_path: str, zip_count: int) -> bool:
+        """ディレクトリの処理が完了済みか確認する
+
+        完了時からzipファイルの数が変わっている場合はFalseを返します。
+        """
+        with self.__lock:
+            return self.__done_dirs.get(str(dir_path)) == zip_count
+
+    def mark_dir_done(self, dir_path: str, zip_count: int):
+        """ディレクトリの処理の完了を記録する"""
+        with self.__lock:
+            self.__done_dirs[str(dir_path)] = zip_count
+        self.__write(
+            {
+                "event": "dir_done",
+                "dir": str(dir_path),
+                "zip_count": zip_count,
+            }
+        )
+
+    def is_zip_done(self, head_item_key: str) -> bool:
+        """XBRLファイルの挿入が完了済みか確認する"""
+        with self.__lock:
+            return str(head_item_key) in self.__done_heads
+
+    def mark_zip_done(
+        self, head_item_key: str, zip_path: Optional[str] = None
+    ):
+        """XBRLファイルの挿入の完了を記録する"""
+        with self.__lock:
+            self.__done_heads.add(str(head_item_key))
+            self.__done_tasks.pop(str(head_item_key), None)
+        self.__write(
+            {
+                "event": "zip_done",
+                "head_item_key": str(head_item_key),
+                "zip": str(zip_path) if zip_path is not None else None,
+            }
+        )
+
+    def mark_zip_failed(
+        self, head_item_key: str, zip_path: Optional[str] = None
+    ):
+        """XBRLファイルの挿入の失敗を記録する"""
+        self.__write(
+            {
+                "event": "zip_failed",
+                "head_item_key": str(head_item_key),
+                "zip": str(zip_path) if zip_path is not None else None,
+            }
+        )
+
+    def is_task_done(self, head_item_key: str, task_id: str) -> bool:
+        """送信単位のタスクが成功済みか確認する"""
+        with self.__lock:
+            return task_id in self.__done_tasks.get(str(head_item_key), ())
+
+    def mark_task(
+        self,
+        head_item_key: str,
+        task_id: str,
+        ok: bool,
+        status_code: Optional[int] = None,
+    ):
+        """送信単位のタスクの結果を記録する
+
+        Parameters:
+            head_item_key (str): IX_HEAD_TITLEのキー
+            task_id (str): タスクのID(ソースファイルのID、キー、チャンク番号)
+            ok (bool): 送信に成功したかどうか
+            status_code (int): レスポンスのステータスコード
+        """
+        if ok:
+            with self.__lock:
+                self.__done_tasks.setdefault(
+                    str(head_item_key), set()
+                ).add(task_id)
+        self.__write(
+            {
+                "event": "task",
+                "head_item_key": str(head_item_key),
+                "task_id": task_id,
+                "ok": ok,
+                "status_code": status_code,
+            }
+        )
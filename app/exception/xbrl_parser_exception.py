@@ -40,3 +40,14 @@ class AlreadyExistSourceFileIdError(Exception):
 
     def __str__(self):
         return f"既に存在するsource_file_idがあります。処理を中断します。[詳細]: {self.message}"
+
+
+class ParserEngineNotSupportedError(Exception):
+    """サポートされていない解析エンジンが指定された場合に発生するエラー"""
+
+    def __init__(self, message):
+        self.message = message
+        super().__init__(self.message)
+
+    def __str__(self):
+        return f"サポートされていない解析エンジンです。処理を中断します。[詳細]: {self.message}"
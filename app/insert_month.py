@@ -2,8 +2,15 @@ import datetime
 import os
 import sys
 
+from app.api.ix.adaptive_concurrency import AdaptiveConcurrency
+from app.api.ix.dead_letter import (
+    DEFAULT_DEAD_LETTER_DIR,
+    DeadLetterQueue,
+)
 from app.api.ix.exceptions import ApiInsertionException
-from app.api.ix.insert import Insert
+from app.api.ix.ingest_index import DEFAULT_INDEX_NAME, IngestIndex
+from app.api.ix.insert import DEFAULT_MAX_WORKERS, Insert
+from app.api.ix.run_journal import RunJournal
 
 if __name__ == "__main__":
     # ロックファイルのパスを指定
@@ -12,10 +19,20 @@ if __name__ == "__main__":
     lock_file = f"{parentDir}/script.lock"
     output_path = f"{parentDir}/output"
 
-    if len(sys.argv) > 3:
-        api_base_url = sys.argv[1]
-        doc_dir = sys.argv[2]
-        startYear = int(sys.argv[3])
+    # --resumeの場合は前回の実行のジャーナルから再開する
+    # --reconcileの場合は開始前にインデックスをAPIと照合する
+    resume = "--resume" in sys.argv
+    reconcile = "--reconcile" in sys.argv
+    argv = [
+        arg for arg in sys.argv if arg not in ("--resume", "--reconcile")
+    ]
+
+    if len(argv) > 3:
+        api_base_url = argv[1]
+        doc_dir = argv[2]
+        startYear = int(argv[3])
+    # 解析を行うプロセス数(省略時は1)
+    workers = int(argv[4]) if len(argv) > 4 else 1
     # ロックファイルが存在するか確認
     if os.path.exists(lock_file):
         print("前回のプロセスがまだ実行中です。終了します。")
@@ -28,38 +45,83 @@ if __name__ == "__main__":
     # 今日の日付を取得
     today = datetime.date.today()
 
+    # ロックファイルを削除できるよう、作成後の処理はtryの中で行う
+    ingest_index = journal = None
     try:
-        for year in range(startYear, today.year + 1):
-            for month in range(1, 12):
-                loop = True
-                # 指定された月の日付をループで取得
-                for day in range(1, 31):
-                    try:
-                        date = datetime.date(year, month, day)
-                        # 今日の日付よりも後の日付の場合処理を終了
-                        if datetime.date(year, month, day) > today:
-                            loop = False
-                            break
-                    except ValueError:
-                        # 無効な日付（例：11月31日）をスキップ
-                        continue
+        # 挿入済みのXBRLファイルのインデックス(再実行時にAPIへの問い合わせを省略)
+        ingest_index = IngestIndex(
+            os.path.join(output_path, DEFAULT_INDEX_NAME)
+        )
+        # 進捗のジャーナル(--resumeの場合は前回の続きから再開)
+        # (チャンクの分割が異なる実行のタスクは再開に使用しない)
+        journal = RunJournal(
+            os.path.join(output_path, "insert_month.journal.jsonl"),
+            resume=resume,
+            params=Insert.journal_params(),
+        )
+        # 再試行しても送信できなかったペイロードの保存先
+        # (replay_dead_letters.pyで再送信する)
+        dead_letter = DeadLetterQueue(
+            os.path.join(output_path, DEFAULT_DEAD_LETTER_DIR)
+        )
+        # APIの応答に合わせて同時に送信するリクエスト数を調整する
+        # (日をまたいで調整結果を引き継ぐ)
+        concurrency = AdaptiveConcurrency(
+            min_limit=1,
+            max_limit=DEFAULT_MAX_WORKERS * 2,
+            initial_limit=DEFAULT_MAX_WORKERS,
+        )
+
+        # 月をまたいで1つのセッション(コネクションプール)を使用する
+        with Insert(
+            output_path,
+            api_base_url,
+            ingest_index=ingest_index,
+            journal=journal,
+            dead_letter=dead_letter,
+            concurrency=concurrency,
+        ) as insert:
+            if reconcile:
+                # APIで有効になっていないXBRLファイルの記録を削除
+                removed = insert.reconcile_ingest_index()
+                print(f"インデックスから削除した件数: {len(removed)}")
 
-                    date_str = date.strftime("%Y%m%d")
-                    target_dir = f"{doc_dir}/{date.strftime("%Y年")}/{date.strftime("%m月")}/{date_str}"
-                    if os.path.exists(target_dir):
+            for year in range(startYear, today.year + 1):
+                for month in range(1, 12):
+                    loop = True
+                    # 指定された月の日付をループで取得
+                    for day in range(1, 31):
                         try:
-                            insert = Insert(output_path, api_base_url)
-                            insert.insert_xbrl_dir(target_dir)
-                        except ApiInsertionException:
+                            date = datetime.date(year, month, day)
+                            # 今日の日付よりも後の日付の場合処理を終了
+                            if datetime.date(year, month, day) > today:
+                                loop = False
+                                break
+                        except ValueError:
+                            # 無効な日付（例：11月31日）をスキップ
+                            continue
+
+                        date_str = date.strftime("%Y%m%d")
+                        target_dir = f"{doc_dir}/{date.strftime("%Y年")}/{date.strftime("%m月")}/{date_str}"
+                        if os.path.exists(target_dir):
+                            try:
+                                insert.insert_xbrl_dir(
+                                    target_dir, workers=workers
+                                )
+                            except ApiInsertionException:
+                                continue
+                        else:
+                            print(
+                                f"指定されたディレクトリが存在しません: {target_dir}"
+                            )
                             continue
-                    else:
-                        print(
-                            f"指定されたディレクトリが存在しません: {target_dir}"
-                        )
-                        continue
-                if not loop:
-                    break
+                    if not loop:
+                        break
     finally:
+        if ingest_index is not None:
+            ingest_index.close()
+        if journal is not None:
+            journal.close()
         # 処理が終了したらロックファイルを削除
         if os.path.exists(lock_file):
             os.remove(lock_file)
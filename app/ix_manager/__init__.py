@@ -1,4 +1,5 @@
 from .base_xbrl_manager import BaseXbrlManager
+from .file_manifest import FileManifest
 from .ixbrl_manager import IXBRLManager
 from .label_manager import LabelManager
 from .link_manager import (
@@ -8,6 +9,7 @@ from .link_manager import (
     PreLinkManager,
 )
 from .qualitative_manager import QualitativeManager
+from .schema_index import SchemaIndex
 from .schema_manager import SchemaManager
 
 __all__ = [
@@ -20,4 +22,6 @@ __all__ = [
     "DefLinkManager",
     "PreLinkManager",
     "SchemaManager",
+    "SchemaIndex",
+    "FileManifest",
 ]
@@ -1,31 +1,50 @@
-import json
+from itertools import chain
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 from uuid import uuid4
 
 import pandas as pd
 from pandas import DataFrame
 
 from app.exception import XbrlDirectoryNotFoundError, XbrlListEmptyError
-from app.ix_parser import BaseXBRLParser, SchemaParser
+from app.ix_parser import BaseXBRLParser
+from app.ix_tag import BaseTag, ColumnarResult
 from app.utils import Utils
 
+from .file_manifest import FileManifest
+from .schema_index import SchemaIndex
+
 
 class BaseXbrlManager:
     """XBRLディレクトリの解析を行う基底クラス"""
 
     def __init__(
-        self, directory_path, head_item_key: Optional[str] = None
+        self,
+        directory_path,
+        head_item_key: Optional[str] = None,
+        engine: str = "bs4",
+        trusted: bool = False,
+        schema_index: Optional[SchemaIndex] = None,
+        manifest: Optional[FileManifest] = None,
     ) -> None:
         self.__directory_path = Path(directory_path)
+        self.__manifest = (
+            manifest
+            if manifest is not None
+            else FileManifest(self.__directory_path)
+        )
         self.__files = self._to_filelist()
         self.__related_files: Optional[DataFrame] = None
         self.__items = []
+        self.__is_items_converted = True
         self.__head_item_key = (
             head_item_key if head_item_key else str(uuid4())
         )
         self.__parsers: Optional[list[BaseXBRLParser]] = None
         self.__source_file_id_list = None
+        self.__engine = engine
+        self.__trusted = trusted
+        self.__schema_index = schema_index
 
     @property
     def files(self):
@@ -41,8 +60,36 @@ class BaseXbrlManager:
 
     @property
     def items(self):
+        """アイテムの一覧。itemはJSON互換の辞書に変換して返す"""
+        if not self.__is_items_converted:
+            for item_dict in self.__items:
+                item_dict["item"] = Utils.to_json_compatible(
+                    item_dict["item"]
+                )
+            self.__is_items_converted = True
+        return self.__items
+
+    @property
+    def raw_items(self):
+        """アイテムの一覧。未変換のitemはモデルのまま返す"""
         return self.__items
 
+    @property
+    def columnar_items(self) -> Dict[str, ColumnarResult]:
+        """アイテムの一覧をkeyごとの列形式(ColumnarResult)で取得する
+
+        itemを辞書に変換せず、モデルから直接列を作成します。
+        """
+        groups: Dict[str, list] = {}
+        for item_dict in self.__items:
+            groups.setdefault(item_dict["key"], []).append(
+                item_dict["item"]
+            )
+        return {
+            key: ColumnarResult.from_tags(chain.from_iterable(items))
+            for key, items in groups.items()
+        }
+
     @property
     def head_item_key(self):
         return self.__head_item_key
@@ -55,6 +102,50 @@ class BaseXbrlManager:
     def parsers(self):
         return self.__parsers
 
+    @property
+    def engine(self):
+        return self.__engine
+
+    @property
+    def trusted(self):
+        return self.__trusted
+
+    @property
+    def schema_index(self):
+        return self.__schema_index
+
+    @property
+    def manifest(self):
+        return self.__manifest
+
+    def iter_rows(self, method: str) -> Iterator[Tuple[str, BaseTag]]:
+        """各パーサーの解析結果を1件ずつ取得するジェネレーター
+
+        パーサーのiter_*メソッドを順に呼び出し、解析結果をリストに
+        保持せずに(source_file_id, タグ)の組で返します。
+        Utils.group_rowsやUtils.write_json_linesに渡すことで、
+        アップロードやファイルへの出力を一定のメモリで行えます。
+
+        Parameters:
+            method (str): パーサーのメソッド名(例: "iter_link_labels")
+        """
+        if not method.startswith("iter_"):
+            raise ValueError(
+                f"iter_から始まるメソッド名を指定してください。[{method}]"
+            )
+        for parser in self.parsers or []:
+            for row in getattr(parser, method)():
+                yield parser.source_file_id, row
+
+    def release(self):
+        """各パーサーが保持するツリーを破棄する
+
+        抽出済みのアイテムは保持します。
+        """
+        for parser in self.parsers or []:
+            parser.release()
+        return self
+
     def _set_parsers(self, parsers: List[BaseXBRLParser]):
         self.__parsers = parsers
 
@@ -66,24 +157,17 @@ class BaseXbrlManager:
         if not isinstance(items, list):
             items = [items]
 
-        items_json = json.dumps(
-            [item.model_dump() for item in items],
-            ensure_ascii=False,
-            default=Utils.decimal_encoder,
-        )
-
-        items_dict = json.loads(items_json)
-
-        # itemを辞書型に変換する
+        # itemの辞書への変換は、itemsの参照時まで遅延する
         item_dict = {
             "id": id,
             "key": key,
-            "item": items_dict,
+            "item": items,
             "sort_position": sort_position,
         }
 
         # itemsにデータを追加する
         self.__items.append(item_dict)
+        self.__is_items_converted = False
 
     @property
     def directory_path(self):
@@ -104,11 +188,7 @@ class BaseXbrlManager:
 
     def _to_filelist(self):
         """ディレクトリ内のファイル一覧を取得する"""
-        return [
-            file.as_posix()
-            for file in self.directory_path.glob("**/*")
-            if file.is_file() and not file.name.startswith(".")
-        ]
+        return self.manifest.files
 
     def xbrl_type(self):
         """書類品種を取得します"""
@@ -124,48 +204,17 @@ class BaseXbrlManager:
 
     def _set_linkbase_files(self, xlink_role=None):
         """関係ファイルのリストを取得する"""
-        files = self.files
-        xsd_files = [file for file in files if Path(file).suffix == ".xsd"]
-
-        data_frames = [
-            SchemaParser(file).link_base_refs().to_DataFrame()
-            for file in xsd_files
-        ]
-
-        df = pd.concat(data_frames, ignore_index=True)
-
-        href_map = {
-            row["xlink_href"]: file
-            for file in files
-            for index, row in df.iterrows()
-            if not row["xlink_href"].startswith("http")
-            and row["xlink_href"] in file
-        }
-
-        df["xlink_href"] = (
-            df["xlink_href"]
-            .astype(str)
-            .apply(lambda href: href_map.get(href, href))
-        )
-
-        # dfのxlink_roleカラムを整形
-        df["xlink_role"] = df["xlink_role"].apply(
-            lambda role: (
-                role.split("/")[-1] if isinstance(role, str) else role
-            )
-        )
-        # dfのxlink_arcroleカラムを整形
-        df["xlink_arcrole"] = df["xlink_arcrole"].apply(
-            lambda arcrole: (
-                arcrole.split("/")[-1]
-                if isinstance(arcrole, str)
-                else arcrole
+        # 索引が渡されていない場合は、このマネージャーで作成する
+        if self.schema_index is None:
+            self.__schema_index = SchemaIndex(
+                self.directory_path,
+                head_item_key=self.head_item_key,
+                engine=self.engine,
+                trusted=self.trusted,
+                manifest=self.manifest,
             )
-        )
 
-        if xlink_role:
-            query = f"xlink_role == '{xlink_role}'"
-            df = df.query(query)
+        df = self.schema_index.related_files(xlink_role)
 
         # ファイルが見つからない場合はエラーを発生させる
         if len(df) == 0 and xlink_role:
@@ -0,0 +1,115 @@
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.ix_parser import zip_source
+
+from .file_resolver import FileResolver
+
+FILE_ROLES = {
+    "ixbrl": ("ixbrl.htm",),
+    "qualitative": ("qualitative.htm",),
+    "xsd": (".xsd",),
+    "lab": ("lab.xml", "lab-en.xml"),
+    "cal": ("cal.xml",),
+    "def": ("def.xml",),
+    "pre": ("pre.xml",),
+}
+""" ファイルの種類と、ファイル名の末尾の対応 """
+
+
+class FileManifest:
+    """XBRLディレクトリのファイル一覧
+
+    ディレクトリを1度だけ走査し、ファイルを種類(ixbrl, qualitative,
+    xsd, lab, cal, def, pre)ごとに分類して保持します。マネージャーや
+    書類の種類の判定は、ディレクトリを再度走査せずにこの一覧を参照します。
+
+    from_zipで作成した場合は、zipファイル内のメンバーを
+    "<zip>!/<member>"形式のパスで保持します。
+    """
+
+    def __init__(self, directory_path, files: Optional[List[str]] = None):
+        """
+        Parameters:
+            directory_path (str): XBRLファイルが格納されているディレクトリのパス
+            files (list): ファイルのパスのリスト(省略時は走査します)
+        """
+        self.__directory_path = Path(directory_path)
+        self.__files = files if files is not None else self.__scan()
+        self.__roles: Dict[str, List[str]] = {
+            role: [] for role in FILE_ROLES
+        }
+        self.__resolver = None
+
+        for file in self.__files:
+            role = self.role_of(file)
+            if role is not None:
+                self.__roles[role].append(file)
+
+    @property
+    def directory_path(self):
+        return self.__directory_path
+
+    @property
+    def files(self):
+        return self.__files
+
+    @property
+    def resolver(self):
+        # ファイル名の索引は初回参照時に作成
+        if self.__resolver is None:
+            self.__resolver = FileResolver(self.__files)
+        return self.__resolver
+
+    @classmethod
+    def from_zip(cls, zip_path) -> "FileManifest":
+        """zipファイルを解凍せずにファイル一覧を作成する
+
+        Parameters:
+            zip_path (str): XBRLファイルのzipファイルのパス
+        """
+        zip_path = Path(zip_path).as_posix()
+        return cls(zip_path, files=zip_source.list_members(zip_path))
+
+    def __scan(self):
+        """ディレクトリ内のファイル一覧を取得する"""
+        return [
+            file.as_posix()
+            for file in self.directory_path.glob("**/*")
+            if file.is_file() and not file.name.startswith(".")
+        ]
+
+    @staticmethod
+    def role_of(file: str) -> Optional[str]:
+        """ファイルの種類を取得する。該当しない場合はNoneを返す"""
+        for role, suffixes in FILE_ROLES.items():
+            if file.endswith(suffixes):
+                return role
+        return None
+
+    def by_role(self, role: str) -> List[str]:
+        """種類が一致するファイルのリストを取得する
+
+        Parameters:
+            role (str): ファイルの種類(ixbrl, qualitative, xsd, lab, cal,
+                def, pre)
+        """
+        if role not in self.__roles:
+            raise KeyError(
+                f"{role} [{', '.join(FILE_ROLES)}]を指定してください。"
+            )
+        return list(self.__roles[role])
+
+    def contains(self, keyword: str) -> bool:
+        """ファイル名またはディレクトリ名にキーワードを含むか判定する"""
+        for file in self.__files:
+            zip_member = zip_source.split_zip_path(file)
+            if zip_member is not None:
+                path = Path(zip_member[1])
+            else:
+                path = Path(file)
+                if path.is_relative_to(self.directory_path):
+                    path = path.relative_to(self.directory_path)
+            if any(keyword in part for part in path.parts):
+                return True
+        return False
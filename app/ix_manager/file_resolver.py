@@ -0,0 +1,58 @@
+from pathlib import Path, PurePosixPath
+from typing import Dict, List, Optional
+
+
+class FileResolver:
+    """ローカルファイルをファイル名で索引し、参照先を解決するクラス
+
+    linkbaseRefなどのhref(ファイル名または相対パス)を、ファイル名の
+    索引から1回の参照でローカルファイルのパスに変換します。
+    """
+
+    def __init__(self, files: List[str]) -> None:
+        """
+        Parameters:
+            files (list): ローカルファイルのパスのリスト
+        """
+        self.__files = files
+        self.__names: Dict[str, List[str]] = {}
+        for file in files:
+            self.__names.setdefault(Path(file).name, []).append(file)
+
+    @property
+    def files(self):
+        return self.__files
+
+    def resolve(self, href: str) -> Optional[str]:
+        """hrefに対応するローカルファイルのパスを取得する
+
+        Parameters:
+            href (str): ファイル名または相対パス
+
+        Returns:
+            str | None: ローカルファイルのパス。見つからない場合はNone
+        """
+        if not isinstance(href, str) or href.startswith("http"):
+            return None
+
+        # "./"や"../"を除いた相対パスで照合
+        parts = [
+            part
+            for part in PurePosixPath(href).parts
+            if part not in (".", "..")
+        ]
+        if len(parts) == 0:
+            return None
+        relative_path = "/".join(parts)
+        candidates = self.__names.get(parts[-1], [])
+
+        # 同名のファイルが複数ある場合は、相対パスが一致する最後のファイル
+        for file in reversed(candidates):
+            if file.endswith(relative_path):
+                return file
+        return None
+
+    def resolve_or_self(self, href: str) -> str:
+        """hrefを解決し、見つからない場合はhrefをそのまま返す"""
+        file = self.resolve(href)
+        return href if file is None else file
@@ -7,6 +7,7 @@ from app.exception.xbrl_parser_exception import (
     DocumentNameTagNotFoundError,
 )
 from app.ix_manager import BaseXbrlManager
+from app.ix_manager.file_manifest import FileManifest
 from app.ix_parser import IxbrlParser
 from app.ix_tag import IxContext, IxHeader, IxNonFraction, IxNonNumeric
 
@@ -18,18 +19,30 @@ class IXBRLManager(BaseXbrlManager):
     """
 
     def __init__(
-        self, directory_path, head_item_key: Optional[str] = None
+        self,
+        directory_path,
+        head_item_key: Optional[str] = None,
+        manifest: Optional[FileManifest] = None,
+        trusted: bool = False,
     ) -> None:
         """
         IxbrlManagerクラスのコンストラクタです。
 
         Parameters:
             directory_path (str): XBRLファイルが格納されているディレクトリのパス
+            head_item_key (str): XBRLファイル固有のID
+            manifest (FileManifest): ディレクトリのファイル一覧
+            trusted (bool): タグの検証を省略するかどうか
 
         Returns:
             None
         """
-        super().__init__(directory_path, head_item_key=head_item_key)
+        super().__init__(
+            directory_path,
+            head_item_key=head_item_key,
+            trusted=trusted,
+            manifest=manifest,
+        )
         self._set_htmlbase_files("ixbrl")
 
         if len(self.related_files) == 0:
@@ -46,6 +59,9 @@ class IXBRLManager(BaseXbrlManager):
         self.__init_manager()
         self._set_source_file_ids()
 
+        # 抽出が完了したパーサーのツリーを破棄
+        self.release()
+
     @property
     def ix_non_fraction(self):
         return self.__ix_non_fraction
@@ -68,8 +84,13 @@ class IXBRLManager(BaseXbrlManager):
         for _, row in self.related_files.iterrows():
             try:
                 parser = IxbrlParser(
-                    row["xlink_href"], head_item_key=self.head_item_key
+                    row["xlink_href"],
+                    head_item_key=self.head_item_key,
+                    single_pass=True,
+                    trusted=self.trusted,
                 )
+                # 非分数・非数値・コンテキスト・要素を1回の走査で取得
+                parser.set_ix_facts()
                 parsers.append(parser)
             except DocumentNameTagNotFoundError:
                 # 後でエラーログを出力する処理を追加するために注釈を追加
@@ -86,7 +107,7 @@ class IXBRLManager(BaseXbrlManager):
         self.__set_ix_non_numeric()
         self.__set_ix_context()
 
-        self.items.sort(key=lambda x: x["sort_position"])
+        self.raw_items.sort(key=lambda x: x["sort_position"])
 
     def __set_ix_non_fraction(self):
         """
@@ -103,9 +124,7 @@ class IXBRLManager(BaseXbrlManager):
 
             id = parser.source_file_id
 
-            parser: IxbrlParser = parser.set_ix_non_fraction()
-
-            data = parser.data
+            data = parser.ix_non_fraction
 
             rows.append(data)
 
@@ -132,9 +151,7 @@ class IXBRLManager(BaseXbrlManager):
 
             id = parser.source_file_id
 
-            data = parser.set_ix_non_numeric()
-
-            data = parser.data
+            data = parser.ix_non_numeric
 
             rows.append(data)
 
@@ -157,9 +174,7 @@ class IXBRLManager(BaseXbrlManager):
 
             id = parser.source_file_id
 
-            parser = parser.set_ix_context()
-
-            data = parser.data
+            data = parser.ix_context
 
             rows.append(data)
 
@@ -5,7 +5,11 @@ from app.exception.xbrl_parser_exception import (
     AlreadyExistSourceFileIdError,
 )
 from app.ix_manager import BaseXbrlManager
+from app.ix_manager.file_manifest import FileManifest
+from app.ix_manager.schema_index import SchemaIndex
 from app.ix_parser import LabelParser
+from app.ix_parser.source_file_lookup import get_source_file_lookup
+from app.utils import Utils
 
 
 class LabelManager(BaseXbrlManager):
@@ -18,8 +22,19 @@ class LabelManager(BaseXbrlManager):
         lang="jp",
         head_item_key: Optional[str] = None,
         is_exist_source_file_id_api_url: Optional[str] = None,
+        engine: str = "bs4",
+        trusted: bool = False,
+        schema_index: Optional[SchemaIndex] = None,
+        manifest: Optional[FileManifest] = None,
     ):
-        super().__init__(directory_path, head_item_key=head_item_key)
+        super().__init__(
+            directory_path,
+            head_item_key=head_item_key,
+            engine=engine,
+            trusted=trusted,
+            schema_index=schema_index,
+            manifest=manifest,
+        )
         self.__output_path = output_path
         self.__lang = None
         self.__link_labels = None
@@ -35,6 +50,9 @@ class LabelManager(BaseXbrlManager):
         self.__init_manager()
         self._set_source_file_ids()
 
+        # 抽出が完了したパーサーのツリーを破棄
+        self.release()
+
     @property
     def output_path(self):
         return self.__output_path
@@ -81,15 +99,37 @@ class LabelManager(BaseXbrlManager):
                 ]
 
     def __init_parser(self):
-        """パーサーを設定します。"""
+        """パーサーを設定します。
+
+        URLで参照するラベルファイルのsource_file_idは、パーサーごとに
+        問い合わせず、SourceFileLookupでまとめて存在確認します。
+        登録済みのファイルはパーサーを作成しません。
+        """
+        lookup = get_source_file_lookup(
+            self.__is_exits_source_file_id_api_url
+        )
+        hrefs = self.related_files["xlink_href"].tolist()
+        existing = {}
+        if lookup is not None:
+            existing = lookup.resolve(
+                str(Utils.string_to_uuid(href))
+                for href in hrefs
+                if href.startswith("http")
+            )
+
         parsers: List[LabelParser] = []
-        for _, row in self.related_files.iterrows():
+        for href in hrefs:
+            if href.startswith("http") and existing.get(
+                str(Utils.string_to_uuid(href))
+            ):
+                continue
             try:
                 parser = LabelParser(
-                    row["xlink_href"],
+                    href,
                     self.output_path,
                     head_item_key=self.head_item_key,
-                    is_exist_source_file_id_api_url=self.__is_exits_source_file_id_api_url,
+                    engine=self.engine,
+                    trusted=self.trusted,
                 )
                 parsers.append(parser)
             except AlreadyExistSourceFileIdError:
@@ -103,7 +143,7 @@ class LabelManager(BaseXbrlManager):
         self.__set_link_label_locs()
         self.__set_link_label_arcs()
 
-        self.items.sort(key=lambda x: x["sort_position"])
+        self.raw_items.sort(key=lambda x: x["sort_position"])
 
     def __set_link_labels(self):
         """
@@ -1,6 +1,8 @@
 from typing import List, Optional
 
 from app.ix_manager import BaseXbrlManager
+from app.ix_manager.file_manifest import FileManifest
+from app.ix_manager.schema_index import SchemaIndex
 from app.ix_parser import (
     BaseLinkParser,
     CalLinkParser,
@@ -19,8 +21,19 @@ class BaseLinkManager(BaseXbrlManager):
         document_type=None,
         head_item_key: Optional[str] = None,
         class_name: Optional[str] = None,
+        engine: str = "bs4",
+        trusted: bool = False,
+        schema_index: Optional[SchemaIndex] = None,
+        manifest: Optional[FileManifest] = None,
     ):
-        super().__init__(directory_path, head_item_key=head_item_key)
+        super().__init__(
+            directory_path,
+            head_item_key=head_item_key,
+            engine=engine,
+            trusted=trusted,
+            schema_index=schema_index,
+            manifest=manifest,
+        )
 
         # プロパティの初期化
         self.__output_path = output_path
@@ -80,6 +93,8 @@ class BaseLinkManager(BaseXbrlManager):
                 row["xlink_href"],
                 self.output_path,
                 head_item_key=self.head_item_key,
+                engine=self.engine,
+                trusted=self.trusted,
             )
             parsers.append(parser)
 
@@ -184,12 +199,20 @@ class CalLinkManager(BaseLinkManager):
         output_path,
         document_type=None,
         head_item_key: Optional[str] = None,
+        engine: str = "bs4",
+        trusted: bool = False,
+        schema_index: Optional[SchemaIndex] = None,
+        manifest: Optional[FileManifest] = None,
     ):
         super().__init__(
             directory_path,
             output_path,
             document_type,
             head_item_key=head_item_key,
+            engine=engine,
+            trusted=trusted,
+            schema_index=schema_index,
+            manifest=manifest,
             class_name="cal",
         )
         self.role = "calculationLinkbaseRef"
@@ -201,6 +224,9 @@ class CalLinkManager(BaseLinkManager):
         self._init_manager()
         self._set_source_file_ids()
 
+        # 抽出が完了したパーサーのツリーを破棄
+        self.release()
+
 
 class DefLinkManager(BaseLinkManager):
     """definitionLinkbaseデータの解析を行うクラス
@@ -215,12 +241,20 @@ class DefLinkManager(BaseLinkManager):
         output_path,
         document_type=None,
         head_item_key: Optional[str] = None,
+        engine: str = "bs4",
+        trusted: bool = False,
+        schema_index: Optional[SchemaIndex] = None,
+        manifest: Optional[FileManifest] = None,
     ):
         super().__init__(
             directory_path,
             output_path,
             document_type,
             head_item_key=head_item_key,
+            engine=engine,
+            trusted=trusted,
+            schema_index=schema_index,
+            manifest=manifest,
             class_name="def",
         )
         self.role = "definitionLinkbaseRef"
@@ -232,6 +266,9 @@ class DefLinkManager(BaseLinkManager):
         self._init_manager()
         self._set_source_file_ids()
 
+        # 抽出が完了したパーサーのツリーを破棄
+        self.release()
+
 
 class PreLinkManager(BaseLinkManager):
     """presentationLinkbaseデータの解析を行うクラス
@@ -246,12 +283,20 @@ class PreLinkManager(BaseLinkManager):
         output_path,
         document_type=None,
         head_item_key: Optional[str] = None,
+        engine: str = "bs4",
+        trusted: bool = False,
+        schema_index: Optional[SchemaIndex] = None,
+        manifest: Optional[FileManifest] = None,
     ):
         super().__init__(
             directory_path,
             output_path,
             document_type,
             head_item_key=head_item_key,
+            engine=engine,
+            trusted=trusted,
+            schema_index=schema_index,
+            manifest=manifest,
             class_name="pre",
         )
         self.role = "presentationLinkbaseRef"
@@ -262,3 +307,6 @@ class PreLinkManager(BaseLinkManager):
         self._init_parser()
         self._init_manager()
         self._set_source_file_ids()
+
+        # 抽出が完了したパーサーのツリーを破棄
+        self.release()
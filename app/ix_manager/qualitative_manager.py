@@ -2,6 +2,7 @@ from typing import List, Optional
 
 from app.exception import XbrlListEmptyError
 from app.ix_manager import BaseXbrlManager
+from app.ix_manager.file_manifest import FileManifest
 from app.ix_parser import QualitativeParser
 from app.ix_tag import QualitativeDocument
 
@@ -13,9 +14,14 @@ class QualitativeManager(BaseXbrlManager):
     """
 
     def __init__(
-        self, directory_path, head_item_key: Optional[str] = None
+        self,
+        directory_path,
+        head_item_key: Optional[str] = None,
+        manifest: Optional[FileManifest] = None,
     ) -> None:
-        super().__init__(directory_path, head_item_key=head_item_key)
+        super().__init__(
+            directory_path, head_item_key=head_item_key, manifest=manifest
+        )
         # self._set_htmlbase_files("qualitative")
 
         # if len(self.related_files) == 0:
@@ -29,6 +35,9 @@ class QualitativeManager(BaseXbrlManager):
         self.__init_manager()
         self._set_source_file_ids()
 
+        # 抽出が完了したパーサーのツリーを破棄
+        self.release()
+
     @property
     def ix_qualitative_info(self):
         return self.__ix_qualitative_info
@@ -36,12 +45,11 @@ class QualitativeManager(BaseXbrlManager):
     def __init_parser(self):
         """QualitativeParserの初期化"""
         parsers: List[QualitativeParser] = []
-        for file in self.files:
-            if file.endswith("qualitative.htm"):
-                parser = QualitativeParser(
-                    xbrl_url=file, head_item_key=self.head_item_key
-                )
-                parsers.append(parser)
+        for file in self.manifest.by_role("qualitative"):
+            parser = QualitativeParser(
+                xbrl_url=file, head_item_key=self.head_item_key
+            )
+            parsers.append(parser)
 
         self._set_parsers(parsers)
 
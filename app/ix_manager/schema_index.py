@@ -0,0 +1,150 @@
+from pathlib import Path
+from typing import List, Optional
+
+import pandas as pd
+from pandas import DataFrame
+
+from app.ix_parser import SchemaParser
+
+from .file_manifest import FileManifest
+
+LINK_BASE_REF_COLUMNS = [
+    "xlink_type",
+    "xlink_href",
+    "xlink_role",
+    "xlink_arcrole",
+    "xbrl_type",
+    "head_item_key",
+    "source_file_id",
+    "href_source_file_id",
+]
+""" linkbaseRefのカラム """
+
+
+class SchemaIndex:
+    """XBRLディレクトリのスキーマとlinkbaseRefの索引
+
+    ディレクトリ内のxsdファイルを1度だけ解析し、SchemaParserと
+    linkbaseRefの一覧を保持します。各マネージャーはこの索引を共有して
+    関係ファイルを取得するため、xsdファイルを重複して解析しません。
+    """
+
+    def __init__(
+        self,
+        directory_path,
+        head_item_key: Optional[str] = None,
+        engine: str = "bs4",
+        trusted: bool = False,
+        manifest: Optional[FileManifest] = None,
+    ) -> None:
+        """
+        Parameters:
+            directory_path (str): XBRLファイルが格納されているディレクトリのパス
+            head_item_key (str): XBRLファイル固有のID
+            engine (str): スキーマの解析エンジン
+            trusted (bool): タグの検証を省略するかどうか
+            manifest (FileManifest): ディレクトリのファイル一覧(省略時は走査します)
+        """
+        self.__directory_path = Path(directory_path)
+        self.__head_item_key = head_item_key
+        self.__engine = engine
+        self.__trusted = trusted
+        self.__manifest = (
+            manifest
+            if manifest is not None
+            else FileManifest(self.__directory_path)
+        )
+        self.__parsers: List[SchemaParser] = []
+        self.__link_base_refs: Optional[DataFrame] = None
+
+        # 初期化メソッドを実行
+        self.__init_parser()
+        self.__init_link_base_refs()
+
+    @property
+    def directory_path(self):
+        return self.__directory_path
+
+    @property
+    def head_item_key(self):
+        return self.__head_item_key
+
+    @property
+    def engine(self):
+        return self.__engine
+
+    @property
+    def trusted(self):
+        return self.__trusted
+
+    @property
+    def manifest(self):
+        return self.__manifest
+
+    @property
+    def files(self):
+        return self.manifest.files
+
+    @property
+    def resolver(self):
+        return self.manifest.resolver
+
+    @property
+    def parsers(self):
+        return self.__parsers
+
+    @property
+    def link_base_refs(self):
+        return self.__link_base_refs
+
+    def __init_parser(self):
+        """xsdファイルごとにSchemaParserを初期化する"""
+        self.__parsers = [
+            SchemaParser(
+                file,
+                head_item_key=self.head_item_key,
+                engine=self.engine,
+                trusted=self.trusted,
+            )
+            for file in self.manifest.by_role("xsd")
+        ]
+
+    def __init_link_base_refs(self):
+        """linkbaseRefの一覧を取得し、参照先をローカルパスに変換する"""
+        data_frames = [
+            parser.link_base_refs().to_DataFrame()
+            for parser in self.parsers
+        ]
+        data_frames = [df for df in data_frames if len(df) > 0]
+        if len(data_frames) == 0:
+            self.__link_base_refs = DataFrame(
+                columns=LINK_BASE_REF_COLUMNS
+            )
+            return
+
+        df = pd.concat(data_frames, ignore_index=True)
+
+        # 参照先をファイル名の索引から解決
+        df["xlink_href"] = (
+            df["xlink_href"].astype(str).map(self.resolver.resolve_or_self)
+        )
+
+        # xlink_role, xlink_arcroleカラムを末尾の要素に整形
+        for column in ["xlink_role", "xlink_arcrole"]:
+            df[column] = df[column].str.rsplit("/", n=1).str[-1]
+
+        self.__link_base_refs = df
+
+    def related_files(self, xlink_role: Optional[str] = None) -> DataFrame:
+        """xlink_roleが一致するlinkbaseRefを取得する
+
+        Parameters:
+            xlink_role (str): 取得するxlink_role(省略時は全件)
+
+        Returns:
+            DataFrame: linkbaseRefの一覧
+        """
+        df = self.link_base_refs
+        if xlink_role:
+            return df[df["xlink_role"] == xlink_role]
+        return df.copy()
@@ -1,7 +1,8 @@
-from pathlib import Path
 from typing import List, Optional
 
 from app.ix_manager import BaseXbrlManager
+from app.ix_manager.file_manifest import FileManifest
+from app.ix_manager.schema_index import SchemaIndex
 from app.ix_parser import SchemaParser
 
 
@@ -9,13 +10,24 @@ class SchemaManager(BaseXbrlManager):
     """XBRLディレクトリの解析を行うクラス"""
 
     def __init__(
-        self, directory_path, head_item_key: Optional[str] = None
+        self,
+        directory_path,
+        head_item_key: Optional[str] = None,
+        engine: str = "bs4",
+        trusted: bool = False,
+        schema_index: Optional[SchemaIndex] = None,
+        manifest: Optional[FileManifest] = None,
     ) -> None:
-        super().__init__(directory_path, head_item_key)
+        super().__init__(
+            directory_path,
+            head_item_key,
+            engine=engine,
+            trusted=trusted,
+            schema_index=schema_index,
+            manifest=manifest,
+        )
 
-        self.__files = Path(directory_path).rglob("*.xsd")
-        # self.__filesをリストに変換
-        self.__files = list(self.__files)
+        self.__files = self.manifest.by_role("xsd")
 
         if len(self.__files) == 0:
             raise Exception("xsdファイルが見つかりません。")
@@ -30,6 +42,9 @@ class SchemaManager(BaseXbrlManager):
         self.__init_parser()
         self.__init_manager()
 
+        # 抽出が完了したパーサーのツリーを破棄
+        self.release()
+
     @property
     def parsers(self):
         return self.__parsers
@@ -48,8 +63,21 @@ class SchemaManager(BaseXbrlManager):
 
     def __init_parser(self):
         """パーサーの初期化を行う"""
+        # 索引のパーサーを再利用し、xsdファイルを再度解析しない
+        if (
+            self.schema_index is not None
+            and self.schema_index.head_item_key == self.head_item_key
+        ):
+            self.__parsers = self.schema_index.parsers
+            return
+
         self.__parsers = [
-            SchemaParser(file.as_posix(), head_item_key=self.head_item_key)
+            SchemaParser(
+                file,
+                head_item_key=self.head_item_key,
+                engine=self.engine,
+                trusted=self.trusted,
+            )
             for file in self.__files
         ]
 
@@ -1,24 +1,41 @@
 import shutil
 import zipfile
-from pathlib import Path
+from pathlib import Path, PurePosixPath
+from typing import List
 from uuid import uuid4
 
 import pandas as pd
 
 from app.constants.report_categories import ReportCategories
 from app.exception import NotXbrlDirectoryException, NotXbrlTypeException
+from app.ix_manager import FileManifest
+from app.ix_parser import zip_source
 from app.utils.utils import Utils
 
 
 class BaseXbrlModel:
-    """XBRLファイルを扱うための基底クラス"""
+    """XBRLファイルを扱うための基底クラス
 
-    def __init__(self, xbrl_zip_path, output_path) -> None:
+    extractがTrue(デフォルト)の場合は従来どおりzipファイルと同じ
+    ディレクトリに解凍し、インスタンスの破棄時に削除します。
+    Falseの場合は、zipファイルを解凍せずにメンバーを直接読み込みます。
+    """
+
+    def __init__(self, xbrl_zip_path, output_path, extract=True) -> None:
         # XBRLファイルのzipファイルのパスを指定
         self.__xbrl_zip_path = Path(xbrl_zip_path)
         self.__output_path = Path(output_path)
-        # XBRLファイルを解凍したディレクトリのパスを取得
-        self.__directory_path = self.__unzip_xbrl()
+        self.__extract = extract
+        self.__directory_path = None
+        if extract:
+            # XBRLファイルを解凍したディレクトリのパスを取得
+            self.__directory_path = self.__unzip_xbrl()
+            # 解凍したディレクトリを1度だけ走査し、ファイル一覧を共有
+            self.__manifest = FileManifest(self.__directory_path)
+        else:
+            # zipファイルをディレクトリとして扱い、メンバーを直接参照
+            self.__directory_path = self.xbrl_zip_path
+            self.__manifest = FileManifest.from_zip(self.xbrl_zip_path)
         self.__xbrl_category = self.__xbrl_category()
         self.__head_item_key = str(
             Utils.string_to_uuid(Path(self.xbrl_zip_path).name)
@@ -51,11 +68,27 @@ class BaseXbrlModel:
     def _set_manager(self):
         raise NotImplementedError
 
-    def __del__(self):
+    def close(self):
+        """解凍したディレクトリを削除します
+
+        with文で使用した場合は、ブロックを抜ける時に呼び出されます。
+        """
+        # 解凍していない場合は削除するディレクトリがない
+        if not self.__extract or self.__directory_path is None:
+            return
         directory_path = Path(self.directory_path)
         if directory_path.exists() and directory_path.is_dir():
             shutil.rmtree(directory_path.as_posix())
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
     @property
     def xbrl_zip_path(self):
         return self.__xbrl_zip_path.as_posix()
@@ -76,10 +109,18 @@ class BaseXbrlModel:
     def directory_path(self):
         return self.__directory_path
 
+    @property
+    def extract(self):
+        return self.__extract
+
     @property
     def xbrl_category(self):
         return self.__xbrl_category
 
+    @property
+    def manifest(self):
+        return self.__manifest
+
     # zipファイルを解凍するメソッドを追加して解凍したファイルのパスを返す
     def __unzip_xbrl(self) -> str:
         zip_path = Path(self.xbrl_zip_path)
@@ -110,16 +151,14 @@ class BaseXbrlModel:
         financial_reports = ReportCategories().financial_reports()
         # 修正報告書
         revision_reports = ReportCategories().revision_reports()
-        # ディレクトリパスをPathオブジェクトに変換
-        directory_path = Path(self.directory_path)
-        # ファイルの末尾が「ixbrl.htm」のファイルを再起的に取得してリストに格納
-        ixbrl_files = list(directory_path.rglob("*ixbrl.htm"))
+        # ファイルの末尾が「ixbrl.htm」のファイルをリストに格納
+        ixbrl_files = self.__ixbrl_files()
         if len(ixbrl_files) == 0:
             raise NotXbrlDirectoryException(
                 "ixbrlファイルが存在しません。"
             )
         else:
-            first_file = ixbrl_files[0].as_posix()
+            first_file = ixbrl_files[0]
             for category in report_categories:
                 if category in first_file:
                     if category in financial_reports:
@@ -136,12 +175,34 @@ class BaseXbrlModel:
                             "ixbrlファイルが存在するが短信サマリーが存在しません。"
                         )
 
+    def __ixbrl_files(self) -> List[str]:
+        """報告詳細区分の判定に使用するixbrlファイルの一覧を取得します。
+
+        解凍した場合は従来どおりrglobと同じ順序のパスを返します。
+        zipファイルから読み込む場合は、zipファイル名が判定に含まれない
+        ようメンバー名を返し、rglobと同様に上位のディレクトリのファイル
+        から、ディレクトリ名とファイル名の順に並べます。
+        """
+        ixbrl_files = self.manifest.by_role("ixbrl")
+        if self.extract:
+            return ixbrl_files
+        members = []
+        for file in ixbrl_files:
+            zip_member = zip_source.split_zip_path(file)
+            members.append(zip_member[1] if zip_member else file)
+        return sorted(
+            members,
+            key=lambda member: (
+                PurePosixPath(member).parent.parts,
+                PurePosixPath(member).name,
+            ),
+        )
+
     # ディレクトリ内を再帰的に検索して指定したキーワードがファイル末尾と一致するファイルが存在するかチェックするメソッド
     def __check_xbrl_files_in_dir(self, *keywords):
-        directory_path = Path(self.directory_path)
         for keyword in keywords:
             # キーワードに一致するファイルが存在しない場合はFalseを返す
-            if not list(directory_path.rglob(f"*{keyword}*")):
+            if not self.manifest.contains(keyword):
                 return False
         # キーワードに一致するファイルが存在する場合はTrueを返す
         return True
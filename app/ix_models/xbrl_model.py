@@ -11,18 +11,35 @@ from app.ix_manager import (
     LabelManager,
     PreLinkManager,
     QualitativeManager,
+    SchemaIndex,
     SchemaManager,
 )
-from app.ix_tag import FilePath
+from app.ix_tag import ColumnarResult, FilePath
 
 from .base_xbrl_model import BaseXbrlModel
 
+MANAGER_NAMES = (
+    "ixbrl_manager",
+    "label_manager",
+    "cal_link_manager",
+    "def_link_manager",
+    "pre_link_manager",
+    "schema_manager",
+    "qualitative_manager",
+)
+""" XBRLModelが保持するマネージャーの名前 """
+
 
 class XBRLModel(BaseXbrlModel):
     """XBRLファイルを扱うためのクラス
     <h3>Attributes:</h3>
         <p>xbrl_zip_path (str): XBRLファイルのzipファイルのパス</p>
         <p>output_path (str): スキーマでURLリンクされている、関係XMLファイルの出力先パス</p>
+        <p>engine (str): リンクベース・スキーマの解析エンジン("bs4" or "lxml")</p>
+        <p>extract (bool): zipファイルを解凍して読み込むかどうか(デフォルトは解凍する)</p>
+        <p>trusted (bool): 解析結果のタグの検証を省略するかどうか(デフォルトは検証する)</p>
+    <p>with文で使用すると、ブロックを抜ける時にclose()でツリーと
+    解凍したディレクトリを破棄します。</p>
     """
 
     def __init__(
@@ -30,11 +47,16 @@ class XBRLModel(BaseXbrlModel):
         xbrl_zip_path,
         output_path,
         is_exist_source_file_id_api_url: Optional[str] = None,
+        engine: str = "bs4",
+        extract: bool = True,
+        trusted: bool = False,
     ) -> None:
-        super().__init__(xbrl_zip_path, output_path)
+        super().__init__(xbrl_zip_path, output_path, extract=extract)
         self.is_exist_source_file_id_api_url = (
             is_exist_source_file_id_api_url
         )
+        self.engine = engine
+        self.trusted = trusted
         self.__all_items = None
         self._ixbrl_manager = None
         self._label_manager = None
@@ -44,6 +66,15 @@ class XBRLModel(BaseXbrlModel):
         self._schema_manager = None
         self._qualitative_manager = None
 
+        # スキーマとlinkbaseRefの索引を作成し、各マネージャーで共有
+        self.schema_index = SchemaIndex(
+            self.directory_path,
+            head_item_key=self.head_item_key,
+            engine=self.engine,
+            trusted=self.trusted,
+            manifest=self.manifest,
+        )
+
         # イベントオブジェクトを作成
         self.ixbrl_manager_initialized = threading.Event()
 
@@ -65,11 +96,16 @@ class XBRLModel(BaseXbrlModel):
                     SchemaManager,
                     self.directory_path,
                     head_item_key=self.head_item_key,
+                    engine=self.engine,
+                    trusted=self.trusted,
+                    schema_index=self.schema_index,
+                    manifest=self.manifest,
                 ): "schema_manager",
                 executor.submit(
                     QualitativeManager,
                     self.directory_path,
                     head_item_key=self.head_item_key,
+                    manifest=self.manifest,
                 ): "qualitative_manager",
                 executor.submit(self._init_ixbrl_manager): "ixbrl_manager",
             }
@@ -97,12 +133,20 @@ class XBRLModel(BaseXbrlModel):
                     self.output_path,
                     head_item_key=self.head_item_key,
                     is_exist_source_file_id_api_url=self.is_exist_source_file_id_api_url,
+                    engine=self.engine,
+                    trusted=self.trusted,
+                    schema_index=self.schema_index,
+                    manifest=self.manifest,
                 )
             else:
                 return manager_class(
                     self.directory_path,
                     self.output_path,
                     head_item_key=self.head_item_key,
+                    engine=self.engine,
+                    trusted=self.trusted,
+                    schema_index=self.schema_index,
+                    manifest=self.manifest,
                 )
         except XbrlListEmptyError as e:
             # print(e)
@@ -142,15 +186,19 @@ class XBRLModel(BaseXbrlModel):
             self.__all_items = self.get_all_items()
         return self.__all_items
 
-    def __del__(self):
-        super().__del__()
-        self._ixbrl_manager = None
-        self._label_manager = None
-        self._cal_link_manager = None
-        self._def_link_manager = None
-        self._pre_link_manager = None
-        self._schema_manager = None
-        self._qualitative_manager = None
+    def close(self):
+        """各マネージャーのツリーと解凍したディレクトリを破棄します
+
+        with文で使用した場合は、ブロックを抜ける時に呼び出されます。
+        get_all_itemsで取得したアイテムは破棄後も参照できます。
+        """
+        for name in MANAGER_NAMES:
+            manager = getattr(self, f"_{name}", None)
+            if manager is not None:
+                manager.release()
+            setattr(self, f"_{name}", None)
+        self.schema_index = None
+        super().close()
 
     def get_schema(self):
         return self.schema_manager
@@ -195,9 +243,13 @@ class XBRLModel(BaseXbrlModel):
         for value in self.ixbrl_manager.ixbrl_roles():
             yield value
 
-    def get_all_items(self) -> List[Dict[str, any]]:
+    def get_all_items(
+        self, deferred: bool = False
+    ) -> List[Dict[str, any]]:
         """<p>XBRLファイルに含まれる全てのデータを取得します。</p>
         <p>取得した辞書のキーはget_all_items_keys()で取得できます</p>
+        <p>deferredがTrueの場合、itemを辞書に変換せずモデルのまま返します。
+        変換はAPIへの送信時のエンコードで行われます。</p>
         """
         # ixbrl_managerの初期化が完了するまで待機
         # self.ixbrl_manager_initialized.wait()
@@ -212,14 +264,27 @@ class XBRLModel(BaseXbrlModel):
         lists.append(file_path)
 
         for _, manager in self.get_all_manager().items():
-            for item in manager.items:
+            items = manager.raw_items if deferred else manager.items
+            for item in items:
                 # listsとitemsを結合
                 lists.append(item)
 
-        self.__all_items = lists
+        if not deferred:
+            self.__all_items = lists
 
         return lists
 
+    def get_all_columnar(self) -> Dict[str, ColumnarResult]:
+        """XBRLファイルに含まれる全てのデータをkeyごとの列形式で取得します"""
+        groups: Dict[str, List[ColumnarResult]] = {}
+        for _, manager in self.get_all_manager().items():
+            for key, result in manager.columnar_items.items():
+                groups.setdefault(key, []).append(result)
+        return {
+            key: ColumnarResult.concat(results)
+            for key, results in groups.items()
+        }
+
     def get_all_items_keys(self) -> List[str]:
         """XBRLファイルに含まれる全てのデータのキーを取得します"""
         keys = []
@@ -241,7 +306,10 @@ class XBRLModel(BaseXbrlModel):
 
     def _init_ixbrl_manager(self):
         self.__ixbrl_manager = IXBRLManager(
-            self.directory_path, head_item_key=self.head_item_key
+            self.directory_path,
+            head_item_key=self.head_item_key,
+            manifest=self.manifest,
+            trusted=self.trusted,
         )
         return self.__ixbrl_manager
 
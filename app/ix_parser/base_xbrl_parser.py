@@ -1,10 +1,9 @@
-import fcntl
 import os
 import re
 import time
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional
+from typing import Callable, Iterator, List, Optional
 from urllib.parse import urlparse
 from uuid import uuid4
 
@@ -15,13 +14,41 @@ from pandas import DataFrame
 from app.exception import TypeOfXBRLIsDifferent
 from app.exception.xbrl_parser_exception import (
     AlreadyExistSourceFileIdError,
+    ParserEngineNotSupportedError,
 )
-from app.ix_tag import BaseTag, SourceFile
+from app.ix_tag import BaseTag, ColumnarResult, SourceFile
 from app.utils.utils import Utils
 
+from . import zip_source
+from .iterparse_engine import iterparse_tags
+from .source_file_lookup import get_source_file_lookup
+from .taxonomy_artifact import taxonomy_artifact_store
+from .taxonomy_cache import taxonomy_cache
+
 
 class BaseXBRLParser:
-    """XBRLを解析する基底クラス"""
+    """XBRLを解析する基底クラス
+
+    engineには解析エンジンを指定します。
+        - "bs4": BeautifulSoupでツリー全体を読み込みます。(デフォルト)
+        - "lxml": lxml.etree.iterparseで要素を逐次読み込み、処理済みの
+          要素を破棄します。大きなリンクベースでもメモリ使用量が一定です。
+
+    use_cacheがTrueの場合、URLで参照されるタクソノミの解析結果を
+    プロセス内のキャッシュ(taxonomy_cache)と共有します。
+    taxonomy_artifact_store.enabledをTrueにした場合は、XMLファイルと
+    同じディレクトリに解析済みアーティファクトとしても保存します。
+
+    trustedがTrueの場合、解析結果のタグをBaseTag.trustedで生成し、
+    pydanticの検証を省略します。生成されるタグの内容は同じです。
+    既定では検証し、一括挿入など入力が確かな場合に明示的に指定します。
+
+    ファイルの解決(URLの場合はダウンロード)と読み込みは、soupや
+    抽出メソッドの初回参照時まで遅延します。source_file_id, basename,
+    xbrl_typeなどはファイルを参照せずに取得できます。
+    """
+
+    ENGINES = ("bs4", "lxml")
 
     def __init__(
         self,
@@ -29,17 +56,31 @@ class BaseXBRLParser:
         output_path=None,
         head_item_key: Optional[str] = None,
         is_exist_source_file_id_api_url: Optional[str] = None,
+        engine: str = "bs4",
+        use_cache: bool = True,
+        trusted: bool = False,
     ):
 
         # urlの検証を行います
         self.__assert_valid_url(xbrl_url, output_path)
 
+        # 解析エンジンの検証を行います
+        if engine not in self.ENGINES:
+            raise ParserEngineNotSupportedError(
+                f"{engine} [{', '.join(self.ENGINES)}]を指定してください。"
+            )
+
         # プロパティの初期化
         self.__xbrl_url = xbrl_url  # XBRLのURL
         self.__output_path = output_path  # 出力先のパス
         self.__basename = Path(self.xbrl_url).name  # ファイル名
         self.__xbrl_type = None  # XbrlType(fr or sm)
         self.__soup = None  # BeautifulSoup
+        self.__engine = engine  # 解析エンジン
+        self.__file_path = None  # 解析対象のローカルファイルパス
+        self.__is_resolved = False  # ローカルファイルを解決済みか
+        self.__use_cache = use_cache  # タクソノミキャッシュの利用有無
+        self.__trusted = trusted  # タグの検証を省略するか
         self.__data: Optional[List[BaseTag]] = None  # 解析結果のデータ
         self.__head_item_key = head_item_key  # XBRLファイル固有のID
         self.__source_file_id = None  # XBRLのソースファイルID
@@ -60,8 +101,8 @@ class BaseXBRLParser:
             )
 
         # 初期化メソッド
+        # (ファイルの解決・取得はsoupや抽出メソッドの初回参照時まで遅延)
         self.__init_xbrl_type()
-        self.__init_parser()
 
     @property
     def basename(self):
@@ -93,8 +134,40 @@ class BaseXBRLParser:
 
     @property
     def soup(self):
+        # ツリーが未読込の場合は読み込む
+        if self.__soup is None and self.file_path is not None:
+            self.__read_xbrl(self.file_path)
         return self.__soup
 
+    @property
+    def is_loaded(self):
+        """ツリーを読み込んでいるか"""
+        return self.__soup is not None
+
+    @property
+    def engine(self):
+        return self.__engine
+
+    @property
+    def file_path(self):
+        # ローカルファイルは初回参照時に解決(URLの場合は取得)する
+        if not self.__is_resolved:
+            self.__resolve_file()
+        return self.__file_path
+
+    @property
+    def is_resolved(self):
+        """ローカルファイルを解決済みか"""
+        return self.__is_resolved
+
+    @property
+    def use_cache(self):
+        return self.__use_cache
+
+    @property
+    def trusted(self):
+        return self.__trusted
+
     @property
     def head_item_key(self):
         return self.__head_item_key
@@ -150,20 +223,32 @@ class BaseXBRLParser:
             else:
                 return False, None
         else:
-            if os.path.exists(self.xbrl_url):
+            if zip_source.exists(self.xbrl_url):
                 return True, self.xbrl_url
             else:
                 return False, None
 
+    def release(self):
+        """読み込んだツリーを破棄する
+
+        解析結果(data)は保持します。ツリーは次にsoupを参照した時に
+        再度読み込みます。
+
+        Returns:
+            self: BaseXBRLParser
+        """
+        self.__soup = None
+        return self
+
     def __read_xbrl(self, xbrl_path):
-        """XBRLをBeautifulSoup読み込む"""
-        with open(xbrl_path, "r", encoding="utf-8") as f:
-            # 読み取り専用でファイルをロック
-            fcntl.flock(f.fileno(), fcntl.LOCK_SH)
+        """XBRLをBeautifulSoup読み込む
+
+        zipファイル内のメンバー("<zip>!/<member>"形式)は解凍せずに
+        読み込みます。
+        """
+        with zip_source.open_source(xbrl_path) as f:
             self.__soup = bs(f, features="lxml-xml")
-            # ファイルのロックを解除
-            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
-            return self.soup
+            return self.__soup
 
     def __assert_valid_url(self, url: str, output_path: Optional[str]):
         """URLが有効かどうかを検証する"""
@@ -172,21 +257,23 @@ class BaseXBRLParser:
             if output_path is None:
                 raise Exception("出力先のパスが指定されていません。")
         else:
-            if not os.path.exists(url):
+            if not zip_source.exists(url):
                 raise FileNotFoundError(
                     f"ファイルが見つかりません。[{url}]"
                 )
 
-    def __init_parser(self):
-        """解析用の初期化処理"""
+    def __resolve_file(self):
+        """解析対象のローカルファイルを解決する"""
 
         # ファイルが存在するか確認
         is_file, file_path = self.__is_url_in_local()
         # ファイルが存在しない場合は、URLから取得
         if is_file is False:
             file_path = self.__fetch_url()
-        # XBRLを読み込む
-        self.__read_xbrl(file_path)
+        # XBRLはsoupの初回参照時に読み込む
+        # (キャッシュを利用できる場合やlxmlエンジンはツリーを構築しない)
+        self.__file_path = file_path
+        self.__is_resolved = True
 
     def __init_head_item_key(self):
         """XBRLファイル固有のIDを設定する"""
@@ -227,6 +314,128 @@ class BaseXBRLParser:
                 f"{self.basename} は{keywords}ではありません。"
             )
 
+    def _find_all(self, name):
+        """解析エンジンに応じてタグ名が一致する要素を取得する
+
+        lxmlエンジンの場合は要素を逐次返し、処理済みの要素は破棄します。
+        返される要素はget, text, find_allをBeautifulSoupのTagと同じ形で
+        参照できます。lxmlエンジンの要素はループ内でのみ有効なため、
+        リストに変換せずに逐次処理してください。
+        """
+        if self.engine == "lxml":
+            return iterparse_tags(self.file_path, name)
+        return self.soup.find_all(name=name)
+
+    def __is_cacheable(self):
+        """解析結果をタクソノミキャッシュと共有するか判定する"""
+        return (
+            self.use_cache
+            and self.xbrl_url.startswith("http")
+            and self.file_path is not None
+        )
+
+    def _get_cached_rows(self, kind: str) -> Optional[List[BaseTag]]:
+        """タクソノミキャッシュから解析結果を取得する
+
+        プロセス内のキャッシュ、解析済みアーティファクト(有効な場合)の順に
+        参照します。
+        取得した行のsource_file_id, head_item_keyは、このパーサーの値に
+        差し替えて返します。
+
+        Args:
+            kind (str): 解析の種類(メソッド名)
+
+        Returns:
+            list | None: 解析結果。キャッシュが存在しない場合はNone
+        """
+        if not self.__is_cacheable():
+            return None
+        key = taxonomy_cache.make_key(self.xbrl_url, self.file_path, kind)
+        rows = taxonomy_cache.get(key)
+        if rows is None:
+            rows = taxonomy_artifact_store.load(self.file_path, kind)
+            if rows is None:
+                return None
+            taxonomy_cache.put(key, rows)
+        return self._restamp_rows(rows)
+
+    def _set_cached_rows(self, kind: str, rows: List[BaseTag]):
+        """解析結果をタクソノミキャッシュに登録する"""
+        if not self.__is_cacheable():
+            return
+        key = taxonomy_cache.make_key(self.xbrl_url, self.file_path, kind)
+        taxonomy_cache.put(key, rows)
+        taxonomy_artifact_store.save(self.file_path, kind, rows)
+
+    def _restamp_rows(self, rows: List[BaseTag]) -> List[BaseTag]:
+        """行のsource_file_id, head_item_keyをこのパーサーの値に差し替える"""
+        stamp = {
+            "source_file_id": self.source_file_id,
+            "head_item_key": self.head_item_key,
+        }
+        lists = []
+        for row in rows:
+            fields = {
+                key: value
+                for key, value in stamp.items()
+                if key in type(row).model_fields
+                and getattr(row, key) != value
+            }
+            if fields:
+                # item_keyを再計算するため再生成する
+                data = row.model_dump(exclude={"item_key"})
+                data.update(fields)
+                row = self._new_tag(type(row), **data)
+            lists.append(row)
+        return lists
+
+    def _iter_rows(
+        self, kind: Optional[str], parse: Callable[[], Iterator[BaseTag]]
+    ) -> Iterator[BaseTag]:
+        """解析結果を1件ずつ返す
+
+        キャッシュが存在する場合はキャッシュから、存在しない場合は
+        parseで解析しながら返します。解析結果はリストに保持しません。
+
+        Args:
+            kind (str | None): 解析の種類(キャッシュしない場合はNone)
+            parse (Callable): 解析結果を1件ずつ返すジェネレーター関数
+        """
+        rows = self._get_cached_rows(kind) if kind else None
+        if rows is not None:
+            yield from rows
+            return
+        yield from parse()
+
+    def _collect_rows(
+        self, kind: Optional[str], parse: Callable[[], Iterator[BaseTag]]
+    ) -> List[BaseTag]:
+        """解析結果をリストで取得し、dataに設定する
+
+        キャッシュが存在する場合は再利用し、存在しない場合は解析結果を
+        キャッシュに登録します。
+
+        Args:
+            kind (str | None): 解析の種類(キャッシュしない場合はNone)
+            parse (Callable): 解析結果を1件ずつ返すジェネレーター関数
+        """
+        rows = self._get_cached_rows(kind) if kind else None
+        if rows is None:
+            rows = list(parse())
+            if kind:
+                self._set_cached_rows(kind, rows)
+        self._set_data(rows)
+        return rows
+
+    def _new_tag(self, tag_class, **data) -> BaseTag:
+        """解析結果のタグを生成する
+
+        trustedがTrueの場合は検証を省略して生成します。
+        """
+        if self.trusted:
+            return tag_class.trusted(**data)
+        return tag_class(**data)
+
     def _set_data(self, data: List[BaseTag]):
         """解析結果のデータを設定する"""
         self.__data = data
@@ -249,42 +458,40 @@ class BaseXBRLParser:
             source_file_id=self.source_file_id,
         )
 
-    def to_DataFrame(self):
-        """DataFrame形式で出力する"""
+    def to_columnar(self) -> ColumnarResult:
+        """列形式(ColumnarResult)で出力する"""
+        for item in self.data:
+            if isinstance(item, list):
+                return ColumnarResult.from_tags(item)
+            elif not isinstance(item, (BaseTag, dict)):
+                raise Exception(
+                    f"itemがBaseTagクラスではありません。[{type(item)}]"
+                )
 
-        lists = []
+        return ColumnarResult.from_tags(self.data)
 
-        for _, item in enumerate(self.data):
-            if isinstance(item, BaseTag):
-                item = item.__dict__
-                lists.append(item)
-            elif isinstance(item, list):
+    def to_DataFrame(self):
+        """DataFrame形式で出力する"""
+        for item in self.data:
+            if isinstance(item, list):
                 return DataFrame(item)
-            elif isinstance(item, dict):
-                lists.append(item)
-            else:
-                print(type(item))
-                raise Exception("itemがBaseTagクラスではありません。")
 
-        return DataFrame(lists)
+        return self.to_columnar().to_pandas()
 
     def to_dict(self):
         """辞書形式で出力する"""
         return self.to_DataFrame().to_dict(orient="records")
 
     def __is_exist_requests(self):
-        """リクエストが存在するか判定する"""
+        """リクエストが存在するか判定する
 
-        if self.__is_exist_source_file_id_api_url:
+        存在確認はget_source_file_lookupで共有するSourceFileLookupを通して
+        行い、登録済みのIDは再度問い合わせません。
+        """
 
-            key = self.source_file.source_file_id
-            if self.source_file.type == "url":
-                response = requests.get(
-                    self.__is_exist_source_file_id_api_url,
-                    params={"source_file_id": key},
-                )
-                if response.status_code == 200:
-                    return True
-                else:
-                    return False
+        lookup = get_source_file_lookup(
+            self.__is_exist_source_file_id_api_url
+        )
+        if lookup is not None and self.source_file.type == "url":
+            return lookup.exists(self.source_file.source_file_id)
         return False
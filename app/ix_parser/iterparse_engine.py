@@ -0,0 +1,106 @@
+from typing import Iterator, List, Union
+
+from lxml import etree
+
+from .zip_source import open_source
+
+XML_NAMESPACE = "http://www.w3.org/XML/1998/namespace"
+
+
+def to_local_names(name: Union[str, List[str]]) -> List[str]:
+    """タグ名(prefix:local形式を含む)をローカル名のリストに変換する"""
+    names = [name] if isinstance(name, str) else name
+    local_names = []
+    for value in names:
+        local_name = value.split(":")[-1]
+        if local_name not in local_names:
+            local_names.append(local_name)
+    return local_names
+
+
+class IterparseTag:
+    """lxmlの要素をBeautifulSoupのTagと同じ形で参照するためのクラス"""
+
+    __slots__ = ("__element",)
+
+    def __init__(self, element):
+        self.__element = element
+
+    @property
+    def element(self):
+        return self.__element
+
+    @property
+    def name(self):
+        return etree.QName(self.__element).localname
+
+    @property
+    def text(self):
+        return "".join(self.__element.itertext())
+
+    def get(self, key: str, default=None):
+        """属性値を取得する
+
+        "xlink:href"のようなprefix付きの属性名は、要素の名前空間から
+        解決して取得します。
+        """
+        element = self.__element
+        if ":" not in key:
+            return element.get(key, default)
+
+        prefix, local_name = key.split(":", 1)
+        # 名前空間宣言はnsmapから取得
+        if prefix == "xmlns":
+            return element.nsmap.get(local_name, default)
+        if prefix == "xml":
+            namespace = XML_NAMESPACE
+        else:
+            namespace = element.nsmap.get(prefix)
+        if namespace is None:
+            return element.get(key, default)
+        return element.get(f"{{{namespace}}}{local_name}", default)
+
+    def find_all(self, name: Union[str, List[str]]):
+        """子孫要素からタグ名が一致する要素を取得する"""
+        tags = [f"{{*}}{value}" for value in to_local_names(name)]
+        return [
+            IterparseTag(element)
+            for element in self.__element.iter(*tags)
+            if element is not self.__element
+        ]
+
+
+def iterparse_tags(
+    file_path: str, name: Union[str, List[str]]
+) -> Iterator[IterparseTag]:
+    """lxml.etree.iterparseで要素を逐次取得する
+
+    取得した要素は呼び出し元の処理が終わった時点で破棄するため、
+    ファイルサイズに関わらずメモリ使用量を一定に保ちます。
+
+    Args:
+        file_path (str): XMLファイルのパス
+        name (str | list): 取得するタグ名
+
+    Yields:
+        IterparseTag: タグ名が一致する要素
+    """
+    tags = [f"{{*}}{value}" for value in to_local_names(name)]
+    # 読み取り中はファイルを共有ロック(zipファイル内のメンバーも可)
+    with open_source(file_path, "rb") as f:
+        context = etree.iterparse(
+            f,
+            events=("end",),
+            tag=tags,
+            huge_tree=True,
+            remove_comments=True,
+        )
+        for _, element in context:
+            yield IterparseTag(element)
+            # 処理済みの要素と先行する兄弟要素を解放
+            element.clear(keep_tail=True)
+            parent = element.getparent()
+            if parent is not None:
+                while element.getprevious() is not None:
+                    del parent[0]
+        del context
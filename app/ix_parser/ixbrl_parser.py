@@ -1,7 +1,7 @@
 import os
 import re
 from decimal import Decimal, InvalidOperation
-from typing import Optional
+from typing import Iterator, Optional
 from urllib.parse import urlparse
 
 from app.exception.xbrl_parser_exception import (
@@ -12,17 +12,29 @@ from app.utils import Utils
 
 from . import BaseXBRLParser
 
+TEXT_BLOCK_PATTERN = re.compile(r"^.*TextBlock$")
+
 
 class IxbrlParser(BaseXBRLParser):
-    """iXBRLを解析するクラス"""
+    """iXBRLを解析するクラス
+
+    ドキュメントの要素(ixbrl_role)は、ファイルを読み込まずに済むよう
+    初回参照時に検索します。single_passをTrueにすると個別に検索せず、
+    set_ix_factsで非分数・非数値・コンテキストと合わせて1回の走査で
+    取得します。
+    """
 
     def __init__(
         self,
         xbrl_url,
         output_path=None,
         head_item_key: Optional[str] = None,
+        single_pass: bool = False,
+        trusted: bool = False,
     ):
-        super().__init__(xbrl_url, output_path, head_item_key)
+        super().__init__(
+            xbrl_url, output_path, head_item_key, trusted=trusted
+        )
 
         # ファイル名を検証
         self._assert_valid_basename("ixbrl.htm")
@@ -33,6 +45,7 @@ class IxbrlParser(BaseXBRLParser):
         self.__ix_non_fraction = None
         self.__ix_non_numeric = None
         self.__ix_context = None
+        self.__single_pass = single_pass
 
         # 初期化処理
         self.__init_parser()
@@ -43,6 +56,10 @@ class IxbrlParser(BaseXBRLParser):
 
     @property
     def ixbrl_role(self):
+        # ドキュメントの要素は初回参照時に検索する
+        # (single_passの場合はset_ix_factsで設定)
+        if self.__ixbrl_role is None and not self.__single_pass:
+            self.__ixbrl_role = self.__set_ixbrl_role()
         return self.__ixbrl_role
 
     @property
@@ -57,6 +74,16 @@ class IxbrlParser(BaseXBRLParser):
     def ix_context(self):
         return self.__ix_context
 
+    @property
+    def ix_facts(self):
+        """set_ix_factsで取得した全ての解析結果"""
+        return {
+            "ix_non_fraction": self.__ix_non_fraction,
+            "ix_non_numeric": self.__ix_non_numeric,
+            "ix_context": self.__ix_context,
+            "ixbrl_role": self.__ixbrl_role,
+        }
+
     def __set_report_type(self, xbrl_url):
         """レポートの種類を設定する"""
         types = [
@@ -80,8 +107,14 @@ class IxbrlParser(BaseXBRLParser):
             if type in file_name:
                 return type
 
-    def __set_ixbrl_role(self):
-        """ドキュメントの要素を設定する"""
+    def __set_ixbrl_role(self, en_label_tag=None, is_search=True):
+        """ドキュメントの要素を設定する
+
+        Args:
+            en_label_tag: 書類名を表すTextBlockタグ。Noneの場合かつ
+                is_searchがTrueの場合は、ドキュメントから検索します。
+            is_search (bool): TextBlockタグをドキュメントから検索するか
+        """
         const = Utils.read_const_json()
         file_name = self.basename
         ixbrl_type = file_name.split("-")[1]
@@ -93,11 +126,12 @@ class IxbrlParser(BaseXBRLParser):
                 "en_label": "FinancialReportSummary",
             }
         else:
-            try:
+            if en_label_tag is None and is_search:
                 en_label_tag = self.soup.find(
                     name="ix:nonNumeric",
-                    attrs={"name": re.compile(r"^.*TextBlock$")},
+                    attrs={"name": TEXT_BLOCK_PATTERN},
                 )
+            try:
                 en_label = (
                     en_label_tag.get("name")
                     .split(":")[-1]
@@ -114,126 +148,72 @@ class IxbrlParser(BaseXBRLParser):
 
     def __init_parser(self):
         self.__report_type = self.__set_report_type(self.xbrl_url)
-        self.__ixbrl_role = self.__set_ixbrl_role()
+        # サマリーの要素はファイルを参照せずに設定する
+        if "fr" not in self.basename:
+            self.__ixbrl_role = self.__set_ixbrl_role()
 
-    def set_ix_non_numeric(self):
-        """iXBRLの非数値情報を取得する
+    def set_ix_facts(self):
+        """iXBRLの非分数・非数値・コンテキスト・ドキュメントの要素を
+        1回の走査で取得する
+
+        取得結果はix_factsプロパティでまとめて参照できます。
 
         Returns:
             self: IxbrlParser
-        """
 
-        if self.__ix_non_numeric:
-            self._set_data(self.__ix_non_numeric)
-
-        lists = []
+        Raises:
+            DocumentNameTagNotFoundError: 書類名タグが存在しない場合
+        """
 
-        tags = self.soup.find_all(name="ix:nonNumeric")
+        non_fraction_tags = []
+        non_numeric_tags = []
+        context_tags = []
+        en_label_tag = None
 
+        tags = self.soup.find_all(
+            name=["ix:nonFraction", "ix:nonNumeric", "xbrli:context"]
+        )
         for tag in tags:
+            if tag.name == "nonFraction":
+                non_fraction_tags.append(tag)
+            elif tag.name == "nonNumeric":
+                non_numeric_tags.append(tag)
+                # 最初のTextBlockタグをドキュメントの要素とする
+                if en_label_tag is None and TEXT_BLOCK_PATTERN.search(
+                    tag.get("name", "")
+                ):
+                    en_label_tag = tag
+            else:
+                context_tags.append(tag)
 
-            # _____attr[contextRef]
-            context = str(tag.get("contextRef")).split("_")
-
-            # _____attr[xsi:nil]
-            xsi_nil = True if tag.get("xsi:nil") == "true" else False
-
-            # _____attr[escape]
-            escape = True if tag.get("escape") == "true" else False
+        if self.__ixbrl_role is None:
+            self.__ixbrl_role = self.__set_ixbrl_role(
+                en_label_tag, is_search=False
+            )
 
-            # _____attr[name]
-            name = tag.get("name").replace(":", "_")
+        self.__ix_non_fraction = [
+            self.__to_ix_non_fraction(tag) for tag in non_fraction_tags
+        ]
+        self.__ix_non_numeric = [
+            self.__to_ix_non_numeric(tag) for tag in non_numeric_tags
+        ]
+        self.__ix_context = [
+            self.__to_ix_context(tag) for tag in context_tags
+        ]
 
-            # _____attr[text]
-            if escape is False:
-                # text属性が存在する場合は取得
-                text = tag.text.replace("　", "").replace(" ", "")
-                # textの数字を半角に変換
-                text = re.sub(
-                    r"[０-９]",
-                    lambda x: chr(ord(x.group(0)) - 0xFEE0),
-                    text,
-                )
-                # textの全角文字を半角に変換
-                text = Utils.normalize_text(text)
-            else:
-                text = None
+        return self
 
-            format_str = (
-                tag.get("format").split(":")[-1]
-                if tag.get("format")
-                else None
-            )
+    def set_ix_non_numeric(self):
+        """iXBRLの非数値情報を取得する
 
-            # textが日付文字列の場合はフォーマットを統一
-            if format_str:
-                text, format_str = Utils.date_str_to_format(
-                    text, format_str
-                )  # pragma: no cover
+        Returns:
+            self: IxbrlParser
+        """
 
-            # textが証券コードの場合は4文字に統一
-            if any(
-                item in name for item in ["SecuritiesCode", "SecurityCode"]
-            ):
-                text = text[0:4]  # pragma: no cover
-
-            # textが空白の場合はNoneに変換
-            if text == "":
-                text = None
-
-            # format_strがbooleantrueの場合はtrueに変換
-            text = "true" if format_str == "booleantrue" else text
-            # format_strがbooleanfalseの場合はfalseに変換
-            text = "false" if format_str == "booleanfalse" else text
-
-            # _____attr[format_str]
-            # textがtrueまたはfalseの場合はformat_strをbooleanに変換
-            if text:
-                format_str = "string" if text else format_str
-                format_str = (
-                    "number" if re.search(r"^\d+$", text) else format_str
-                )
-                format_str = (
-                    "decimal"
-                    if re.search(r"^\d+\.\d+$", text)
-                    else format_str
-                )
-                format_str = (
-                    "boolean" if text in ["true", "false"] else format_str
-                )
-                format_str = (
-                    "dateyearmonthday"
-                    if re.search(r"^\d{4}-\d{2}-\d{2}$", text)
-                    else format_str
-                )
-                format_str = (
-                    "telephone"
-                    if re.search(r"^\(?\d{2,4}\)?-?\d{2,4}-?\d{4}$", text)
-                    else format_str
-                )
-                format_str = (
-                    "url"
-                    if re.search(
-                        r"^https?://[\w/:%#\$&\?\(\)~\.=\+\-]+$", text
-                    )
-                    else format_str
-                )
+        if self.__ix_non_numeric:
+            self._set_data(self.__ix_non_numeric)
 
-            # 辞書に追加
-            inn = IxNonNumeric(
-                head_item_key=self.head_item_key,
-                context=context,
-                name=name,
-                xsi_nil=xsi_nil,
-                escape=escape,
-                format=format_str,
-                value=text,
-                report_type=self.report_type,
-                ixbrl_role=self.ixbrl_role["en_label"],
-                source_file_id=self.source_file_id,
-                xbrl_type=self.xbrl_type,
-            )
-            lists.append(inn)
+        lists = list(self.iter_ix_non_numeric())
 
         self._set_data(lists)
 
@@ -241,6 +221,21 @@ class IxbrlParser(BaseXBRLParser):
 
         return self
 
+    def iter_ix_non_numeric(self) -> Iterator[IxNonNumeric]:
+        """iXBRLの非数値情報を1件ずつ取得するジェネレーター
+
+        Yields:
+            IxNonNumeric: 非数値情報
+        """
+        # ドキュメントの要素が未設定の場合は設定する
+        if self.__ixbrl_role is None:
+            self.__ixbrl_role = self.__set_ixbrl_role()
+
+        tags = self.soup.find_all(name="ix:nonNumeric")
+
+        for tag in tags:
+            yield self.__to_ix_non_numeric(tag)
+
     def set_ix_non_fraction(self):
         """iXBRLの非分数情報を取得する
 
@@ -252,124 +247,7 @@ class IxbrlParser(BaseXBRLParser):
         if self.__ix_non_fraction:
             self._set_data(self.__ix_non_fraction)
 
-        lists = []
-        tags = self.soup.find_all(name="ix:nonFraction")
-        for tag in tags:
-            # _____attr[format]
-            format_str = (
-                tag.get("format").split(":")[-1]
-                if tag.get("format")
-                else None
-            )
-
-            # _____attr[contextRef]
-            context = str(tag.get("contextRef")).split("_")
-
-            # _____attr[decimals]
-            decimals = tag.get("decimals")
-
-            # _____attr[name]
-            name = tag.get("name").replace(":", "_")
-
-            # _____attr[scale]
-            scale = tag.get("scale")
-
-            # _____attr[sign]
-            sign = tag.get("sign")
-
-            # _____attr[unitRef]
-            unit_ref = tag.get("unitRef")
-
-            # _____attr[xsi:nil]
-            xsi_nil = True if tag.get("xsi:nil") == "true" else False
-
-            # _____attr[numeric]
-            numeric = tag.text
-
-            if numeric is not None or numeric != "":
-                if len(numeric) > 0:
-                    try:
-                        # xx円xx銭の場合は、xx.xxに変換
-                        numeric = numeric.replace("円", ".").replace(
-                            "銭", ""
-                        )
-
-                        # numericのカンマを削除
-                        numeric = numeric.replace(",", "")
-                        # numericをDecimalに変換
-                        numeric = Decimal(numeric)
-                        # sign属性が存在する場合は符号を反映
-                        numeric = numeric * -1 if sign == "-" else numeric
-                        # numericを文字列に変換
-                        # numeric = str(numeric)
-
-                    # 数値変換に失敗した場合はそのまま文字列として取得
-                    except (ValueError, InvalidOperation, TypeError):
-                        numeric = (
-                            str(numeric)
-                            if isinstance(numeric, Decimal)
-                            else numeric
-                        )
-
-            # numericが空白の場合はNoneに変換
-            if numeric == "":
-                numeric = None
-
-            # _____attr[display_numeric]
-            if numeric:
-                if sign == "-":
-                    display_numeric = f"△{str(tag.text)}"
-                else:
-                    display_numeric = str(tag.text)
-            else:
-                display_numeric = None
-
-            # _____attr[display_scale]
-            display_scale = None
-            if scale:
-                # 日本円の場合
-                if "JPY" in unit_ref:
-                    if scale == "6":
-                        display_scale = "百万円"
-                    elif scale == "3":
-                        display_scale = "千円"
-                    elif scale == "0":
-                        display_scale = "円"
-                # 米ドルの場合
-                elif "USD" in unit_ref:
-                    if scale == "6":
-                        display_scale = "百万ドル"
-                    elif scale == "3":
-                        display_scale = "千ドル"
-                    elif scale == "0":
-                        display_scale = "ドル"
-                # パーセントの場合
-                elif "Pure" in unit_ref:
-                    if scale == "-2":
-                        display_scale = "%"
-                # 株式の場合
-                elif unit_ref == "Shares":
-                    display_scale = "株"
-
-            inn = IxNonFraction(
-                head_item_key=self.head_item_key,
-                context=context,
-                decimals=decimals,
-                format=format_str,
-                name=name,
-                scale=scale,
-                unit_ref=unit_ref,
-                xsi_nil=xsi_nil,
-                numeric=numeric,
-                report_type=self.report_type,
-                ixbrl_role=self.ixbrl_role["en_label"],
-                source_file_id=self.source_file_id,
-                xbrl_type=self.xbrl_type,
-                sign=sign,
-                display_numeric=display_numeric,
-                display_scale=display_scale,
-            )
-            lists.append(inn)
+        lists = list(self.iter_ix_non_fraction())
 
         self._set_data(lists)
 
@@ -377,52 +255,295 @@ class IxbrlParser(BaseXBRLParser):
 
         return self
 
+    def iter_ix_non_fraction(self) -> Iterator[IxNonFraction]:
+        """iXBRLの非分数情報を1件ずつ取得するジェネレーター
+
+        Yields:
+            IxNonFraction: 非分数情報
+        """
+        # ドキュメントの要素が未設定の場合は設定する
+        if self.__ixbrl_role is None:
+            self.__ixbrl_role = self.__set_ixbrl_role()
+
+        tags = self.soup.find_all(name="ix:nonFraction")
+        for tag in tags:
+            yield self.__to_ix_non_fraction(tag)
+
     def set_ix_context(self):
 
         if self.__ix_context:
             self._set_data(self.__ix_context)
 
-        lists = []
+        lists = list(self.iter_ix_context())
+
+        self._set_data(lists)
+
+        self.__ix_context = lists
+
+        return self
+
+    def iter_ix_context(self) -> Iterator[IxContext]:
+        """iXBRLのコンテキスト情報を1件ずつ取得するジェネレーター
+
+        Yields:
+            IxContext: コンテキスト情報
+        """
         tags = self.soup.find_all(name="xbrli:context")
         for tag in tags:
-            # _____attr[id]
-            context_id = tag.get("id")
-            for period in tag.find_all(name="xbrli:period"):
-                start, end, instant = None, None, None
-                # _____attr[start]
-                if period.find(name="xbrli:startDate") is not None:
-                    start = period.find(name="xbrli:startDate").text
-                # _____attr[end]
-                if period.find(name="xbrli:endDate") is not None:
-                    end = period.find(name="xbrli:endDate").text
-                # _____attr[instant]
-                if period.find(name="xbrli:instant") is not None:
-                    instant = period.find(name="xbrli:instant").text
-                period = {"start": start, "end": end, "instant": instant}
-            scenario = []
-            for value in tag.find_all(name="xbrli:scenario"):
-                for explicit_member in value.find_all(
-                    name="xbrldi:explicitMember"
-                ):
-                    dimension = explicit_member.get("dimension").replace(
-                        ":", "_"
-                    )
-                    scenario_value = explicit_member.text.replace(":", "_")
-                    scenario.append(
-                        {"dimension": dimension, "value": scenario_value}
-                    )
+            yield self.__to_ix_context(tag)
+
+    def __to_ix_non_numeric(self, tag):
+        """ix:nonNumericタグからIxNonNumericを生成する"""
+
+        # _____attr[contextRef]
+        context = str(tag.get("contextRef")).split("_")
+
+        # _____attr[xsi:nil]
+        xsi_nil = True if tag.get("xsi:nil") == "true" else False
 
-            inn = IxContext(
-                head_item_key=self.head_item_key,
-                context_id=context_id,
-                period=period,
-                scenario=scenario,
-                source_file_id=self.source_file_id,
+        # _____attr[escape]
+        escape = True if tag.get("escape") == "true" else False
+
+        # _____attr[name]
+        name = tag.get("name").replace(":", "_")
+
+        # _____attr[text]
+        if escape is False:
+            # text属性が存在する場合は取得
+            text = tag.text.replace("　", "").replace(" ", "")
+            # textの数字を半角に変換
+            text = re.sub(
+                r"[０-９]",
+                lambda x: chr(ord(x.group(0)) - 0xFEE0),
+                text,
+            )
+            # textの全角文字を半角に変換
+            text = Utils.normalize_text(text)
+        else:
+            text = None
+
+        format_str = (
+            tag.get("format").split(":")[-1] if tag.get("format") else None
+        )
+
+        # textが日付文字列の場合はフォーマットを統一
+        if format_str:
+            text, format_str = Utils.date_str_to_format(
+                text, format_str
+            )  # pragma: no cover
+
+        # textが証券コードの場合は4文字に統一
+        if any(
+            item in name for item in ["SecuritiesCode", "SecurityCode"]
+        ):
+            text = text[0:4]  # pragma: no cover
+
+        # textが空白の場合はNoneに変換
+        if text == "":
+            text = None
+
+        # format_strがbooleantrueの場合はtrueに変換
+        text = "true" if format_str == "booleantrue" else text
+        # format_strがbooleanfalseの場合はfalseに変換
+        text = "false" if format_str == "booleanfalse" else text
+
+        # _____attr[format_str]
+        # textがtrueまたはfalseの場合はformat_strをbooleanに変換
+        if text:
+            format_str = "string" if text else format_str
+            format_str = (
+                "number" if re.search(r"^\d+$", text) else format_str
+            )
+            format_str = (
+                "decimal" if re.search(r"^\d+\.\d+$", text) else format_str
+            )
+            format_str = (
+                "boolean" if text in ["true", "false"] else format_str
+            )
+            format_str = (
+                "dateyearmonthday"
+                if re.search(r"^\d{4}-\d{2}-\d{2}$", text)
+                else format_str
+            )
+            format_str = (
+                "telephone"
+                if re.search(r"^\(?\d{2,4}\)?-?\d{2,4}-?\d{4}$", text)
+                else format_str
+            )
+            format_str = (
+                "url"
+                if re.search(
+                    r"^https?://[\w/:%#\$&\?\(\)~\.=\+\-]+$", text
+                )
+                else format_str
             )
-            lists.append(inn)
 
-        self._set_data(lists)
+        # 辞書に追加
+        return self._new_tag(
+            IxNonNumeric,
+            head_item_key=self.head_item_key,
+            context=context,
+            name=name,
+            xsi_nil=xsi_nil,
+            escape=escape,
+            format=format_str,
+            value=text,
+            report_type=self.report_type,
+            ixbrl_role=self.ixbrl_role["en_label"],
+            source_file_id=self.source_file_id,
+            xbrl_type=self.xbrl_type,
+        )
+
+    def __to_ix_non_fraction(self, tag):
+        """ix:nonFractionタグからIxNonFractionを生成する"""
+
+        # _____attr[format]
+        format_str = (
+            tag.get("format").split(":")[-1] if tag.get("format") else None
+        )
+
+        # _____attr[contextRef]
+        context = str(tag.get("contextRef")).split("_")
+
+        # _____attr[decimals]
+        decimals = tag.get("decimals")
+
+        # _____attr[name]
+        name = tag.get("name").replace(":", "_")
+
+        # _____attr[scale]
+        scale = tag.get("scale")
+
+        # _____attr[sign]
+        sign = tag.get("sign")
+
+        # _____attr[unitRef]
+        unit_ref = tag.get("unitRef")
+
+        # _____attr[xsi:nil]
+        xsi_nil = True if tag.get("xsi:nil") == "true" else False
+
+        # _____attr[numeric]
+        numeric = tag.text
+
+        if numeric is not None or numeric != "":
+            if len(numeric) > 0:
+                try:
+                    # xx円xx銭の場合は、xx.xxに変換
+                    numeric = numeric.replace("円", ".").replace("銭", "")
+
+                    # numericのカンマを削除
+                    numeric = numeric.replace(",", "")
+                    # numericをDecimalに変換
+                    numeric = Decimal(numeric)
+                    # sign属性が存在する場合は符号を反映
+                    numeric = numeric * -1 if sign == "-" else numeric
+                    # numericを文字列に変換
+                    # numeric = str(numeric)
+
+                # 数値変換に失敗した場合はそのまま文字列として取得
+                except (ValueError, InvalidOperation, TypeError):
+                    numeric = (
+                        str(numeric)
+                        if isinstance(numeric, Decimal)
+                        else numeric
+                    )
 
-        self.__ix_context = lists
+        # numericが空白の場合はNoneに変換
+        if numeric == "":
+            numeric = None
 
-        return self
+        # _____attr[display_numeric]
+        if numeric:
+            if sign == "-":
+                display_numeric = f"△{str(tag.text)}"
+            else:
+                display_numeric = str(tag.text)
+        else:
+            display_numeric = None
+
+        # _____attr[display_scale]
+        display_scale = None
+        if scale:
+            # 日本円の場合
+            if "JPY" in unit_ref:
+                if scale == "6":
+                    display_scale = "百万円"
+                elif scale == "3":
+                    display_scale = "千円"
+                elif scale == "0":
+                    display_scale = "円"
+            # 米ドルの場合
+            elif "USD" in unit_ref:
+                if scale == "6":
+                    display_scale = "百万ドル"
+                elif scale == "3":
+                    display_scale = "千ドル"
+                elif scale == "0":
+                    display_scale = "ドル"
+            # パーセントの場合
+            elif "Pure" in unit_ref:
+                if scale == "-2":
+                    display_scale = "%"
+            # 株式の場合
+            elif unit_ref == "Shares":
+                display_scale = "株"
+
+        return self._new_tag(
+            IxNonFraction,
+            head_item_key=self.head_item_key,
+            context=context,
+            decimals=decimals,
+            format=format_str,
+            name=name,
+            scale=scale,
+            unit_ref=unit_ref,
+            xsi_nil=xsi_nil,
+            numeric=numeric,
+            report_type=self.report_type,
+            ixbrl_role=self.ixbrl_role["en_label"],
+            source_file_id=self.source_file_id,
+            xbrl_type=self.xbrl_type,
+            sign=sign,
+            display_numeric=display_numeric,
+            display_scale=display_scale,
+        )
+
+    def __to_ix_context(self, tag):
+        """xbrli:contextタグからIxContextを生成する"""
+
+        # _____attr[id]
+        context_id = tag.get("id")
+        for period in tag.find_all(name="xbrli:period"):
+            start, end, instant = None, None, None
+            # _____attr[start]
+            if period.find(name="xbrli:startDate") is not None:
+                start = period.find(name="xbrli:startDate").text
+            # _____attr[end]
+            if period.find(name="xbrli:endDate") is not None:
+                end = period.find(name="xbrli:endDate").text
+            # _____attr[instant]
+            if period.find(name="xbrli:instant") is not None:
+                instant = period.find(name="xbrli:instant").text
+            period = {"start": start, "end": end, "instant": instant}
+        scenario = []
+        for value in tag.find_all(name="xbrli:scenario"):
+            for explicit_member in value.find_all(
+                name="xbrldi:explicitMember"
+            ):
+                dimension = explicit_member.get("dimension").replace(
+                    ":", "_"
+                )
+                scenario_value = explicit_member.text.replace(":", "_")
+                scenario.append(
+                    {"dimension": dimension, "value": scenario_value}
+                )
+
+        return self._new_tag(
+            IxContext,
+            head_item_key=self.head_item_key,
+            context_id=context_id,
+            period=period,
+            scenario=scenario,
+            source_file_id=self.source_file_id,
+        )
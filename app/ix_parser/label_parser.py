@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Iterator, Optional
 
 from app.exception import TagNotFoundError
 from app.ix_tag import LabelArc, LabelLoc, LabelRoleRefs, LabelValue
@@ -15,6 +15,9 @@ class LabelParser(BaseXBRLParser):
         output_path=None,
         head_item_key: Optional[str] = None,
         is_exist_source_file_id_api_url: Optional[str] = None,
+        engine: str = "bs4",
+        use_cache: bool = True,
+        trusted: bool = False,
     ):
 
         super().__init__(
@@ -22,6 +25,9 @@ class LabelParser(BaseXBRLParser):
             output_path,
             head_item_key,
             is_exist_source_file_id_api_url=is_exist_source_file_id_api_url,
+            engine=engine,
+            use_cache=use_cache,
+            trusted=trusted,
         )
 
         # ファイル名を検証
@@ -36,15 +42,27 @@ class LabelParser(BaseXBRLParser):
         returns:
             self: LabelParser
         """
+        self._collect_rows("link_labels", self.__parse_link_labels)
 
-        lists = []
+        return self
+
+    def iter_link_labels(self) -> Iterator[LabelValue]:
+        """link:label要素を1件ずつ取得するジェネレーター。
 
-        tags = self.soup.find_all(name=["link:label", "label"])
+        yields:
+            LabelValue: ラベル情報
+        """
+        return self._iter_rows("link_labels", self.__parse_link_labels)
+
+    def __parse_link_labels(self):
+        """link:label要素を解析する"""
+        tags = self._find_all(["link:label", "label"])
         for tag in tags:
 
             xlink_label = tag.get("xlink:label")
 
-            lv = LabelValue(
+            yield self._new_tag(
+                LabelValue,
                 xlink_type=tag.get("xlink:type"),
                 xlink_label=xlink_label,
                 xlink_role=tag.get("xlink:role"),
@@ -52,11 +70,6 @@ class LabelParser(BaseXBRLParser):
                 label=tag.text,
                 source_file_id=self.source_file_id,
             )
-            lists.append(lv)
-
-        self._set_data(lists)
-
-        return self
 
     def link_label_locs(self):
         """link:loc要素を取得するメソッド。
@@ -64,9 +77,23 @@ class LabelParser(BaseXBRLParser):
         returns:
             self: LabelParser
         """
-        lists = []
+        self._collect_rows("link_label_locs", self.__parse_link_label_locs)
+
+        return self
+
+    def iter_link_label_locs(self) -> Iterator[LabelLoc]:
+        """link:loc要素を1件ずつ取得するジェネレーター。
+
+        yields:
+            LabelLoc: loc要素情報
+        """
+        return self._iter_rows(
+            "link_label_locs", self.__parse_link_label_locs
+        )
 
-        tags = self.soup.find_all(name=["link:loc", "loc"])
+    def __parse_link_label_locs(self):
+        """link:loc要素を解析する"""
+        tags = self._find_all(["link:loc", "loc"])
         for tag in tags:
 
             # _____attr[xlink:href]
@@ -87,18 +114,14 @@ class LabelParser(BaseXBRLParser):
                 xlink_schema = None
                 xlink_href = None
 
-            ll = LabelLoc(
+            yield self._new_tag(
+                LabelLoc,
                 xlink_type=tag.get("xlink:type"),
                 xlink_label=tag.get("xlink:label"),
                 xlink_schema=xlink_schema,
                 xlink_href=xlink_href,
                 source_file_id=self.source_file_id,
             )
-            lists.append(ll)
-
-        self._set_data(lists)
-
-        return self
 
     def link_label_arcs(self):
         """link:labelArc要素を取得するメソッド。
@@ -106,22 +129,33 @@ class LabelParser(BaseXBRLParser):
         returns:
             self: LabelParser
         """
-        lists = []
-        tags = self.soup.find_all(name=["link:labelArc", "labelArc"])
+        self._collect_rows("link_label_arcs", self.__parse_link_label_arcs)
+
+        return self
+
+    def iter_link_label_arcs(self) -> Iterator[LabelArc]:
+        """link:labelArc要素を1件ずつ取得するジェネレーター。
+
+        yields:
+            LabelArc: arc要素情報
+        """
+        return self._iter_rows(
+            "link_label_arcs", self.__parse_link_label_arcs
+        )
+
+    def __parse_link_label_arcs(self):
+        """link:labelArc要素を解析する"""
+        tags = self._find_all(["link:labelArc", "labelArc"])
         for tag in tags:
 
-            la = LabelArc(
+            yield self._new_tag(
+                LabelArc,
                 xlink_type=tag.get("xlink:type"),
                 xlink_arcrole=tag.get("xlink:arcrole"),
                 xlink_from=tag.get("xlink:from"),
                 xlink_to=tag.get("xlink:to"),
                 source_file_id=self.source_file_id,
             )
-            lists.append(la)
-
-        self._set_data(lists)
-
-        return self
 
     def role_refs(self):
         """roleRef要素を取得するメソッド。
@@ -132,12 +166,22 @@ class LabelParser(BaseXBRLParser):
         Raises:
             TagNotFoundError: roleRef要素が存在しない場合に発生します。
         """
-        lists = []
-        tags = self.soup.find_all(name=["link:roleRef", "roleRef"])
+        lists = list(self.iter_role_refs())
 
-        if len(tags) == 0:
+        if len(lists) == 0:
             raise TagNotFoundError("roleRef要素が存在しません。")
 
+        self._set_data(lists)
+
+        return self
+
+    def iter_role_refs(self) -> Iterator[LabelRoleRefs]:
+        """roleRef要素を1件ずつ取得するジェネレーター。
+
+        yields:
+            LabelRoleRefs: roleRef要素情報
+        """
+        tags = self._find_all(["link:roleRef", "roleRef"])
         for tag in tags:
             # _____attr[xlink:href]
             if tag.get("xlink:href"):
@@ -148,15 +192,10 @@ class LabelParser(BaseXBRLParser):
                 xlink_schema = None
                 xlink_href = None
 
-            lrr = LabelRoleRefs(
+            yield self._new_tag(
+                LabelRoleRefs,
                 role_uri=tag.get("roleURI"),
                 xlink_type=tag.get("xlink:type"),
                 xlink_schema=xlink_schema,
                 xlink_href=xlink_href,
             )
-
-            lists.append(lrr)
-
-        self._set_data(lists)
-
-        return self
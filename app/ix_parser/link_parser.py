@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Iterator, Optional
 
 from app.ix_tag import LinkArc, LinkBase, LinkLoc, LinkRole, LinkTag
 
@@ -13,8 +13,18 @@ class BaseLinkParser(BaseXBRLParser):
         xbrl_url,
         output_path=None,
         head_item_key: Optional[str] = None,
+        engine: str = "bs4",
+        use_cache: bool = True,
+        trusted: bool = False,
     ):
-        super().__init__(xbrl_url, output_path, head_item_key)
+        super().__init__(
+            xbrl_url,
+            output_path,
+            head_item_key,
+            engine=engine,
+            use_cache=use_cache,
+            trusted=trusted,
+        )
 
         # プロパティの初期化
         self.__link_tag_name = None
@@ -40,25 +50,32 @@ class BaseLinkParser(BaseXBRLParser):
         returns:
             DataFrame: link:role要素を含むDataFrame。
         """
+        self._collect_rows("link_roles", self.__parse_link_roles)
+
+        return self
 
-        lists = []
+    def iter_link_roles(self) -> Iterator[LinkRole]:
+        """link:role要素を1件ずつ取得するジェネレーター。
 
-        tags = self.soup.find_all(name=["link:role", "roleRef"])
+        yields:
+            LinkRole: link:role要素
+        """
+        return self._iter_rows("link_roles", self.__parse_link_roles)
+
+    def __parse_link_roles(self):
+        """link:role要素を解析する"""
+        tags = self._find_all(["link:role", "roleRef"])
         for tag in tags:
             xlink_schema = tag.get("xlink:href").split("#")[0]
             xlink_href = tag.get("xlink:href").split("#")[1]
-            lrr = LinkRole(
+            yield self._new_tag(
+                LinkRole,
                 head_item_key=self.head_item_key,
                 xlink_type=tag.get("xlink:type"),
                 xlink_schema=xlink_schema,
                 xlink_href=xlink_href,
                 role_uri=tag.get("roleURI"),
             )
-            lists.append(lrr)
-
-        self._set_data(lists)
-
-        return self
 
     def link_locs(self):
         """link:loc要素を取得するメソッド。
@@ -66,9 +83,21 @@ class BaseLinkParser(BaseXBRLParser):
         returns:
             DataFrame: link:loc要素を含むDataFrame。
         """
-        link_tags = self.soup.find_all(self.link_tag_name)
+        self._collect_rows("link_locs", self.__parse_link_locs)
 
-        lists = []
+        return self
+
+    def iter_link_locs(self) -> Iterator[LinkLoc]:
+        """link:loc要素を1件ずつ取得するジェネレーター。
+
+        yields:
+            LinkLoc: link:loc要素
+        """
+        return self._iter_rows("link_locs", self.__parse_link_locs)
+
+    def __parse_link_locs(self):
+        """link:loc要素を解析する"""
+        link_tags = self._find_all(self.link_tag_name)
 
         for link_tag in link_tags:
 
@@ -85,7 +114,8 @@ class BaseLinkParser(BaseXBRLParser):
                 xlink_schema = tag.get("xlink:href").split("#")[0]
                 xlink_href = tag.get("xlink:href").split("#")[1]
 
-                ll = LinkLoc(
+                yield self._new_tag(
+                    LinkLoc,
                     head_item_key=self.head_item_key,
                     attr_value=attr_value,
                     xlink_type=tag.get("xlink:type"),
@@ -95,21 +125,28 @@ class BaseLinkParser(BaseXBRLParser):
                     source_file_id=self.source_file_id,
                 )
 
-                lists.append(ll)
-
-        self._set_data(lists)
-
-        return self
-
     def link_arcs(self):
         """link:arc要素を取得するメソッド。
 
         returns:
             DataFrame: link:arc要素を含むDataFrame。
         """
-        link_tags = self.soup.find_all(self.link_tag_name)
+        self._collect_rows("link_arcs", self.__parse_link_arcs)
+
+        return self
+
+    def iter_link_arcs(self) -> Iterator[LinkArc]:
+        """link:arc要素を1件ずつ取得するジェネレーター。
+
+        yields:
+            LinkArc: link:arc要素
+        """
+        return self._iter_rows("link_arcs", self.__parse_link_arcs)
+
+    def __parse_link_arcs(self):
+        """link:arc要素を解析する"""
+        link_tags = self._find_all(self.link_tag_name)
 
-        lists = []
         for link_tag in link_tags:
 
             attr_value = link_tag.get("xlink:role").split("_")[-1]
@@ -134,7 +171,8 @@ class BaseLinkParser(BaseXBRLParser):
                     else None
                 )
 
-                la = LinkArc(
+                yield self._new_tag(
+                    LinkArc,
                     head_item_key=self.head_item_key,
                     attr_value=attr_value,
                     xlink_type=tag.get("xlink:type"),
@@ -145,11 +183,6 @@ class BaseLinkParser(BaseXBRLParser):
                     xlink_weight=xlink_weight,
                     source_file_id=self.source_file_id,
                 )
-                lists.append(la)
-
-        self._set_data(lists)
-
-        return self
 
     def link_base(self):
         """link:base要素を取得するメソッド。
@@ -157,23 +190,26 @@ class BaseLinkParser(BaseXBRLParser):
         returns:
             DataFrame: link:base要素を含むDataFrame。
         """
+        self._collect_rows(None, self.iter_link_base)
 
-        lists = []
+        return self
+
+    def iter_link_base(self) -> Iterator[LinkBase]:
+        """link:base要素を1件ずつ取得するジェネレーター。
 
-        tags = self.soup.find_all(name=["link:linkbase", "linkbase"])
+        yields:
+            LinkBase: link:base要素
+        """
+        tags = self._find_all(["link:linkbase", "linkbase"])
         for tag in tags:
 
-            lb = LinkBase(
+            yield self._new_tag(
+                LinkBase,
                 head_item_key=self.head_item_key,
                 xmlns_xlink=tag.get("xmlns:xlink"),
                 xmlns_xsi=tag.get("xmlns:xsi"),
                 xmlns_link=tag.get("xmlns:link"),
             )
-            lists.append(lb)
-
-        self._set_data(lists)
-
-        return self
 
     def link_tags(self):
         """link要素を取得するメソッド。
@@ -181,22 +217,25 @@ class BaseLinkParser(BaseXBRLParser):
         returns:
             DataFrame: link要素を含むDataFrame。
         """
+        self._collect_rows(None, self.iter_link_tags)
+
+        return self
 
-        lists = []
+    def iter_link_tags(self) -> Iterator[LinkTag]:
+        """link要素を1件ずつ取得するジェネレーター。
 
-        tags = self.soup.find_all(self.link_tag_name)
+        yields:
+            LinkTag: link要素
+        """
+        tags = self._find_all(self.link_tag_name)
         for tag in tags:
 
-            lt = LinkTag(
+            yield self._new_tag(
+                LinkTag,
                 head_item_key=self.head_item_key,
                 xlink_type=tag.get("xlink:type"),
                 xlink_role=tag.get("xlink:role"),
             )
-            lists.append(lt)
-
-        self._set_data(lists)
-
-        return self
 
 
 class CalLinkParser(BaseLinkParser):
@@ -207,8 +246,18 @@ class CalLinkParser(BaseLinkParser):
         xbrl_url,
         output_path=None,
         head_item_key: Optional[str] = None,
+        engine: str = "bs4",
+        use_cache: bool = True,
+        trusted: bool = False,
     ):
-        super().__init__(xbrl_url, output_path, head_item_key)
+        super().__init__(
+            xbrl_url,
+            output_path,
+            head_item_key,
+            engine=engine,
+            use_cache=use_cache,
+            trusted=trusted,
+        )
 
         # ファイル名の検証
         self._assert_valid_basename("cal.xml")
@@ -228,8 +277,18 @@ class DefLinkParser(BaseLinkParser):
         xbrl_url,
         output_path=None,
         head_item_key: Optional[str] = None,
+        engine: str = "bs4",
+        use_cache: bool = True,
+        trusted: bool = False,
     ):
-        super().__init__(xbrl_url, output_path, head_item_key)
+        super().__init__(
+            xbrl_url,
+            output_path,
+            head_item_key,
+            engine=engine,
+            use_cache=use_cache,
+            trusted=trusted,
+        )
 
         # ファイル名の検証
         self._assert_valid_basename("def.xml")
@@ -247,8 +306,18 @@ class PreLinkParser(BaseLinkParser):
         xbrl_url,
         output_path=None,
         head_item_key: Optional[str] = None,
+        engine: str = "bs4",
+        use_cache: bool = True,
+        trusted: bool = False,
     ):
-        super().__init__(xbrl_url, output_path, head_item_key)
+        super().__init__(
+            xbrl_url,
+            output_path,
+            head_item_key,
+            engine=engine,
+            use_cache=use_cache,
+            trusted=trusted,
+        )
 
         # ファイル名の検証
         self._assert_valid_basename("pre.xml")
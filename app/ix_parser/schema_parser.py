@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 
 from app.ix_tag import SchemaElement, SchemaImport, SchemaLinkBaseRef
 from app.utils import Utils
@@ -15,19 +15,32 @@ class SchemaParser(BaseXBRLParser):
         xbrl_url,
         output_path=None,
         head_item_key: Optional[str] = None,
+        engine: str = "bs4",
+        trusted: bool = False,
     ):
-        super().__init__(xbrl_url, output_path, head_item_key)
+        super().__init__(
+            xbrl_url,
+            output_path,
+            head_item_key,
+            engine=engine,
+            trusted=trusted,
+        )
 
         # ファイル名を検証
         self._assert_valid_basename(".xsd")
 
     def import_schemas(self):
-        lists = []
+        self._collect_rows(None, self.iter_import_schemas)
 
-        tags = self.soup.find_all(name="import")
+        return self
+
+    def iter_import_schemas(self) -> Iterator[SchemaImport]:
+        """import要素を1件ずつ取得するジェネレーター"""
+        tags = self._find_all("import")
         for tag in tags:
 
-            si = SchemaImport(
+            yield self._new_tag(
+                SchemaImport,
                 schema_location=tag.get("schemaLocation"),
                 name_space=tag.get("namespace"),
                 xbrl_type=self.xbrl_type,
@@ -35,18 +48,18 @@ class SchemaParser(BaseXBRLParser):
                 source_file_id=self.source_file_id,
             )
 
-            lists.append(si)
-
-        self._set_data(lists)
+    def link_base_refs(self, exclude: list = []):
+        self._collect_rows(None, lambda: self.iter_link_base_refs(exclude))
 
         return self
 
-    def link_base_refs(self, exclude: list = []):
-        lists = []
-
+    def iter_link_base_refs(
+        self, exclude: list = []
+    ) -> Iterator[SchemaLinkBaseRef]:
+        """linkbaseRef要素を1件ずつ取得するジェネレーター"""
         # 除外リスト
 
-        tags = self.soup.find_all(name="linkbaseRef")
+        tags = self._find_all("linkbaseRef")
         for tag in tags:
 
             xlink_href = tag.get("xlink:href")
@@ -64,7 +77,8 @@ class SchemaParser(BaseXBRLParser):
                 if any([e in xlink_href for e in exclude]):
                     continue
 
-            slb = SchemaLinkBaseRef(
+            yield self._new_tag(
+                SchemaLinkBaseRef,
                 xlink_type=tag.get("xlink:type"),
                 xlink_href=tag.get("xlink:href"),
                 xlink_role=tag.get("xlink:role"),
@@ -75,19 +89,18 @@ class SchemaParser(BaseXBRLParser):
                 href_source_file_id=source_file_id,
             )
 
-            lists.append(slb)
-
-        self._set_data(lists)
+    def elements(self):
+        self._collect_rows(None, self.iter_elements)
 
         return self
 
-    def elements(self):
-        lists = []
-
-        tags = self.soup.find_all(name="element")
+    def iter_elements(self) -> Iterator[SchemaElement]:
+        """element要素を1件ずつ取得するジェネレーター"""
+        tags = self._find_all("element")
         for tag in tags:
 
-            se = SchemaElement(
+            yield self._new_tag(
+                SchemaElement,
                 id=tag.get("id"),
                 xbrli_balance=tag.get("xbrli:balance"),
                 xbrli_period_type=tag.get("xbrli:periodType"),
@@ -100,9 +113,3 @@ class SchemaParser(BaseXBRLParser):
                 head_item_key=self.head_item_key,
                 source_file_id=self.source_file_id,
             )
-
-            lists.append(se)
-
-        self._set_data(lists)
-
-        return self
@@ -0,0 +1,135 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_MAX_WORKERS = 8
+""" 存在確認を並列に行うスレッド数(コネクションプールの大きさ)の初期値 """
+
+DEFAULT_TIMEOUT = 30.0
+""" 存在確認のリクエストのタイムアウト(秒)の初期値 """
+
+
+class SourceFileLookup:
+    """source_file_idがAPIに登録済みか確認するクラス
+
+    複数のsource_file_idをresolveでまとめて受け取り、未確認のものだけを
+    Keep-Aliveの接続で並列に問い合わせます。登録済みのIDはプロセス内に
+    保持し、同じIDを再度問い合わせません。
+    未登録のIDは、同じ実行中に挿入される可能性があるため保持しません。
+    挿入に成功したIDはaddで登録済みにできます。
+    """
+
+    def __init__(
+        self,
+        api_url: str,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        timeout: float = DEFAULT_TIMEOUT,
+    ) -> None:
+        """
+        Parameters:
+            api_url (str): ソースファイルIDの存在確認URL
+            max_workers (int): 存在確認を並列に行うスレッド数
+            timeout (float): リクエストのタイムアウト(秒)
+        """
+        self.__api_url = api_url
+        self.__max_workers = max_workers
+        self.__timeout = timeout
+        self.__known = set()
+        self.__lock = threading.Lock()
+        self.__request_count = 0
+        self.__session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=max_workers, pool_maxsize=max_workers
+        )
+        self.__session.mount("http://", adapter)
+        self.__session.mount("https://", adapter)
+
+    @property
+    def api_url(self):
+        return self.__api_url
+
+    @property
+    def request_count(self):
+        """APIに問い合わせた回数"""
+        return self.__request_count
+
+    def __contains__(self, source_file_id: str) -> bool:
+        with self.__lock:
+            return source_file_id in self.__known
+
+    def resolve(self, source_file_ids: Iterable[str]) -> Dict[str, bool]:
+        """source_file_idが登録済みかをまとめて確認する
+
+        Parameters:
+            source_file_ids (Iterable): 確認するsource_file_idの一覧
+
+        Returns:
+            dict: source_file_idと登録済みかどうかの辞書
+        """
+        ids = list(dict.fromkeys(source_file_ids))
+        with self.__lock:
+            unknown = [id for id in ids if id not in self.__known]
+
+        if len(unknown) > 0:
+            with ThreadPoolExecutor(
+                max_workers=min(self.__max_workers, len(unknown))
+            ) as executor:
+                results = dict(
+                    zip(unknown, executor.map(self.__request, unknown))
+                )
+            with self.__lock:
+                self.__request_count += len(unknown)
+                self.__known.update(
+                    id for id, exists in results.items() if exists
+                )
+
+        with self.__lock:
+            return {id: id in self.__known for id in ids}
+
+    def exists(self, source_file_id: str) -> bool:
+        """source_file_idが登録済みか確認する"""
+        return self.resolve([source_file_id])[source_file_id]
+
+    def add(self, source_file_ids: Iterable[str]):
+        """source_file_idを登録済みとして保持する"""
+        with self.__lock:
+            self.__known.update(source_file_ids)
+
+    def clear(self):
+        """保持している登録済みのIDを破棄する"""
+        with self.__lock:
+            self.__known.clear()
+
+    def close(self):
+        """セッションを閉じ、プール中の接続を解放する"""
+        self.__session.close()
+
+    def __request(self, source_file_id: str) -> bool:
+        """APIに1件問い合わせる"""
+        response = self.__session.get(
+            self.__api_url,
+            params={"source_file_id": source_file_id},
+            timeout=self.__timeout,
+        )
+        return response.status_code == 200
+
+
+_lookups: Dict[str, SourceFileLookup] = {}
+_lookups_lock = threading.Lock()
+
+
+def get_source_file_lookup(api_url: Optional[str]):
+    """存在確認URLごとに共有するSourceFileLookupを取得する
+
+    api_urlがNoneの場合はNoneを返します。
+    """
+    if not api_url:
+        return None
+    with _lookups_lock:
+        lookup = _lookups.get(api_url)
+        if lookup is None:
+            lookup = _lookups[api_url] = SourceFileLookup(api_url)
+        return lookup
@@ -0,0 +1,155 @@
+import fcntl
+import hashlib
+import os
+import pickle
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import app.ix_tag
+from app.ix_tag import BaseTag
+
+ARTIFACT_VERSION = 2
+""" 解析済みアーティファクトの形式のバージョン """
+
+ARTIFACT_SUFFIX = ".parsed.pkl"
+""" 解析済みアーティファクトの拡張子 """
+
+
+def _schema_tag() -> str:
+    """アーティファクトの形式とタグクラスの定義から識別子を作成する
+
+    タグクラスの名前、モジュール、フィールドが変わると識別子が変わるため、
+    古い定義で保存したアーティファクトは読み込まずに無視されます。
+    """
+    classes = sorted(
+        (cls.__module__, cls.__qualname__, tuple(cls.model_fields))
+        for cls in vars(app.ix_tag).values()
+        if isinstance(cls, type) and issubclass(cls, BaseTag)
+    )
+    digest = hashlib.sha256(repr(classes).encode()).hexdigest()
+    return f"v{ARTIFACT_VERSION}-{digest[:12]}"
+
+
+ARTIFACT_SCHEMA = _schema_tag()
+""" アーティファクトのファイル名に含める形式の識別子 """
+
+
+class TaxonomyArtifactStore:
+    """解析済みのタクソノミをファイルに保存するクラス
+
+    タクソノミのXMLファイルと同じディレクトリに、解析の種類ごとの行
+    (item_keyを含む)をpickle形式で保存します。アーティファクトには
+    XMLファイルの更新日時とサイズを記録し、XMLファイルが更新された
+    場合は破棄して再解析します。ファイル名には形式の識別子を含めるため、
+    形式やタグクラスの定義が異なるアーティファクトは読み込みません。
+    アーティファクトはpickle形式で読み込み時にコードを実行できるため、
+    既定では無効です。他のユーザーが書き込めないディレクトリでのみ
+    enabledをTrueにしてください。
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.__enabled = enabled
+
+    @property
+    def enabled(self):
+        return self.__enabled
+
+    @enabled.setter
+    def enabled(self, enabled: bool):
+        self.__enabled = enabled
+
+    @staticmethod
+    def artifact_path(file_path: str) -> Path:
+        """XMLファイルに対応するアーティファクトのパスを取得する"""
+        path = Path(file_path)
+        return path.with_name(
+            f"{path.name}.{ARTIFACT_SCHEMA}{ARTIFACT_SUFFIX}"
+        )
+
+    def load(self, file_path: str, kind: str) -> Optional[List[BaseTag]]:
+        """アーティファクトから解析結果を取得する
+
+        Args:
+            file_path (str): タクソノミのローカルファイルパス
+            kind (str): 解析の種類(メソッド名)
+
+        Returns:
+            list | None: 解析結果。存在しない場合や古い場合はNone
+        """
+        if not self.enabled:
+            return None
+        rows = self.__read(file_path).get(kind)
+        if rows is None:
+            return None
+        return list(rows)
+
+    def save(self, file_path: str, kind: str, rows: List[BaseTag]):
+        """解析結果をアーティファクトに保存する
+
+        既存のアーティファクトに他の種類の解析結果がある場合は、
+        それらを保持したまま追加します。
+
+        Args:
+            file_path (str): タクソノミのローカルファイルパス
+            kind (str): 解析の種類(メソッド名)
+            rows (list): 解析結果
+        """
+        if not self.enabled:
+            return
+        path = self.artifact_path(file_path)
+        lock_path = path.with_name(f"{path.name}.lock")
+        try:
+            with open(lock_path, "w") as lock:
+                # 他のプロセスと同時に書き込まないようにロック
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+                try:
+                    data = self.__read(file_path)
+                    data[kind] = list(rows)
+                    self.__write(file_path, data)
+                finally:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+        except OSError:
+            # 保存できない場合は次回も解析する
+            pass
+
+    def __read(self, file_path: str) -> Dict[str, List[BaseTag]]:
+        """鮮度が一致するアーティファクトの内容を取得する
+
+        読み込めないアーティファクトは存在しないものとして扱い、
+        次の保存時に上書きします。
+        """
+        path = self.artifact_path(file_path)
+        try:
+            with open(path, "rb") as f:
+                artifact = pickle.load(f)
+            stat = os.stat(file_path)
+        except Exception:
+            # 破損やクラスの移動、名前の変更で読み込めない場合も再解析する
+            return {}
+        if (
+            not isinstance(artifact, dict)
+            or artifact.get("version") != ARTIFACT_VERSION
+            or artifact.get("mtime_ns") != stat.st_mtime_ns
+            or artifact.get("size") != stat.st_size
+        ):
+            return {}
+        return dict(artifact["rows"])
+
+    def __write(self, file_path: str, rows: Dict[str, List[BaseTag]]):
+        """アーティファクトを一時ファイル経由で書き込む"""
+        path = self.artifact_path(file_path)
+        stat = os.stat(file_path)
+        artifact = {
+            "version": ARTIFACT_VERSION,
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "rows": rows,
+        }
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump(artifact, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+
+taxonomy_artifact_store = TaxonomyArtifactStore()
+""" タクソノミの解析済みアーティファクトの保存先(既定では無効) """
@@ -0,0 +1,116 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from app.ix_tag import BaseTag
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+""" キャッシュのメモリ上限(バイト)の初期値 """
+
+
+class TaxonomyCache:
+    """解析済みのタクソノミをプロセス内で共有するLRUキャッシュ
+
+    タクソノミのURL、解析の種類、ローカルファイルの更新日時とサイズを
+    キーとして解析結果の行を保持します。推定メモリ使用量がmax_bytesを
+    超えた場合は、最も参照されていない結果から破棄します。
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.__entries: OrderedDict = OrderedDict()
+        self.__lock = threading.Lock()
+        self.__max_bytes = max_bytes
+        self.__current_bytes = 0
+        self.__hits = 0
+        self.__misses = 0
+
+    @property
+    def max_bytes(self):
+        return self.__max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, max_bytes: int):
+        with self.__lock:
+            self.__max_bytes = max_bytes
+            self.__evict()
+
+    @property
+    def current_bytes(self):
+        return self.__current_bytes
+
+    @property
+    def hits(self):
+        return self.__hits
+
+    @property
+    def misses(self):
+        return self.__misses
+
+    def __len__(self):
+        return len(self.__entries)
+
+    @staticmethod
+    def make_key(url: str, file_path: str, kind: str) -> Tuple:
+        """キャッシュのキーを生成する
+
+        Args:
+            url (str): タクソノミのURL
+            file_path (str): タクソノミのローカルファイルパス
+            kind (str): 解析の種類(メソッド名)
+        """
+        stat = os.stat(file_path)
+        return (url, kind, stat.st_mtime_ns, stat.st_size)
+
+    @staticmethod
+    def estimate_size(rows: List[BaseTag]) -> int:
+        """解析結果の推定メモリ使用量を取得する"""
+        size = sys.getsizeof(rows)
+        for row in rows:
+            size += sys.getsizeof(row)
+            for value in row.__dict__.values():
+                size += sys.getsizeof(value)
+        return size
+
+    def get(self, key: Tuple) -> Optional[List[BaseTag]]:
+        """解析結果を取得する。存在しない場合はNoneを返す"""
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                self.__misses += 1
+                return None
+            self.__entries.move_to_end(key)
+            self.__hits += 1
+            return list(entry[0])
+
+    def put(self, key: Tuple, rows: List[BaseTag]):
+        """解析結果を登録する"""
+        size = self.estimate_size(rows)
+        with self.__lock:
+            # 上限を超える結果は登録しない
+            if size > self.__max_bytes:
+                return
+            if key in self.__entries:
+                self.__current_bytes -= self.__entries.pop(key)[1]
+            self.__entries[key] = (list(rows), size)
+            self.__current_bytes += size
+            self.__evict()
+
+    def clear(self):
+        """キャッシュを全て破棄する"""
+        with self.__lock:
+            self.__entries.clear()
+            self.__current_bytes = 0
+            self.__hits = 0
+            self.__misses = 0
+
+    def __evict(self):
+        """上限を超えた分を古い順に破棄する"""
+        while self.__current_bytes > self.__max_bytes and self.__entries:
+            _, (_, size) = self.__entries.popitem(last=False)
+            self.__current_bytes -= size
+
+
+taxonomy_cache = TaxonomyCache()
+""" プロセス内で共有するタクソノミキャッシュ """
@@ -0,0 +1,118 @@
+import fcntl
+import io
+import os
+import zipfile
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+
+ZIP_SEPARATOR = "!/"
+""" zipファイルのパスとメンバー名の区切り文字 """
+
+
+def to_zip_path(zip_path: str, member: str) -> str:
+    """zipファイル内のメンバーを指すパスを生成する
+
+    Example:
+        >>> to_zip_path("/tmp/a.zip", "XBRLData/Summary/a.xsd")
+        '/tmp/a.zip!/XBRLData/Summary/a.xsd'
+    """
+    return f"{zip_path}{ZIP_SEPARATOR}{member}"
+
+
+def split_zip_path(path: str) -> Optional[Tuple[str, str]]:
+    """zipファイル内を指すパスを(zipファイルのパス, メンバー名)に分割する
+
+    zipファイル内を指すパスでない場合はNoneを返します。
+    """
+    if not isinstance(path, str) or ZIP_SEPARATOR not in path:
+        return None
+    zip_path, member = path.split(ZIP_SEPARATOR, 1)
+    if not zip_path.endswith(".zip"):
+        return None
+    return zip_path, member
+
+
+def is_zip_path(path: str) -> bool:
+    """zipファイル内を指すパスか判定する"""
+    return split_zip_path(path) is not None
+
+
+def list_members(zip_path: str) -> List[str]:
+    """zipファイル内のファイルを指すパスのリストを取得する
+
+    ディレクトリと、"."から始まる隠しファイルは除外します。
+    """
+    with _open_zip(zip_path) as z:
+        return [
+            to_zip_path(zip_path, info.filename)
+            for info in z.infolist()
+            if not info.is_dir()
+            and not os.path.basename(info.filename).startswith(".")
+        ]
+
+
+def exists(path: str) -> bool:
+    """ファイル(zipファイル内のメンバーを含む)が存在するか判定する"""
+    zip_member = split_zip_path(path)
+    if zip_member is None:
+        return os.path.exists(path)
+    zip_path, member = zip_member
+    if not os.path.exists(zip_path):
+        return False
+    with _open_zip(zip_path) as z:
+        try:
+            z.getinfo(member)
+        except KeyError:
+            return False
+    return True
+
+
+@contextmanager
+def open_source(path: str, mode: str = "r") -> Iterator[io.IOBase]:
+    """ファイル(zipファイル内のメンバーを含む)を読み取り専用で開く
+
+    読み取り中はファイル(zipファイルの場合はzipファイル)を共有ロック
+    します。
+
+    Args:
+        path (str): ファイルのパス
+        mode (str): "r"(UTF-8のテキスト)または"rb"(バイナリ)
+    """
+    zip_member = split_zip_path(path)
+    if zip_member is None:
+        if mode == "rb":
+            f = open(path, "rb")
+        else:
+            f = open(path, "r", encoding="utf-8")
+        with f:
+            with _shared_lock(f):
+                yield f
+        return
+
+    zip_path, member = zip_member
+    with _open_zip(zip_path) as z:
+        with z.open(member) as f:
+            if mode == "rb":
+                yield f
+            else:
+                yield io.TextIOWrapper(f, encoding="utf-8")
+
+
+@contextmanager
+def _open_zip(zip_path: str) -> Iterator[zipfile.ZipFile]:
+    """zipファイルを共有ロックして開く"""
+    with open(zip_path, "rb") as f:
+        with _shared_lock(f):
+            with zipfile.ZipFile(f) as z:
+                yield z
+
+
+@contextmanager
+def _shared_lock(f):
+    """読み取り専用でファイルをロックする"""
+    fcntl.flock(f.fileno(), fcntl.LOCK_SH)
+    try:
+        yield f
+    finally:
+        # ファイルのロックを解除
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
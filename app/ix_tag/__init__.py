@@ -1,4 +1,5 @@
 from .base import BaseTag, FilePath, SourceFile
+from .columnar import ColumnarResult
 from .ixbrl import IxContext, IxHeader, IxNonFraction, IxNonNumeric
 from .label import LabelArc, LabelLoc, LabelRoleRefs, LabelValue
 from .link import (
@@ -38,4 +39,5 @@ __all__ = [
     "SchemaLinkBaseRef",
     "QualitativeDocument",
     "FilePath",
+    "ColumnarResult",
 ]
@@ -1,8 +1,12 @@
 import uuid
-from typing import Optional
+from decimal import Decimal
+from typing import Dict, FrozenSet, Optional
 
 from pydantic import BaseModel, ConfigDict, Field
 
+_STR_FIELDS: Dict[type, FrozenSet[str]] = {}
+""" クラスごとの文字列型のフィールド名 """
+
 
 class BaseTag(BaseModel):
     """Base class for tags"""
@@ -24,6 +28,42 @@ class BaseTag(BaseModel):
         except TypeError:
             return False
 
+    @classmethod
+    def trusted(cls, **data):
+        """検証を省略してインスタンスを生成する
+
+        パーサーが生成した、型が確定しているデータ専用の高速な生成方法です。
+        model_constructで検証を省略し、数値の文字列への変換と
+        item_keyの設定のみを行います。通常の生成と同じitem_keyと
+        model_dumpの結果になります。
+        """
+        for name in cls.__str_fields():
+            value = data.get(name)
+            if isinstance(value, (int, float, Decimal)) and not isinstance(
+                value, bool
+            ):
+                data[name] = str(value)
+        tag = cls.model_construct(**data)
+        tag._set_item_key()
+        return tag
+
+    @classmethod
+    def __str_fields(cls) -> FrozenSet[str]:
+        """文字列型のフィールド名を取得する"""
+        fields = _STR_FIELDS.get(cls)
+        if fields is None:
+            fields = frozenset(
+                name
+                for name, field in cls.model_fields.items()
+                if field.annotation in (str, Optional[str])
+            )
+            _STR_FIELDS[cls] = fields
+        return fields
+
+    def _set_item_key(self):
+        """item_keyを設定する(サブクラスで実装)"""
+        pass
+
     def __eq__(self, value: object) -> bool:
         return self.__dict__ == value.__dict__
 
@@ -44,6 +84,9 @@ class SourceFile(BaseTag):
 
     def __init__(self, **data):
         super().__init__(**data)
+        self._set_item_key()
+
+    def _set_item_key(self):
         key = None
         if self.head_item_key:
             key = self.head_item_key
@@ -68,6 +111,9 @@ class FilePath(BaseTag):
 
     def __init__(self, **data):
         super().__init__(**data)
+        self._set_item_key()
+
+    def _set_item_key(self):
         if self.head_item_key and self.path:
             self.item_key = str(
                 uuid.uuid5(
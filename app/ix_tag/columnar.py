@@ -0,0 +1,144 @@
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+from pandas import DataFrame
+
+from .base import BaseTag
+
+try:
+    import pyarrow
+except ImportError:  # pyarrowは任意の依存関係
+    pyarrow = None
+
+
+class ColumnarResult:
+    """解析結果をフィールドごとの配列で保持するクラス
+
+    タグのリストを1回だけ走査し、フィールド名ごとの値のリストに変換して
+    保持します。pandas, NumPy, Arrowへは行ごとのPythonオブジェクトを
+    作らずに変換できます。
+    """
+
+    def __init__(
+        self,
+        columns: Optional[Dict[str, list]] = None,
+        tag_class: Optional[type] = None,
+    ) -> None:
+        """
+        Parameters:
+            columns (dict): フィールド名と値のリストの辞書
+            tag_class (type): 元になったタグのクラス
+        """
+        self.__columns = columns if columns is not None else {}
+        self.__tag_class = tag_class
+
+        lengths = {len(values) for values in self.__columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("列の長さが一致しません。")
+
+    @property
+    def columns(self):
+        return self.__columns
+
+    @property
+    def tag_class(self):
+        return self.__tag_class
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.__columns)
+
+    def __len__(self) -> int:
+        for values in self.__columns.values():
+            return len(values)
+        return 0
+
+    def __getitem__(self, name: str) -> list:
+        return self.__columns[name]
+
+    @classmethod
+    def from_tags(
+        cls, tags: Iterable[Union[BaseTag, dict]]
+    ) -> "ColumnarResult":
+        """タグ(または辞書)の一覧から作成する
+
+        Parameters:
+            tags (Iterable): BaseTagまたは辞書の一覧
+        """
+        columns: Dict[str, list] = {}
+        tag_class = None
+        count = 0
+        for tag in tags:
+            if isinstance(tag, BaseTag):
+                if tag_class is None:
+                    tag_class = type(tag)
+                row = tag.__dict__
+            elif isinstance(tag, dict):
+                row = tag
+            else:
+                raise TypeError(
+                    f"BaseTagまたは辞書を指定してください。[{type(tag)}]"
+                )
+
+            for key, value in row.items():
+                values = columns.get(key)
+                if values is None:
+                    # 途中から現れた列はそれまでの行をNoneで埋める
+                    values = columns[key] = [None] * count
+                values.append(value)
+            count += 1
+
+            # 行に存在しない列はNoneで埋める
+            if len(row) != len(columns):
+                for values in columns.values():
+                    if len(values) < count:
+                        values.append(None)
+
+        return cls(columns, tag_class=tag_class)
+
+    @classmethod
+    def concat(
+        cls, results: Iterable["ColumnarResult"]
+    ) -> "ColumnarResult":
+        """複数のColumnarResultを連結する"""
+        columns: Dict[str, list] = {}
+        tag_class = None
+        count = 0
+        for result in results:
+            if tag_class is None:
+                tag_class = result.tag_class
+            for key, values in result.columns.items():
+                if key not in columns:
+                    columns[key] = [None] * count
+                columns[key].extend(values)
+            count += len(result)
+            for values in columns.values():
+                if len(values) < count:
+                    values.extend([None] * (count - len(values)))
+        return cls(columns, tag_class=tag_class)
+
+    def to_pandas(self) -> DataFrame:
+        """pandasのDataFrameに変換する"""
+        return DataFrame(self.__columns, columns=self.names)
+
+    def to_numpy(self) -> Dict[str, np.ndarray]:
+        """フィールド名とNumPy配列(dtype=object)の辞書に変換する"""
+        return {
+            key: np.fromiter(values, dtype=object, count=len(values))
+            for key, values in self.__columns.items()
+        }
+
+    def to_arrow(self):
+        """pyarrowのTableに変換する(pyarrowが必要です)"""
+        if pyarrow is None:
+            raise ImportError(
+                "to_arrowを利用するにはpyarrowをインストールしてください。"
+            )
+        return pyarrow.table(self.__columns)
+
+    def to_records(self) -> List[dict]:
+        """行ごとの辞書のリストに変換する"""
+        names = self.names
+        return [
+            dict(zip(names, row)) for row in zip(*self.__columns.values())
+        ]
@@ -23,6 +23,9 @@ class IxNonNumeric(BaseTag):
 
     def __init__(self, **data):
         super().__init__(**data)
+        self._set_item_key()
+
+    def _set_item_key(self):
         if self.name and self.context and self.head_item_key:
             self.item_key = str(
                 uuid.uuid5(
@@ -54,6 +57,9 @@ class IxNonFraction(BaseTag):
 
     def __init__(self, **data):
         super().__init__(**data)
+        self._set_item_key()
+
+    def _set_item_key(self):
         if self.name and self.context and self.head_item_key:
             self.item_key = str(
                 uuid.uuid5(
@@ -98,6 +104,9 @@ class IxContext(BaseTag):
 
     def __init__(self, **data):
         super().__init__(**data)
+        self._set_item_key()
+
+    def _set_item_key(self):
         if self.context_id and self.head_item_key:
             self.item_key = str(
                 uuid.uuid5(
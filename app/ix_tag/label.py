@@ -18,6 +18,9 @@ class LabelValue(BaseTag):
 
     def __init__(self, **data):
         super().__init__(**data)
+        self._set_item_key()
+
+    def _set_item_key(self):
         if self.xlink_label and self.xlink_role:
             self.item_key = str(
                 uuid.uuid5(
@@ -38,6 +41,9 @@ class LabelLoc(BaseTag):
 
     def __init__(self, **data):
         super().__init__(**data)
+        self._set_item_key()
+
+    def _set_item_key(self):
         if self.xlink_label and self.xlink_schema:
             self.item_key = str(
                 uuid.uuid5(
@@ -58,6 +64,9 @@ class LabelArc(BaseTag):
 
     def __init__(self, **data):
         super().__init__(**data)
+        self._set_item_key()
+
+    def _set_item_key(self):
         if self.xlink_from and self.xlink_to:
             self.item_key = str(
                 uuid.uuid5(
@@ -77,6 +86,9 @@ class LabelRoleRefs(BaseTag):
 
     def __init__(self, **data):
         super().__init__(**data)
+        self._set_item_key()
+
+    def _set_item_key(self):
         if self.role_uri and self.xlink_schema:
             self.item_key = str(
                 uuid.uuid5(
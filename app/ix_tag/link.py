@@ -18,6 +18,9 @@ class LinkSchemaImport(BaseTag):
 
     def __init__(self, **data):
         super().__init__(**data)
+        self._set_item_key()
+
+    def _set_item_key(self):
         if self.schema_location and self.name_space:
             self.item_key = str(
                 uuid.uuid5(
@@ -41,6 +44,9 @@ class LinkBaseRef(BaseTag):
 
     def __init__(self, **data):
         super().__init__(**data)
+        self._set_item_key()
+
+    def _set_item_key(self):
         if self.xlink_href and self.xlink_role:
             self.item_key = str(
                 uuid.uuid5(
@@ -68,6 +74,9 @@ class LinkElement(BaseTag):
 
     def __init__(self, **data):
         super().__init__(**data)
+        self._set_item_key()
+
+    def _set_item_key(self):
         if self.name and self.type:
             self.item_key = str(
                 uuid.uuid5(
@@ -90,6 +99,9 @@ class LinkRole(BaseTag):
 
     def __init__(self, **data):
         super().__init__(**data)
+        self._set_item_key()
+
+    def _set_item_key(self):
         if self.role_uri and self.xlink_schema:
             self.item_key = str(
                 uuid.uuid5(
@@ -114,6 +126,9 @@ class LinkLoc(BaseTag):
 
     def __init__(self, **data):
         super().__init__(**data)
+        self._set_item_key()
+
+    def _set_item_key(self):
         if self.xlink_label and self.xlink_schema:
             self.item_key = str(
                 uuid.uuid5(
@@ -140,6 +155,9 @@ class LinkArc(BaseTag):
 
     def __init__(self, **data):
         super().__init__(**data)
+        self._set_item_key()
+
+    def _set_item_key(self):
         if self.xlink_from and self.xlink_to:
             self.item_key = str(
                 uuid.uuid5(
@@ -161,6 +179,9 @@ class LinkBase(BaseTag):
 
     def __init__(self, **data):
         super().__init__(**data)
+        self._set_item_key()
+
+    def _set_item_key(self):
         if self.xmlns_xlink and self.xmlns_xsi:
             self.item_key = str(
                 uuid.uuid5(
@@ -181,6 +202,9 @@ class LinkTag(BaseTag):
 
     def __init__(self, **data):
         super().__init__(**data)
+        self._set_item_key()
+
+    def _set_item_key(self):
         if self.xlink_type and self.xlink_role:
             self.item_key = str(
                 uuid.uuid5(
@@ -32,6 +32,9 @@ class QualitativeDocument(BaseTag):
 
     def __init__(self, **data):
         super().__init__(**data)
+        self._set_item_key()
+
+    def _set_item_key(self):
         if self.content:
             self.item_key = str(
                 uuid.uuid5(
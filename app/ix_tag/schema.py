@@ -17,6 +17,9 @@ class SchemaImport(BaseTag):
 
     def __init__(self, **data):
         super().__init__(**data)
+        self._set_item_key()
+
+    def _set_item_key(self):
         if self.schema_location and self.name_space:
             self.item_key = str(
                 uuid.uuid5(
@@ -40,6 +43,9 @@ class SchemaLinkBaseRef(BaseTag):
 
     def __init__(self, **data):
         super().__init__(**data)
+        self._set_item_key()
+
+    def _set_item_key(self):
         if self.xlink_href and self.xlink_role:
             self.item_key = str(
                 uuid.uuid5(
@@ -66,6 +72,9 @@ class SchemaElement(BaseTag):
 
     def __init__(self, **data):
         super().__init__(**data)
+        self._set_item_key()
+
+    def _set_item_key(self):
         if self.name and self.head_item_key:
             self.item_key = str(
                 uuid.uuid5(
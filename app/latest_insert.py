@@ -3,8 +3,12 @@ import sys
 from datetime import datetime, timedelta
 from pathlib import Path
 
+from app.api.ix.adaptive_concurrency import AdaptiveConcurrency
+from app.api.ix.dead_letter import DEFAULT_DEAD_LETTER_DIR, DeadLetterQueue
 from app.api.ix.exceptions import ApiInsertionException
-from app.api.ix.insert import Insert
+from app.api.ix.ingest_index import DEFAULT_INDEX_NAME, IngestIndex
+from app.api.ix.insert import DEFAULT_MAX_WORKERS, Insert
+from app.api.ix.run_journal import RunJournal
 
 # ロックファイルのパスを指定
 currentPath = os.path.dirname(os.path.abspath(__file__))
@@ -19,18 +23,25 @@ if __name__ == "__main__":
         sys.exit(0)  # 実行をスキップ
 
     # コマンドライン引数を取得
-    if len(sys.argv) < 3:
+    # (--resumeの場合は前回の実行のジャーナルから再開する)
+    # (--reconcileの場合は開始前にインデックスをAPIと照合する)
+    resume = "--resume" in sys.argv
+    reconcile = "--reconcile" in sys.argv
+    argv = [
+        arg for arg in sys.argv if arg not in ("--resume", "--reconcile")
+    ]
+    if len(argv) < 3:
         print("引数が不足しています。以下の形式で指定してください:")
         print(
-            "python latest_insert.py <targetDir> <api_base_url> [select_date]"
+            "python latest_insert.py <targetDir> <api_base_url> [select_date] [--resume] [--reconcile]"
         )
         sys.exit(1)  # 実行をスキップ
         # finaryの処理を実行
 
-    target = sys.argv[1]
-    api_base_url = sys.argv[2]
-    if len(sys.argv) >= 4:
-        select_date = sys.argv[3]
+    target = argv[1]
+    api_base_url = argv[2]
+    if len(argv) >= 4:
+        select_date = argv[3]
     else:
         select_date = datetime.now().strftime("%Y-%m-%d")
 
@@ -39,41 +50,86 @@ if __name__ == "__main__":
     print(f"target: {target}")
     print(f"api_base_url: {api_base_url}")
     print(f"select_date: {select_date}")
+    print(f"resume: {resume}")
+    print(f"reconcile: {reconcile}")
 
     # ロックファイルを作成
     with open(lock_file, "w") as f:
         f.write("")
 
+    # ロックファイルを削除できるよう、作成後の処理はtryの中で行う
+    ingest_index = journal = None
     try:
-        # 日付を遡るループ
-        today = datetime.strptime(select_date, "%Y-%m-%d")
-        yesterday = today - timedelta(days=1)
+        # 挿入済みのXBRLファイルのインデックス(再実行時にAPIへの問い合わせを省略)
+        ingest_index = IngestIndex(
+            os.path.join(outputPath, DEFAULT_INDEX_NAME)
+        )
+        # 進捗のジャーナル(--resumeの場合は前回の続きから再開)
+        # (チャンクの分割が異なる実行のタスクは再開に使用しない)
+        journal = RunJournal(
+            os.path.join(outputPath, "latest_insert.journal.jsonl"),
+            resume=resume,
+            params=Insert.journal_params(),
+        )
+        # 再試行しても送信できなかったペイロードの保存先
+        # (replay_dead_letters.pyで再送信する)
+        dead_letter = DeadLetterQueue(
+            os.path.join(outputPath, DEFAULT_DEAD_LETTER_DIR)
+        )
+        # APIの応答に合わせて同時に送信するリクエスト数を調整する
+        # (日をまたいで調整結果を引き継ぐ)
+        concurrency = AdaptiveConcurrency(
+            min_limit=1,
+            max_limit=DEFAULT_MAX_WORKERS * 2,
+            initial_limit=DEFAULT_MAX_WORKERS,
+        )
+
+        # 日をまたいで1つのセッション(コネクションプール)を使用する
+        with Insert(
+            outputPath,
+            api_base_url,
+            ingest_index=ingest_index,
+            journal=journal,
+            dead_letter=dead_letter,
+            concurrency=concurrency,
+        ) as insert:
+            if reconcile:
+                # APIで有効になっていないXBRLファイルの記録を削除
+                removed = insert.reconcile_ingest_index()
+                print(f"インデックスから削除した件数: {len(removed)}")
 
-        while True:
-            try:
-                print(f"処理中の日付: {today.strftime('%Y-%m-%d')}")
-                insert = Insert(outputPath, api_base_url)
-                targetDir = Path.joinpath(
-                    Path(target),
-                    Path(today.strftime("%Y年")),
-                    Path(today.strftime("%m月")),
-                    Path(today.strftime("%Y%m%d")),
-                )
+            # 日付を遡るループ
+            today = datetime.strptime(select_date, "%Y-%m-%d")
+            yesterday = today - timedelta(days=1)
 
-                # 昨日までのデータを取得
-                if today < yesterday:
-                    print(
-                        "指定された日付よりも前の日付です。処理を終了します。"
+            while True:
+                try:
+                    print(f"処理中の日付: {today.strftime('%Y-%m-%d')}")
+                    targetDir = Path.joinpath(
+                        Path(target),
+                        Path(today.strftime("%Y年")),
+                        Path(today.strftime("%m月")),
+                        Path(today.strftime("%Y%m%d")),
                     )
-                    break
 
-                insert.insert_xbrl_dir(targetDir.as_posix())
-                today -= timedelta(days=1)
-            except ApiInsertionException as e:
-                today -= timedelta(days=1)
-                continue
+                    # 昨日までのデータを取得
+                    if today < yesterday:
+                        print(
+                            "指定された日付よりも前の日付です。処理を終了します。"
+                        )
+                        break
+
+                    insert.insert_xbrl_dir(targetDir.as_posix())
+                    today -= timedelta(days=1)
+                except ApiInsertionException as e:
+                    today -= timedelta(days=1)
+                    continue
 
     finally:
+        if ingest_index is not None:
+            ingest_index.close()
+        if journal is not None:
+            journal.close()
         # 処理が終了したらロックファイルを削除
         if os.path.exists(lock_file):
             os.remove(lock_file)
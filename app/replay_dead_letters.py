@@ -0,0 +1,46 @@
+import os
+import sys
+
+from app.api.ix.dead_letter import DEFAULT_DEAD_LETTER_DIR, DeadLetterQueue
+from app.api.ix.ingest_index import DEFAULT_INDEX_NAME, IngestIndex
+from app.api.ix.insert import Insert
+
+# 出力先ディレクトリのパスを指定
+currentPath = os.path.dirname(os.path.abspath(__file__))
+parentDir = os.path.dirname(currentPath)
+outputPath = f"{parentDir}/output"
+
+if __name__ == "__main__":
+    # コマンドライン引数を取得
+    if len(sys.argv) < 2:
+        print("引数が不足しています。以下の形式で指定してください:")
+        print(
+            "python replay_dead_letters.py <api_base_url> [dead_letter_dir]"
+        )
+        sys.exit(1)
+
+    api_base_url = sys.argv[1]
+    if len(sys.argv) >= 3:
+        dead_letter_dir = sys.argv[2]
+    else:
+        dead_letter_dir = os.path.join(outputPath, DEFAULT_DEAD_LETTER_DIR)
+
+    dead_letter = DeadLetterQueue(dead_letter_dir)
+    print(f"デッドレター: {dead_letter_dir} ({len(dead_letter)}件)")
+
+    # 送信に失敗したペイロードを、XBRLファイルを解析せずに再送信する
+    with IngestIndex(
+        os.path.join(outputPath, DEFAULT_INDEX_NAME)
+    ) as ingest_index, Insert(
+        outputPath,
+        api_base_url,
+        ingest_index=ingest_index,
+        dead_letter=dead_letter,
+    ) as insert:
+        result = insert.replay_dead_letters()
+
+    print(
+        f"再送信に成功: {result['replayed']}件, 失敗: {result['failed']}件, 送信済みのため削除: {result['skipped']}件"
+    )
+    if result["failed"] > 0:
+        sys.exit(1)
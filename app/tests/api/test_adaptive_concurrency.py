@@ -0,0 +1,117 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.api.ix import AdaptiveConcurrency
+
+
+def observe(concurrency, is_success, latency, key=None, count=1):
+    for _ in range(count):
+        concurrency.acquire()
+        concurrency.release(is_success, latency, key)
+
+
+def test_increase():
+    concurrency = AdaptiveConcurrency(
+        min_limit=1, max_limit=4, initial_limit=2
+    )
+    # 成功するごとに1/同時実行数ずつ増やす
+    observe(concurrency, True, 0.1, count=3)
+    assert concurrency.limit == 3
+    observe(concurrency, True, 0.1, count=20)
+    assert concurrency.limit == 4
+
+
+def test_decrease_and_cooldown():
+    concurrency = AdaptiveConcurrency(
+        min_limit=1, max_limit=16, initial_limit=16, cooldown=60
+    )
+    observe(concurrency, False, 0.1)
+    assert concurrency.limit == 8
+    # cooldown秒間は続けて減らさない
+    observe(concurrency, False, 0.1, count=5)
+    assert concurrency.limit == 8
+
+
+def test_decrease_without_cooldown():
+    concurrency = AdaptiveConcurrency(
+        min_limit=2, max_limit=16, initial_limit=16, cooldown=0
+    )
+    observe(concurrency, False, 0.1, count=2)
+    assert concurrency.limit == 4
+    # 下限より小さくしない
+    observe(concurrency, False, 0.1, count=5)
+    assert concurrency.limit == 2
+
+
+def test_call():
+    concurrency = AdaptiveConcurrency(
+        min_limit=1, max_limit=8, initial_limit=8, cooldown=0
+    )
+    response = SimpleNamespace(status_code=503)
+    assert concurrency.call(lambda: response, "a") is response
+    assert concurrency.limit == 4
+
+    def fail():
+        raise ValueError("fail")
+
+    with pytest.raises(ValueError):
+        concurrency.call(fail, "a")
+    assert concurrency.limit == 2
+    assert concurrency.in_flight == 0
+
+
+def test_latency_target():
+    concurrency = AdaptiveConcurrency(
+        initial_limit=8, max_limit=8, latency_target=0.5, cooldown=0
+    )
+    observe(concurrency, True, 0.4)
+    assert concurrency.limit == 8
+    observe(concurrency, True, 2.0)
+    assert concurrency.limit == 4
+
+
+def test_latency_per_key():
+    # ペイロードの小さいエンドポイントの応答を基準に大きいものを比較しない
+    concurrency = AdaptiveConcurrency(
+        min_limit=1, max_limit=8, initial_limit=4, cooldown=0
+    )
+    observe(concurrency, True, 0.01, key="head", count=20)
+    observe(concurrency, True, 1.0, key="values", count=20)
+    assert concurrency.limit == 8
+    assert concurrency.get_latency("head") == pytest.approx(0.01)
+    assert concurrency.get_baseline("values") == pytest.approx(1.0)
+    assert concurrency.get_latency("other") is None
+
+
+def test_slow_latency_decreases():
+    concurrency = AdaptiveConcurrency(
+        min_limit=1, max_limit=16, initial_limit=16, cooldown=0
+    )
+    observe(concurrency, True, 0.1, count=5)
+    # 指数移動平均が基準の2倍を超えたら減らす
+    observe(concurrency, True, 1.0, count=5)
+    assert concurrency.limit < 16
+
+
+def test_baseline_recovers():
+    # 一時的に速かった応答の後も、基準が追従して同時実行数が回復する
+    concurrency = AdaptiveConcurrency(
+        min_limit=1, max_limit=8, initial_limit=8, cooldown=0
+    )
+    observe(concurrency, True, 0.01)
+    observe(concurrency, True, 0.1, count=3)
+    assert concurrency.limit == 1
+
+    observe(concurrency, True, 0.1, count=100)
+    assert concurrency.get_baseline() == pytest.approx(0.1, rel=0.1)
+    assert concurrency.limit == 8
+
+
+def test_invalid_limit():
+    with pytest.raises(ValueError):
+        AdaptiveConcurrency(min_limit=0)
+    with pytest.raises(ValueError):
+        AdaptiveConcurrency(min_limit=4, max_limit=2)
+    with pytest.raises(ValueError):
+        AdaptiveConcurrency(decrease_factor=1.0)
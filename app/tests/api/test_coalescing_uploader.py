@@ -0,0 +1,188 @@
+import json
+import threading
+import time
+
+import pytest
+
+from app.api.ix.coalescing_uploader import CoalescingUploader
+
+
+class FakeApi:
+    """送信したリクエストを記録する"""
+
+    def __init__(self, fail_endpoints=(), error_endpoints=()):
+        self.requests = []
+        self.completed = []
+        self.fail_endpoints = set(fail_endpoints)
+        self.error_endpoints = set(error_endpoints)
+        self.sent = threading.Event()
+
+    def send(self, endpoint, rows):
+        self.requests.append(
+            (
+                endpoint,
+                [(key, json.loads(encoded)) for key, encoded in rows],
+            )
+        )
+        self.sent.set()
+        if endpoint in self.error_endpoints:
+            raise ValueError("送信エラー")
+        return endpoint not in self.fail_endpoints
+
+    def on_complete(self, head_item_key, is_ok):
+        self.completed.append((head_item_key, is_ok))
+
+
+def make_uploader(api, **kwargs):
+    kwargs.setdefault("max_delay", 60)
+    return CoalescingUploader(api.send, api.on_complete, **kwargs)
+
+
+def rows(count, size=1):
+    return [{"value": "x" * size} for _ in range(count)]
+
+
+def test_max_rows():
+    api = FakeApi()
+    with make_uploader(api, max_rows=3) as uploader:
+        uploader.add("a", "label_values", rows(7))
+        # 3行ごとに送信し、残りの1行はバッファに保持する
+        assert [len(sent) for _, sent in api.requests] == [3, 3]
+        uploader.flush()
+    assert [len(sent) for _, sent in api.requests] == [3, 3, 1]
+    assert uploader.request_count == 3
+
+
+def test_max_bytes():
+    api = FakeApi()
+    # 1行は{"value":"xxxxxxxxxx"} (22バイト) + 区切りの1バイト
+    with make_uploader(api, max_bytes=50) as uploader:
+        uploader.add("a", "label_values", rows(5, size=10))
+        assert [len(sent) for _, sent in api.requests] == [2, 2]
+    assert [len(sent) for _, sent in api.requests] == [2, 2, 1]
+
+
+def test_coalesce_heads():
+    # 複数のXBRLファイルの行をエンドポイントごとにまとめる
+    api = FakeApi()
+    with make_uploader(api) as uploader:
+        for key in ["a", "b", "c"]:
+            uploader.add(key, "label_values", rows(2))
+            uploader.add(key, "label_arcs", rows(1))
+            uploader.seal(key)
+        assert api.requests == []
+        assert api.completed == []
+    assert uploader.request_count == 2
+    endpoints = {endpoint: sent for endpoint, sent in api.requests}
+    assert [key for key, _ in endpoints["label_values"]] == [
+        "a",
+        "a",
+        "b",
+        "b",
+        "c",
+        "c",
+    ]
+    assert sorted(api.completed) == [("a", True), ("b", True), ("c", True)]
+    assert uploader.pending_heads == []
+
+
+def test_max_delay_without_calls():
+    # addやsealを呼び出さなくても、保持時間の上限で送信する
+    api = FakeApi()
+    with make_uploader(api, max_delay=0.1) as uploader:
+        uploader.add("a", "label_values", rows(2))
+        uploader.seal("a")
+        assert api.requests == []
+        assert api.sent.wait(5)
+        deadline = time.monotonic() + 5
+        while api.completed == [] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert api.completed == [("a", True)]
+        assert [len(sent) for _, sent in api.requests] == [2]
+
+
+def test_complete_after_seal():
+    # sealするまでは、全ての行を送信しても完了を通知しない
+    api = FakeApi()
+    with make_uploader(api, max_rows=2) as uploader:
+        uploader.add("a", "label_values", rows(2))
+        uploader.add("a", "label_values", rows(1))
+        assert api.completed == []
+        uploader.flush()
+        assert api.completed == []
+        uploader.seal("a")
+        assert api.completed == [("a", True)]
+        # 行のないXBRLファイルはsealで完了する
+        uploader.seal("b")
+        assert api.completed == [("a", True), ("b", True)]
+
+
+@pytest.mark.parametrize(
+    "api",
+    [
+        FakeApi(fail_endpoints=["label_arcs"]),
+        FakeApi(error_endpoints=["label_arcs"]),
+    ],
+    ids=["failed", "raised"],
+)
+def test_failure(api):
+    with make_uploader(api) as uploader:
+        uploader.add("a", "label_values", rows(1))
+        uploader.add("a", "label_arcs", rows(1))
+        uploader.seal("a")
+        uploader.add("b", "label_values", rows(1))
+        uploader.seal("b")
+    # 失敗したエンドポイントの行を含むXBRLファイルのみ失敗とする
+    assert sorted(api.completed) == [("a", False), ("b", True)]
+    assert uploader.pending_heads == []
+
+
+def test_send_without_lock():
+    # 送信中もaddとsealはロックを待たずに戻る
+    api = FakeApi()
+    started = threading.Event()
+    release = threading.Event()
+
+    def send(endpoint, rows):
+        if endpoint == "label_values":
+            started.set()
+            release.wait(5)
+        return api.send(endpoint, rows)
+
+    with CoalescingUploader(
+        send, api.on_complete, max_delay=0.05
+    ) as uploader:
+        uploader.add("a", "label_values", rows(1))
+        uploader.seal("a")
+        assert started.wait(5)
+        uploader.add("b", "label_arcs", rows(1))
+        uploader.seal("b")
+        assert uploader.pending_heads == ["a", "b"]
+        release.set()
+    assert sorted(api.completed) == [("a", True), ("b", True)]
+
+
+@pytest.mark.parametrize("max_delay", [60, 0.05], ids=["main", "timer"])
+def test_on_complete_error(max_delay, capsys):
+    # on_completeの例外はどちらのスレッドでも表示して続行する
+    api = FakeApi()
+    completed = []
+
+    def on_complete(head_item_key, is_ok):
+        completed.append(head_item_key)
+        if head_item_key == "a":
+            raise ValueError("通知エラー")
+
+    with CoalescingUploader(
+        api.send, on_complete, max_delay=max_delay
+    ) as uploader:
+        for key in ["a", "b"]:
+            uploader.add(key, "label_values", rows(1))
+            uploader.seal(key)
+        uploader.flush()
+        deadline = time.monotonic() + 5
+        while len(completed) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    assert completed == ["a", "b"]
+    assert uploader.pending_heads == []
+    assert "通知エラー" in capsys.readouterr().out
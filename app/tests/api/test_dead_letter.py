@@ -0,0 +1,64 @@
+import pytest
+
+from app.api.ix import DeadLetterQueue
+
+
+@pytest.fixture
+def dead_letter(tmp_path):
+    return DeadLetterQueue((tmp_path / "dead_letters").as_posix())
+
+
+def test_put_load(dead_letter):
+    rows = [{"label": "売上高"}]
+    path = dead_letter.put(
+        "label_values", rows, head_item_key="head_a", task_id="3:a:0"
+    )
+    encoded = dead_letter.put("label_values", b'[{"label":"a"}]')
+
+    assert dead_letter.entries() == [path, encoded]
+    meta, data = dead_letter.load(path)
+    assert meta["endpoint"] == "label_values"
+    assert meta["head_item_key"] == "head_a"
+    assert meta["task_id"] == "3:a:0"
+    assert data == rows
+    assert dead_letter.load(encoded)[1] == [{"label": "a"}]
+
+    dead_letter.remove(path)
+    assert dead_letter.entries() == [encoded]
+
+
+def test_discard_task(dead_letter):
+    dead_letter.put("label_values", [], head_item_key="a", task_id="1:x:0")
+    kept = dead_letter.put(
+        "label_values", [], head_item_key="a", task_id="1:x:1"
+    )
+    other = dead_letter.put(
+        "label_values", [], head_item_key="b", task_id="1:x:0"
+    )
+
+    # 同じXBRLファイルの同じタスクのみ削除する
+    assert dead_letter.discard("a", "1:x:0") == 1
+    assert dead_letter.entries() == [kept, other]
+    assert dead_letter.discard("a", "1:x:0") == 0
+
+
+def test_discard_head(dead_letter):
+    dead_letter.put("label_values", [], head_item_key="a", task_id="1:x:0")
+    dead_letter.put("label_arcs", [], head_item_key="a")
+    other = dead_letter.put("label_arcs", [], head_item_key="b")
+
+    assert dead_letter.discard("a") == 2
+    assert dead_letter.entries() == [other]
+
+
+def test_discard_existing_files(dead_letter):
+    # 以前の実行で保存したファイルも削除できる
+    dead_letter.put("label_values", [], head_item_key="a", task_id="1:x:0")
+    reopened = DeadLetterQueue(dead_letter.directory)
+    assert reopened.discard("a", "1:x:0") == 1
+    assert len(reopened) == 0
+
+    # 索引を作成した後に保存したファイルも削除できる
+    reopened.put("label_values", [], head_item_key="a", task_id="1:x:0")
+    assert reopened.discard("a") == 1
+    assert len(reopened) == 0
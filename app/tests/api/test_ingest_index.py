@@ -0,0 +1,149 @@
+import os
+
+import pytest
+
+import app.api.ix.ingest_index as ingest_index_module
+from app.api.ix import IngestIndex
+
+
+@pytest.fixture
+def index(tmp_path):
+    with IngestIndex(
+        (tmp_path / "index" / "ingest.sqlite3").as_posix()
+    ) as index:
+        yield index
+
+
+@pytest.fixture
+def zip_path(tmp_path):
+    zip_path = tmp_path / "081220240510412345.zip"
+    zip_path.write_bytes(b"zip content")
+    return zip_path.as_posix()
+
+
+@pytest.fixture
+def hash_calls(monkeypatch):
+    """file_hashの呼び出しを記録する"""
+    calls = []
+    file_hash = ingest_index_module.file_hash
+
+    def counting_hash(file_path):
+        calls.append(file_path)
+        return file_hash(file_path)
+
+    monkeypatch.setattr(ingest_index_module, "file_hash", counting_hash)
+    return calls
+
+
+def set_mtime(zip_path, mtime_ns):
+    os.utime(zip_path, ns=(mtime_ns, mtime_ns))
+
+
+def test_mark_head(index, zip_path):
+    assert not index.has_head("head_a")
+    index.mark_head("head_a", zip_path)
+    index.mark_head("head_b")
+
+    assert index.has_head("head_a")
+    assert index.has_head("head_a", zip_path)
+    # zipファイルを指定せずに記録した場合は、zipファイルを指定しない
+    # 確認のみ挿入済みとする
+    assert index.has_head("head_b")
+    assert not index.has_head("head_b", zip_path)
+    assert sorted(index.head_item_keys()) == ["head_a", "head_b"]
+    assert len(index) == 2
+
+
+def test_has_head_fast_path(index, zip_path, hash_calls):
+    index.mark_head("head_a", zip_path)
+    hash_calls.clear()
+
+    # サイズと更新日時が一致する場合は内容を読まない
+    assert index.has_head("head_a", zip_path)
+    assert hash_calls == []
+
+
+def test_has_head_hash_fallback(index, zip_path, hash_calls):
+    set_mtime(zip_path, 1_000_000_000)
+    index.mark_head("head_a", zip_path)
+    hash_calls.clear()
+
+    # 更新日時のみ異なる場合は内容のハッシュで比較し、更新日時を記録する
+    set_mtime(zip_path, 2_000_000_000)
+    assert index.has_head("head_a", zip_path)
+    assert hash_calls == [zip_path]
+    assert index.has_head("head_a", zip_path)
+    assert hash_calls == [zip_path]
+
+    # 同じサイズで内容が異なる場合は挿入済みとしない
+    with open(zip_path, "wb") as f:
+        f.write(b"zip CONTENT")
+    set_mtime(zip_path, 3_000_000_000)
+    assert not index.has_head("head_a", zip_path)
+
+
+def test_has_head_size_changed(index, zip_path, hash_calls):
+    index.mark_head("head_a", zip_path)
+    hash_calls.clear()
+
+    # サイズが異なる場合はハッシュを計算せずに挿入済みとしない
+    with open(zip_path, "ab") as f:
+        f.write(b" appended")
+    assert not index.has_head("head_a", zip_path)
+    assert hash_calls == []
+
+
+def test_source_files(index):
+    index.mark_source_files({"lab_a": "hash_a", "lab_b": None}, "head_a")
+    index.mark_source_files({"lab_c": "hash_c"}, "head_b")
+
+    assert index.has_source_file("lab_a")
+    assert not index.has_source_file("lab_x")
+    assert sorted(index.source_file_ids()) == ["lab_a", "lab_b", "lab_c"]
+
+
+def test_remove_head(index, zip_path):
+    index.mark_head("head_a", zip_path)
+    index.mark_head("head_b")
+    index.mark_source_files({"lab_a": "hash_a"}, "head_a")
+    index.mark_source_files({"lab_b": "hash_b"}, "head_b")
+
+    # XBRLファイルとともに、そのソースファイルの記録を削除する
+    index.remove_head("head_a")
+    assert not index.has_head("head_a", zip_path)
+    assert index.head_item_keys() == ["head_b"]
+    assert index.source_file_ids() == ["lab_b"]
+
+
+def test_reconcile(index):
+    for head_item_key in ["head_a", "head_b", "head_c"]:
+        index.mark_head(head_item_key)
+    index.mark_source_files({"lab_b": "hash_b"}, "head_b")
+    checked = []
+
+    def is_active_head(head_item_key):
+        checked.append(head_item_key)
+        return head_item_key != "head_b"
+
+    # APIで有効になっていないものの記録を削除する
+    assert index.reconcile(is_active_head) == ["head_b"]
+    assert sorted(checked) == ["head_a", "head_b", "head_c"]
+    assert sorted(index.head_item_keys()) == ["head_a", "head_c"]
+    assert index.source_file_ids() == []
+
+    # 照合するキーを指定した場合はそのキーのみ確認する
+    checked.clear()
+    assert index.reconcile(lambda key: False, ["head_c"]) == ["head_c"]
+    assert index.head_item_keys() == ["head_a"]
+
+
+def test_persistent(tmp_path, zip_path):
+    db_path = (tmp_path / "ingest.sqlite3").as_posix()
+    with IngestIndex(db_path) as index:
+        index.mark_head("head_a", zip_path)
+        index.mark_source_files({"lab_a": "hash_a"}, "head_a")
+
+    # 再実行時は記録を読み込む
+    with IngestIndex(db_path) as index:
+        assert index.has_head("head_a", zip_path)
+        assert index.source_file_ids() == ["lab_a"]
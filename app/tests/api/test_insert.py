@@ -0,0 +1,553 @@
+import copy
+import gzip
+import json
+import os
+import threading
+import time
+import zipfile
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests
+
+import app.api.ix.insert as insert_module
+from app.api import endpoints as ep
+from app.api.ix import DeadLetterQueue, Insert, RunJournal
+from app.api.ix.exceptions import ApiInsertionException
+
+PREFIX = "/api/v1"
+
+
+class ApiStub:
+    """受信したリクエストを記録し、パスごとのステータスコードを返すAPI"""
+
+    def __init__(self):
+        self.requests = []
+        # パス -> ステータスコード(リストの場合は先頭から順に返す)
+        self.statuses = {}
+        self.active_heads = set()
+        self.lock = threading.Lock()
+
+    def status(self, path):
+        with self.lock:
+            status = self.statuses.get(path, 200)
+            if isinstance(status, list):
+                return status.pop(0) if len(status) > 1 else status[0]
+            return status
+
+    def paths(self, method=None):
+        return [
+            request["path"]
+            for request in self.requests
+            if method is None or request["method"] == method
+        ]
+
+
+@pytest.fixture
+def api_server():
+    stub = ApiStub()
+
+    class Handler(BaseHTTPRequestHandler):
+        def handle_request(self, method):
+            url = urlparse(self.path)
+            length = int(self.headers.get("Content-Length") or 0)
+            request = {
+                "method": method,
+                "path": url.path,
+                "query": parse_qs(url.query),
+                "headers": dict(self.headers),
+                "body": self.rfile.read(length),
+            }
+            with stub.lock:
+                stub.requests.append(request)
+            body = b""
+            if url.path == PREFIX + ep.IS_ACTIVE_HEAD:
+                head_item_key = request["query"]["head_item_key"][0]
+                body = json.dumps(
+                    head_item_key in stub.active_heads
+                ).encode()
+            elif url.path == PREFIX + ep.IS_EXITS_SOURCE_FILE_ID:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(stub.status(url.path))
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            self.handle_request("GET")
+
+        def do_POST(self):
+            self.handle_request("POST")
+
+        def do_PATCH(self):
+            self.handle_request("PATCH")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    stub.url = f"http://127.0.0.1:{server.server_port}"
+    yield stub
+    server.shutdown()
+    server.server_close()
+
+
+class FakeModel:
+    """zipファイル名ごとに指定したアイテムを返すXBRLModelの代わり"""
+
+    results = {}
+    """ zipファイル名 -> アイテム、または解析時に送出する例外 """
+
+    def __init__(self, zip_path, output_path, **kwargs):
+        self.name = Path(zip_path).name
+        result = self.results[self.name]
+        if result == "exit":
+            # ワーカープロセスの異常終了
+            os._exit(1)
+        if isinstance(result, Exception):
+            raise result
+        if isinstance(result, tuple):
+            # (アイテム, 解析にかかる秒数)
+            result, delay = result
+            time.sleep(delay)
+        self.items = copy.deepcopy(result)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+    def get_all_items(self, deferred=False):
+        return self.items
+
+    def __str__(self):
+        return self.name
+
+
+@pytest.fixture
+def fake_model(monkeypatch, tmp_path):
+    """XBRLModelを置き換え、zipファイルを作成する関数を返す"""
+    monkeypatch.setattr(insert_module, "XBRLModel", FakeModel)
+    monkeypatch.setattr(FakeModel, "results", {})
+    xbrl_dir = tmp_path / "xbrl"
+    xbrl_dir.mkdir()
+
+    def add_zip(name, result):
+        FakeModel.results[name] = result
+        (xbrl_dir / name).write_bytes(name.encode())
+        return xbrl_dir / name
+
+    add_zip.dir = xbrl_dir
+    return add_zip
+
+
+def read_events(journal_path):
+    with open(journal_path, "rb") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {},
+        {"workers": 2},
+        {"workers": 2, "pipeline": True},
+        {"coalesce": True},
+    ],
+    ids=["serial", "parallel", "pipeline", "coalesce"],
+)
+def test_insert_xbrl_dir_records_failure(api_server, tmp_path, options):
+    # ixbrlファイルを含まないzipファイルは解析に失敗する
+    xbrl_dir = tmp_path / "xbrl"
+    xbrl_dir.mkdir()
+    for name in ["a.zip", "b.zip"]:
+        with zipfile.ZipFile(xbrl_dir / name, "w") as zf:
+            zf.writestr("XBRLData/readme.txt", "")
+    journal_path = (tmp_path / "run.journal.jsonl").as_posix()
+    journal = RunJournal(journal_path, params=Insert.journal_params())
+
+    with Insert(
+        tmp_path.as_posix(), api_server.url, journal=journal
+    ) as insert:
+        with pytest.raises(ApiInsertionException):
+            insert.insert_xbrl_dir(xbrl_dir.as_posix(), **options)
+    journal.close()
+
+    # 失敗したzipファイルを記録し、ディレクトリは完了として記録しない
+    events = read_events(journal_path)
+    failed = [e["zip"] for e in events if e["event"] == "zip_failed"]
+    assert sorted(failed) == sorted(
+        (xbrl_dir / name).as_posix() for name in ["a.zip", "b.zip"]
+    )
+    assert "dir_done" not in [e["event"] for e in events]
+    with RunJournal(
+        journal_path, resume=True, params=Insert.journal_params()
+    ) as resumed:
+        assert not resumed.is_dir_done(xbrl_dir.as_posix(), 2)
+
+
+def make_items():
+    """ヘッダー情報と2つのソースファイルのラベルを含むアイテム"""
+    return [
+        {"key": "ix_file_path", "item": {"path": "a.zip"}},
+        {"id": "head", "key": "ix_head_title", "item": [{"title": "a"}]},
+        {
+            "id": "lab_a",
+            "key": "lab_link_values",
+            "item": [{"label": "売上高"}, {"label": "利益"}],
+        },
+        {
+            "id": "lab_b",
+            "key": "lab_link_values",
+            "item": [{"label": "資産"}],
+        },
+        {"id": "lab_b", "key": "lab_link_locs", "item": [{"loc": "b"}]},
+    ]
+
+
+def test_task_ids_do_not_depend_on_position(api_server, tmp_path):
+    with Insert(
+        tmp_path.as_posix(), api_server.url, chunk_rows=1
+    ) as insert:
+        build = insert._Insert__build_upload_tasks
+        items = make_items()
+        task_ids = [task[0] for task in build(items)]
+        assert task_ids == [
+            "lab_a:lab_link_values:0",
+            "lab_a:lab_link_values:1",
+            "lab_b:lab_link_values:0",
+            "lab_b:lab_link_locs:0",
+        ]
+        # アイテムの順序が変わっても同じチャンクは同じIDになる
+        reordered = [item[0] for item in sorted(build(items[::-1]))]
+        assert reordered == sorted(task_ids)
+        # 同じソースファイルとキーのアイテムは出現順で区別する
+        duplicated = build(items + [items[-1]])
+        assert duplicated[-1][0] == "lab_b:lab_link_locs#1:0"
+
+
+def test_resume_after_items_reordered(api_server, tmp_path):
+    journal_path = (tmp_path / "run.journal.jsonl").as_posix()
+    values_path = PREFIX + ep.POST_LABEL_VALUES
+    api_server.statuses[values_path] = 400
+
+    def upload(items, resume):
+        journal = RunJournal(
+            journal_path, resume=resume, params=Insert.journal_params()
+        )
+        with journal, Insert(
+            tmp_path.as_posix(), api_server.url, journal=journal
+        ) as insert:
+            return insert._Insert__insert_api_push(items, "head_a")
+
+    assert not upload(make_items(), resume=False)
+    api_server.requests.clear()
+    api_server.statuses[values_path] = 200
+
+    # 前回の実行で成功したタスクは、位置が変わっても再送信しない
+    assert upload(make_items()[::-1], resume=True)
+    assert api_server.paths("POST") == [values_path, values_path]
+
+
+def test_activation_failure(api_server, tmp_path):
+    active_path = PREFIX + ep.UPDATE_HEAD_ACTIVE
+    api_server.statuses[active_path] = 400
+    with Insert(tmp_path.as_posix(), api_server.url) as insert:
+        assert not insert._Insert__insert_api_push(make_items(), "head_a")
+    # 有効にできなかった場合は生成済みに更新しない
+    assert api_server.paths("PATCH") == [active_path]
+
+    api_server.requests.clear()
+    api_server.statuses[active_path] = 204
+    with Insert(tmp_path.as_posix(), api_server.url) as insert:
+        assert insert._Insert__insert_api_push(make_items(), "head_a")
+    assert api_server.paths("PATCH") == [
+        active_path,
+        PREFIX + ep.UPDATE_HEAD_GENERATE,
+    ]
+
+
+def test_replay_activation_failure(api_server, tmp_path):
+    active_path = PREFIX + ep.UPDATE_HEAD_ACTIVE
+    dead_letter = DeadLetterQueue((tmp_path / "dead_letters").as_posix())
+    journal = RunJournal(
+        (tmp_path / "run.journal.jsonl").as_posix(),
+        params=Insert.journal_params(),
+    )
+
+    def replay(task_id):
+        dead_letter.put(
+            "label_values",
+            [{"label": "売上高"}],
+            head_item_key="head_a",
+            task_id=task_id,
+        )
+        with Insert(
+            tmp_path.as_posix(),
+            api_server.url,
+            journal=journal,
+            dead_letter=dead_letter,
+        ) as insert:
+            return insert.replay_dead_letters()
+
+    api_server.statuses[active_path] = 400
+    assert replay("lab_a:lab_link_values:0") == {
+        "replayed": 1,
+        "failed": 0,
+        "skipped": 0,
+    }
+    # 有効にできなかったXBRLファイルは完了として記録しない
+    assert not journal.is_zip_done("head_a")
+    assert PREFIX + ep.POST_TITLE_SUMMARY not in api_server.paths()
+
+    api_server.statuses[active_path] = 200
+    assert replay("lab_a:lab_link_values:1") == {
+        "replayed": 1,
+        "failed": 0,
+        "skipped": 0,
+    }
+    assert journal.is_zip_done("head_a")
+    journal.close()
+
+
+def test_coalesced_failure_dead_letters(api_server, fake_model, tmp_path):
+    values_path = PREFIX + ep.POST_LABEL_VALUES
+    api_server.statuses[values_path] = 400
+    for name in ["a.zip", "b.zip"]:
+        fake_model(name, make_items())
+    dead_letter = DeadLetterQueue((tmp_path / "dead_letters").as_posix())
+    journal_path = (tmp_path / "run.journal.jsonl").as_posix()
+
+    def insert_dir(resume):
+        journal = RunJournal(
+            journal_path, resume=resume, params=Insert.journal_params()
+        )
+        with journal, Insert(
+            tmp_path.as_posix(),
+            api_server.url,
+            journal=journal,
+            dead_letter=dead_letter,
+        ) as insert:
+            insert.insert_xbrl_dir(
+                fake_model.dir.as_posix(), coalesce=True
+            )
+
+    with pytest.raises(ApiInsertionException):
+        insert_dir(resume=False)
+    # まとめて送信した行は1リクエストで、XBRLファイルごとに保存する
+    assert api_server.paths("POST").count(values_path) == 1
+    entries = [dead_letter.load(path) for path in dead_letter.entries()]
+    assert len(entries) == 2
+    task_ids = {meta["task_id"] for meta, _ in entries}
+    assert len(task_ids) == 1
+    assert task_ids.pop().startswith("label_values:")
+    assert all(
+        data == [{"label": "売上高"}, {"label": "利益"}, {"label": "資産"}]
+        for _, data in entries
+    )
+    events = read_events(journal_path)
+    assert [e["ok"] for e in events if e["event"] == "task"].count(
+        False
+    ) == 2
+    assert "dir_done" not in [e["event"] for e in events]
+
+    # 後の実行で送信できた場合は、同じ行のデッドレターを削除する
+    api_server.statuses[values_path] = 200
+    insert_dir(resume=True)
+    assert dead_letter.entries() == []
+    assert "dir_done" in [e["event"] for e in read_events(journal_path)]
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_post_data(api_server, tmp_path, compress):
+    rows = [{"label": "売上高", "value": Decimal("1.5")}]
+    with Insert(
+        tmp_path.as_posix(), api_server.url, compress=compress
+    ) as insert:
+        assert insert.label_values(rows).status_code == 200
+        # エンコード済みのJSON配列は再度エンコードせずに包む
+        insert.label_values(b'[{"label":"a"}]')
+
+    headers = [request["headers"] for request in api_server.requests]
+    bodies = [request["body"] for request in api_server.requests]
+    assert all(h["Content-Type"] == "application/json" for h in headers)
+    if compress:
+        assert all(h["Content-Encoding"] == "gzip" for h in headers)
+        bodies = [gzip.decompress(body) for body in bodies]
+    else:
+        assert all("Content-Encoding" not in h for h in headers)
+    assert json.loads(bodies[0]) == {
+        "data": [{"label": "売上高", "value": 1.5}]
+    }
+    assert bodies[1] == b'{"data":[{"label":"a"}]}'
+
+
+def test_upload_chunks(api_server, tmp_path):
+    values_path = PREFIX + ep.POST_LABEL_VALUES
+    with Insert(
+        tmp_path.as_posix(), api_server.url, chunk_rows=1
+    ) as insert:
+        assert insert._Insert__insert_api_push(make_items(), "head_a")
+
+    # 行数の上限で分割したチャンクを{"data": [...]}で送信する
+    bodies = [
+        json.loads(request["body"])
+        for request in api_server.requests
+        if request["path"] == values_path
+    ]
+    labels = sorted(
+        row["label"] for body in bodies for row in body["data"]
+    )
+    assert labels == sorted(["売上高", "利益", "資産"])
+    assert [len(body["data"]) for body in bodies] == [1, 1, 1]
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """再試行の待機時間(上限)を記録し、待機しない"""
+    delays = []
+    monkeypatch.setattr(insert_module.random, "uniform", lambda a, b: b)
+    monkeypatch.setattr(insert_module.time, "sleep", delays.append)
+    return delays
+
+
+@pytest.mark.parametrize(
+    "statuses, count, status_code",
+    [
+        ([503, 429, 200], 3, 200),
+        ([500], 4, 500),
+        ([408, 502, 504, 200], 4, 200),
+        ([400], 1, 400),
+        ([404, 200], 1, 404),
+    ],
+    ids=["recover", "limit", "retry-codes", "client-error", "no-retry"],
+)
+def test_send_retry(
+    api_server, tmp_path, sleeps, statuses, count, status_code
+):
+    values_path = PREFIX + ep.POST_LABEL_VALUES
+    api_server.statuses[values_path] = statuses
+    with Insert(
+        tmp_path.as_posix(),
+        api_server.url,
+        retries=3,
+        backoff=1.0,
+        backoff_max=3.0,
+    ) as insert:
+        response = insert.label_values([{"label": "a"}])
+
+    # RETRY_STATUS_CODESのみretries回まで再試行する
+    assert response.status_code == status_code
+    assert api_server.paths().count(values_path) == count
+    # 待機時間は再試行ごとに2倍で、backoff_maxを超えない
+    assert sleeps == [1.0, 2.0, 3.0][: count - 1]
+
+
+def test_send_retry_connection_error(tmp_path, sleeps):
+    # 接続できない場合は再試行した後に例外を送出する
+    with Insert(
+        tmp_path.as_posix(), "http://127.0.0.1:9", retries=2
+    ) as insert:
+        with pytest.raises(requests.ConnectionError):
+            insert.label_values([{"label": "a"}])
+    assert len(sleeps) == 2
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        requests.ConnectionError("接続エラー"),
+        ValueError("エンコードエラー"),
+    ],
+    ids=["request", "other"],
+)
+def test_upload_headers_error(api_server, tmp_path, monkeypatch, error):
+    dead_letter = DeadLetterQueue((tmp_path / "dead_letters").as_posix())
+    with Insert(
+        tmp_path.as_posix(), api_server.url, dead_letter=dead_letter
+    ) as insert:
+
+        def ix_head_titles(data):
+            raise error
+
+        monkeypatch.setattr(insert, "ix_head_titles", ix_head_titles)
+        # 例外の種類によらず失敗として記録し、他のタスクは送信する
+        assert not insert._Insert__insert_api_push(make_items(), "head_a")
+
+    assert PREFIX + ep.POST_FILE_PATH in api_server.paths("POST")
+    assert PREFIX + ep.POST_LABEL_VALUES in api_server.paths("POST")
+    assert PREFIX + ep.UPDATE_HEAD_ACTIVE not in api_server.paths()
+    (path,) = dead_letter.entries()
+    meta, data = dead_letter.load(path)
+    assert meta["endpoint"] == "ix_head_titles"
+    assert meta["task_id"] == "head:ix_head_title"
+    assert str(error) in meta["error"]
+    assert data == [{"title": "a"}]
+
+
+def head_items(name):
+    """タイトルにzipファイル名を含むアイテム"""
+    items = make_items()
+    items[1]["item"] = [{"title": name}]
+    return items
+
+
+def inserted_titles(api_server):
+    return [
+        row["title"]
+        for request in api_server.requests
+        if request["path"] == PREFIX + ep.POST_HEAD_TITLES
+        for row in json.loads(request["body"])["data"]
+    ]
+
+
+def test_parallel_order(api_server, fake_model, tmp_path):
+    names = [f"{index}.zip" for index in range(6)]
+    for name in names:
+        fake_model(name, head_items(name))
+    zip_names = [path.name for path in fake_model.dir.rglob("*.zip")]
+    # 先頭のファイルの解析に最も時間がかかる
+    FakeModel.results[zip_names[0]] = (head_items(zip_names[0]), 0.5)
+
+    with Insert(tmp_path.as_posix(), api_server.url) as insert:
+        insert.insert_xbrl_dir(fake_model.dir.as_posix(), workers=3)
+
+    # 解析の終了順によらず、ファイル順に挿入する
+    assert inserted_titles(api_server) == zip_names
+
+
+@pytest.mark.parametrize("failure", ["exit", RuntimeError("解析エラー")])
+def test_parallel_failed_worker(api_server, fake_model, tmp_path, failure):
+    names = [f"{index}.zip" for index in range(5)]
+    for name in names:
+        fake_model(name, head_items(name))
+    zip_names = [path.name for path in fake_model.dir.rglob("*.zip")]
+    # 失敗するファイルの結果を最初に待つ
+    FakeModel.results[zip_names[0]] = failure
+    journal_path = (tmp_path / "run.journal.jsonl").as_posix()
+    journal = RunJournal(journal_path, params=Insert.journal_params())
+
+    with journal, Insert(
+        tmp_path.as_posix(), api_server.url, journal=journal
+    ) as insert:
+        insert.insert_xbrl_dir(fake_model.dir.as_posix(), workers=2)
+
+    # 失敗したファイルのみ失敗として記録し、他のファイルは挿入する
+    assert inserted_titles(api_server) == zip_names[1:]
+    events = read_events(journal_path)
+    failed = [e["zip"] for e in events if e["event"] == "zip_failed"]
+    assert failed == [(fake_model.dir / zip_names[0]).as_posix()]
+    done = [e["zip"] for e in events if e["event"] == "zip_done"]
+    assert done == [
+        (fake_model.dir / name).as_posix() for name in zip_names[1:]
+    ]
+    assert "dir_done" not in [e["event"] for e in events]
@@ -0,0 +1,153 @@
+import threading
+import time
+
+import pytest
+
+from app.api.ix import IngestPipeline, PipelineStage
+
+
+def run_with_timeout(pipeline, jobs, timeout=10):
+    """パイプラインを別スレッドで実行し、終了しない場合は失敗とする"""
+    result = {}
+
+    def target():
+        result["output"] = pipeline.run(jobs)
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "パイプラインが終了しませんでした"
+    return result["output"]
+
+
+def test_run():
+    pipeline = IngestPipeline(
+        [
+            PipelineStage("double", lambda x: x * 2, workers=3),
+            PipelineStage("inc", lambda x: x + 1, workers=2),
+        ]
+    )
+    result = run_with_timeout(pipeline, range(100))
+
+    assert sorted(result) == [x * 2 + 1 for x in range(100)]
+    assert pipeline.stats["double"]["processed"] == 100
+    assert pipeline.stats["inc"]["processed"] == 100
+
+
+def test_drop():
+    pipeline = IngestPipeline(
+        [
+            PipelineStage("odd", lambda x: x if x % 2 else None),
+            PipelineStage("inc", lambda x: x + 1),
+        ]
+    )
+    result = run_with_timeout(pipeline, range(10))
+
+    assert sorted(result) == [2, 4, 6, 8, 10]
+    assert pipeline.stats["odd"]["dropped"] == 5
+    assert pipeline.stats["inc"]["processed"] == 5
+
+
+def test_stop_propagates_with_many_workers():
+    # 前段のワーカーが全て終了してから後段に終了を伝える
+    def slow(x):
+        time.sleep(0.01 * (x % 3))
+        return x
+
+    pipeline = IngestPipeline(
+        [
+            PipelineStage("slow", slow, workers=4),
+            PipelineStage("pass", lambda x: x, workers=3),
+            PipelineStage("last", lambda x: x, workers=2),
+        ]
+    )
+    result = run_with_timeout(pipeline, range(30))
+
+    assert sorted(result) == list(range(30))
+
+
+def test_empty_jobs():
+    pipeline = IngestPipeline([PipelineStage("pass", lambda x: x)])
+
+    assert run_with_timeout(pipeline, []) == []
+
+
+def test_backpressure():
+    # 後段が止まっている間、処理中の件数はキューの上限までに制限される
+    release = threading.Event()
+    produced = []
+
+    def produce():
+        for i in range(20):
+            produced.append(i)
+            yield i
+
+    def blocked(x):
+        release.wait()
+        return x
+
+    pipeline = IngestPipeline(
+        [
+            PipelineStage("pass", lambda x: x, queue_size=1),
+            PipelineStage("blocked", blocked, queue_size=1),
+        ]
+    )
+    thread = threading.Thread(
+        target=pipeline.run, args=(produce(),), daemon=True
+    )
+    thread.start()
+    time.sleep(0.3)
+
+    # 入力キュー(1) + pass(1) + 後段のキュー(1) + blocked(1) + 待機中(1)
+    assert len(produced) <= 5
+    release.set()
+    thread.join(10)
+    assert not thread.is_alive()
+    assert len(produced) == 20
+
+
+def test_error():
+    errors = []
+
+    def fail_on_three(x):
+        if x == 3:
+            raise ValueError("three")
+        return x
+
+    pipeline = IngestPipeline(
+        [
+            PipelineStage("check", fail_on_three),
+            PipelineStage("pass", lambda x: x),
+        ],
+        on_error=lambda name, job, e: errors.append((name, job, str(e))),
+    )
+    result = run_with_timeout(pipeline, range(5))
+
+    assert sorted(result) == [0, 1, 2, 4]
+    assert errors == [("check", 3, "three")]
+    assert pipeline.stats["check"]["errors"] == 1
+
+
+def test_error_in_on_error():
+    # on_errorで例外が発生してもワーカーが止まらず、前段が待ち続けない
+    def fail(x):
+        raise ValueError(x)
+
+    def on_error(name, job, e):
+        raise RuntimeError("on_error")
+
+    pipeline = IngestPipeline(
+        [PipelineStage("fail", fail, workers=1, queue_size=1)],
+        on_error=on_error,
+    )
+    result = run_with_timeout(pipeline, range(20))
+
+    assert result == []
+    assert pipeline.stats["fail"]["errors"] == 20
+
+
+def test_invalid_stage():
+    with pytest.raises(ValueError):
+        PipelineStage("none", lambda x: x, workers=0)
+    with pytest.raises(ValueError):
+        IngestPipeline([])
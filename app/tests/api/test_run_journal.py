@@ -0,0 +1,127 @@
+import json
+
+import pytest
+
+from app.api.ix import Insert, RunJournal
+
+PARAMS = {"task_id_version": 1, "chunk_rows": 2000, "chunk_bytes": 1024}
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return (tmp_path / "run.journal.jsonl").as_posix()
+
+
+def write_run(journal_path, params=PARAMS):
+    with RunJournal(journal_path, params=params) as journal:
+        journal.mark_dir_done("dir_a", 2)
+        journal.mark_zip_done("head_a", "dir_a/a.zip")
+        journal.mark_task("head_b", "0:ix_head_title", True, 200)
+        journal.mark_task("head_b", "3:lab_link_locs:0", True, 200)
+        journal.mark_task("head_b", "3:lab_link_locs:1", False, 500)
+        journal.mark_zip_failed("head_b", "dir_a/b.zip")
+
+
+def test_resume(journal_path):
+    write_run(journal_path)
+
+    with RunJournal(journal_path, resume=True, params=PARAMS) as journal:
+        assert journal.is_dir_done("dir_a", 2)
+        # zipファイルの数が変わった場合は完了済みとしない
+        assert not journal.is_dir_done("dir_a", 3)
+        assert journal.is_zip_done("head_a")
+        assert not journal.is_zip_done("head_b")
+        assert journal.is_task_done("head_b", "0:ix_head_title")
+        assert journal.is_task_done("head_b", "3:lab_link_locs:0")
+        # 失敗したタスクは再送信する
+        assert not journal.is_task_done("head_b", "3:lab_link_locs:1")
+
+
+def test_not_resume(journal_path):
+    write_run(journal_path)
+
+    # resume=Falseの場合はジャーナルを空にする
+    with RunJournal(journal_path, params=PARAMS) as journal:
+        assert not journal.is_dir_done("dir_a", 2)
+        assert not journal.is_zip_done("head_a")
+        assert not journal.is_task_done("head_b", "0:ix_head_title")
+
+    with open(journal_path, "rb") as f:
+        records = [json.loads(line) for line in f]
+    assert [record["event"] for record in records] == ["run_start"]
+    assert records[0]["params"] == PARAMS
+
+
+def test_resume_twice(journal_path):
+    write_run(journal_path)
+    with RunJournal(journal_path, resume=True, params=PARAMS) as journal:
+        journal.mark_task("head_b", "3:lab_link_locs:1", True, 200)
+        journal.mark_zip_done("head_b", "dir_a/b.zip")
+
+    with RunJournal(journal_path, resume=True, params=PARAMS) as journal:
+        assert journal.is_zip_done("head_a")
+        assert journal.is_zip_done("head_b")
+
+
+def test_params_changed(journal_path):
+    write_run(journal_path)
+    params = dict(PARAMS, chunk_rows=500)
+
+    # チャンクの分割が異なる実行のタスクは読み込まない
+    with RunJournal(journal_path, resume=True, params=params) as journal:
+        assert journal.params == params
+        assert not journal.is_task_done("head_b", "0:ix_head_title")
+        assert not journal.is_task_done("head_b", "3:lab_link_locs:0")
+        # XBRLファイルとディレクトリの完了は分割に依存しない
+        assert journal.is_dir_done("dir_a", 2)
+        assert journal.is_zip_done("head_a")
+        journal.mark_task("head_b", "3:lab_link_locs:0", True, 200)
+
+    # 元の分割に戻した場合は、その分割で記録したタスクのみ読み込む
+    with RunJournal(journal_path, resume=True, params=PARAMS) as journal:
+        assert journal.is_task_done("head_b", "0:ix_head_title")
+        assert journal.is_task_done("head_b", "3:lab_link_locs:0")
+
+
+def test_truncated_last_line(journal_path):
+    write_run(journal_path)
+    # 書き込み途中で中断した最終行
+    with open(journal_path, "ab") as f:
+        f.write(
+            b'{"event":"task","head_item_key":"head_b","task_id":"3:la'
+        )
+
+    params = dict(PARAMS, chunk_rows=500)
+    with RunJournal(journal_path, resume=True, params=params) as journal:
+        journal.mark_task("head_b", "3:lab_link_locs:2", True, 200)
+
+    with RunJournal(journal_path, resume=True, params=PARAMS) as journal:
+        assert journal.is_task_done("head_b", "3:lab_link_locs:0")
+        assert not journal.is_task_done("head_b", "3:lab_link_locs:1")
+        # 中断した行の後の実行の開始も読み込み、分割が異なるタスクは無視する
+        assert not journal.is_task_done("head_b", "3:lab_link_locs:2")
+
+
+def test_resume_missing_file(journal_path):
+    with RunJournal(journal_path, resume=True, params=PARAMS) as journal:
+        assert not journal.is_zip_done("head_a")
+        journal.mark_zip_done("head_a")
+
+    with RunJournal(journal_path, resume=True, params=PARAMS) as journal:
+        assert journal.is_zip_done("head_a")
+
+
+def test_insert_checks_params(journal_path, tmp_path):
+    output_path = tmp_path.as_posix()
+    params = Insert.journal_params(chunk_rows=500)
+    with RunJournal(journal_path, params=params) as journal:
+        with Insert(
+            output_path,
+            "http://localhost",
+            chunk_rows=500,
+            journal=journal,
+        ):
+            pass
+        # チャンクの分割が異なるInsertでは使用できない
+        with pytest.raises(ValueError):
+            Insert(output_path, "http://localhost", journal=journal)
@@ -35,6 +35,14 @@ def get_xbrl_zip_dir(get_current_path) -> Path:
     return xbrl_dir
 
 
+@pytest.fixture(scope="session")
+def get_taxonomy_dir(get_current_path) -> Path:
+    """リポジトリに格納されているタクソノミのディレクトリを取得"""
+
+    taxonomy_dir = get_current_path.parents[1] / "output" / "taxonomy"
+    return taxonomy_dir
+
+
 @pytest.fixture(scope="module")
 def get_xbrl_in_edjp(get_test_dir):
     """テスト用のXBRL(edjp)ファイルを取得"""
@@ -1,10 +1,20 @@
+import json
 import uuid
 
 import pytest
 from pandas import DataFrame
 
 from app.exception import XbrlDirectoryNotFoundError
-from app.ix_manager import BaseXbrlManager
+from app.ix_manager import (
+    BaseXbrlManager,
+    DefLinkManager,
+    FileManifest,
+    SchemaIndex,
+    SchemaManager,
+)
+from app.ix_manager.file_resolver import FileResolver
+from app.ix_tag import BaseTag, ColumnarResult
+from app.utils import Utils
 
 
 @pytest.fixture
@@ -141,3 +151,173 @@ def test_to_output_type(base_xbrl_manager):
     # テスト結果のアサーション
     assert isinstance(manager.to_DataFrame(), DataFrame)
     assert isinstance(manager.to_dict(), dict)
+
+
+XBRL_NAMESPACES = (
+    'xmlns:xsd="http://www.w3.org/2001/XMLSchema" '
+    'xmlns:link="http://www.xbrl.org/2003/linkbase" '
+    'xmlns:xlink="http://www.w3.org/1999/xlink"'
+)
+
+
+@pytest.fixture
+def schema_dir(tmp_path):
+    """linkbaseRefを持つxsdと定義リンクを配置したディレクトリ"""
+    base = "tse-acedjpsm-12345-20240510412345"
+    (tmp_path / f"{base}.xsd").write_text(
+        f"""<?xml version="1.0" encoding="UTF-8"?>
+<xsd:schema {XBRL_NAMESPACES}>
+<xsd:annotation><xsd:appinfo>
+<link:linkbaseRef xlink:type="simple" xlink:href="{base}-def.xml"
+ xlink:role="http://www.xbrl.org/2003/role/definitionLinkbaseRef"
+ xlink:arcrole="http://www.w3.org/1999/xlink/properties/linkbase"/>
+</xsd:appinfo></xsd:annotation>
+<xsd:element id="{base}_Sales" name="Sales"/>
+</xsd:schema>""",
+        encoding="utf-8",
+    )
+    (tmp_path / f"{base}-def.xml").write_text(
+        f"""<?xml version="1.0" encoding="UTF-8"?>
+<link:linkbase {XBRL_NAMESPACES}>
+<link:definitionLink xlink:type="extended" xlink:role="http://x/rol_BS">
+<link:loc xlink:type="locator" xlink:href="{base}.xsd#Sales"
+ xlink:label="Sales"/>
+</link:definitionLink>
+</link:linkbase>""",
+        encoding="utf-8",
+    )
+    return tmp_path
+
+
+def test_schema_index(schema_dir):
+    head_item_key = str(uuid.uuid4())
+    index = SchemaIndex(schema_dir, head_item_key=head_item_key)
+
+    assert len(index.parsers) == 1
+    df = index.related_files("definitionLinkbaseRef")
+    assert len(df) == 1
+    # 参照先はローカルパスに変換される
+    assert df.iloc[0]["xlink_href"].startswith(schema_dir.as_posix())
+    assert df.iloc[0]["xlink_arcrole"] == "linkbase"
+    assert len(index.related_files("labelLinkbaseRef")) == 0
+
+    # マネージャー間で索引とパーサーを共有する
+    def_manager = DefLinkManager(
+        schema_dir,
+        None,
+        head_item_key=head_item_key,
+        schema_index=index,
+    )
+    schema_manager = SchemaManager(
+        schema_dir, head_item_key=head_item_key, schema_index=index
+    )
+    assert def_manager.schema_index is index
+    assert len(def_manager.link_locs[0]) == 1
+    assert schema_manager.parsers is index.parsers
+    assert len(schema_manager.elements[0]) == 1
+
+
+def test_file_resolver():
+    files = [
+        "/tmp/a/XBRLData/Summary/tse-sm-def.xml",
+        "/tmp/a/XBRLData/Attachment/tse-fr-def.xml",
+        "/tmp/a/XBRLData/Attachment/sub/tse-fr-def.xml",
+    ]
+    resolver = FileResolver(files)
+
+    assert resolver.resolve("tse-sm-def.xml") == files[0]
+    # 同名のファイルは相対パスで区別する
+    assert resolver.resolve("./Attachment/tse-fr-def.xml") == files[1]
+    assert resolver.resolve("../sub/tse-fr-def.xml") == files[2]
+    assert resolver.resolve("missing-def.xml") is None
+    assert resolver.resolve("http://example.com/tse-sm-def.xml") is None
+    assert resolver.resolve_or_self("missing-def.xml") == "missing-def.xml"
+
+
+def test_file_manifest(schema_dir):
+    (schema_dir / "Attachment").mkdir()
+    (schema_dir / "Attachment" / "qualitative.htm").write_text("<html/>")
+    manifest = FileManifest(schema_dir)
+
+    assert len(manifest.files) == 3
+    assert len(manifest.by_role("xsd")) == 1
+    assert len(manifest.by_role("def")) == 1
+    assert manifest.by_role("qualitative") == [
+        (schema_dir / "Attachment" / "qualitative.htm").as_posix()
+    ]
+    assert manifest.by_role("lab") == []
+    with pytest.raises(KeyError):
+        manifest.by_role("html")
+
+    # ディレクトリ名も判定の対象とする
+    assert manifest.contains("Attachment")
+    assert manifest.contains("acedjpsm")
+    assert not manifest.contains("Summary")
+
+    # マネージャーは渡されたファイル一覧を参照する
+    manager = BaseXbrlManager(schema_dir, manifest=manifest)
+    assert manager.manifest is manifest
+    assert manager.files == manifest.files
+
+
+def test_items_conversion(schema_dir):
+    manager = SchemaManager(schema_dir)
+
+    # 参照するまでitemはモデルのまま保持する
+    raw = [item["item"] for item in manager.raw_items]
+    assert all(isinstance(row, BaseTag) for rows in raw for row in rows)
+    expected = [
+        json.loads(
+            json.dumps(
+                [row.model_dump() for row in rows],
+                default=Utils.decimal_encoder,
+            )
+        )
+        for rows in raw
+    ]
+
+    # json.dumps/json.loadsの往復と同じ辞書に変換される
+    assert [item["item"] for item in manager.items] == expected
+    assert manager.raw_items is manager.items
+
+
+def test_columnar_items(schema_dir):
+    manager = SchemaManager(schema_dir)
+    columnar = manager.columnar_items
+
+    # keyごとの列形式はitemsと同じ値を保持する
+    for key, result in columnar.items():
+        assert isinstance(result, ColumnarResult)
+        rows = [
+            row
+            for item in manager.raw_items
+            if item["key"] == key
+            for row in item["item"]
+        ]
+        assert len(result) == len(rows)
+        assert result.to_records() == [row.__dict__ for row in rows]
+
+
+def test_iter_rows(schema_dir, tmp_path):
+    manager = SchemaManager(schema_dir)
+
+    rows = list(manager.iter_rows("iter_elements"))
+    expected = [
+        (parser.source_file_id, row)
+        for parser in manager.parsers
+        for row in parser.elements().data
+    ]
+    assert rows == expected
+
+    # ファイルへ1行ずつ書き込む
+    output = tmp_path / "elements.jsonl"
+    count = Utils.write_json_lines(
+        (row for _, row in manager.iter_rows("iter_elements")), output
+    )
+    assert count == len(expected)
+    assert [
+        json.loads(line) for line in output.read_text().splitlines()
+    ] == [json.loads(row.model_dump_json()) for _, row in expected]
+
+    with pytest.raises(ValueError):
+        list(manager.iter_rows("elements"))
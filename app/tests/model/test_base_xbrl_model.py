@@ -1,3 +1,6 @@
+import zipfile
+from pathlib import Path
+
 import pytest
 
 from app.ix_models import BaseXbrlModel
@@ -12,3 +15,49 @@ def base_xbrl_model(get_xbrl_edjp_zip, get_output_dir):
 
 def test_base_xbrl_model_instance(base_xbrl_model):
     assert isinstance(base_xbrl_model, BaseXbrlModel)
+
+
+def test_context_manager(get_xbrl_edjp_zip, get_output_dir):
+    output_path = get_output_dir / "base_xbrl_model"
+
+    with BaseXbrlModel(
+        get_xbrl_edjp_zip, output_path, extract=True
+    ) as model:
+        directory_path = Path(model.directory_path)
+        assert directory_path.is_dir()
+
+    # ブロックを抜けると解凍したディレクトリを削除する
+    assert not directory_path.exists()
+
+
+def write_zip(zip_path: Path, members):
+    """指定したメンバーを格納順に含むzipファイルを作成"""
+    with zipfile.ZipFile(zip_path, "w") as zf:
+        for member in members:
+            zf.writestr(member, "<html/>")
+    return zip_path.as_posix()
+
+
+@pytest.mark.parametrize("extract", [True, False])
+def test_xbrl_category_ignores_zip_name(tmp_path, extract):
+    # zipファイル名に含まれる区分は判定に使用しない
+    zip_path = write_zip(
+        tmp_path / "edjp_20240510.zip",
+        ["XBRLData/Summary/tse-rvfc-12345-20240510412345-ixbrl.htm"],
+    )
+    with BaseXbrlModel(zip_path, tmp_path, extract=extract) as model:
+        assert model.xbrl_category == "rvfc"
+
+
+@pytest.mark.parametrize("extract", [True, False])
+def test_xbrl_category_order(tmp_path, extract):
+    # zipファイル内の格納順ではなく、解凍した場合と同じ順序で判定する
+    zip_path = write_zip(
+        tmp_path / "081220240510412345.zip",
+        [
+            "XBRLData/Summary/sub/tse-acedussm-12345-20240510412345-ixbrl.htm",
+            "XBRLData/Summary/tse-acedjpsm-12345-20240510412345-ixbrl.htm",
+        ],
+    )
+    with BaseXbrlModel(zip_path, tmp_path, extract=extract) as model:
+        assert model.xbrl_category == "edjp"
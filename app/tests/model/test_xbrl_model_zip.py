@@ -0,0 +1,218 @@
+import shutil
+import zipfile
+
+import pytest
+
+from app.ix_models import XBRLModel
+
+SM = "tse-acedjpsm-12345-20240510412345"
+FR = "tse-acedjpfr-12345-2024-03-31-01-2024-05-10"
+TAXONOMY_LABEL = "jp/tse/tdnet/ed/t/2014-01-12/tse-ed-t-2014-01-12-lab.xml"
+NS = (
+    'xmlns:link="http://www.xbrl.org/2003/linkbase" '
+    'xmlns:xlink="http://www.w3.org/1999/xlink"'
+)
+
+
+def schema(base, refs):
+    linkbase_refs = "".join(
+        f'<link:linkbaseRef xlink:type="simple" xlink:href="{href}" '
+        f'xlink:role="http://www.xbrl.org/2003/role/{role}" '
+        'xlink:arcrole="http://www.w3.org/1999/xlink/properties/linkbase"/>'
+        for href, role in refs
+    )
+    elements = "".join(
+        f'<xsd:element id="{base}_{name}" name="{name}" '
+        'type="xbrli:monetaryItemType" substitutionGroup="xbrli:item" '
+        'abstract="false" nillable="true" xbrli:balance="credit" '
+        'xbrli:periodType="duration"/>'
+        for name in ["Sales", "Profit"]
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<xsd:schema xmlns:xsd="http://www.w3.org/2001/XMLSchema" '
+        f'{NS} xmlns:xbrli="http://www.xbrl.org/2003/instance" '
+        f'targetNamespace="http://example.com/{base}">'
+        f"<xsd:annotation><xsd:appinfo>{linkbase_refs}"
+        f"</xsd:appinfo></xsd:annotation>{elements}</xsd:schema>"
+    )
+
+
+def label(base):
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        f"<link:linkbase {NS}>"
+        '<link:labelLink xlink:type="extended" '
+        'xlink:role="http://www.xbrl.org/2003/role/link">'
+        f'<link:loc xlink:type="locator" xlink:href="{base}.xsd#{base}_Sales" '
+        'xlink:label="Sales"/>'
+        '<link:label xlink:type="resource" xlink:label="label_Sales" '
+        'xlink:role="http://www.xbrl.org/2003/role/label" '
+        'xml:lang="ja">売上高</link:label>'
+        '<link:labelArc xlink:type="arc" '
+        'xlink:arcrole="http://www.xbrl.org/2003/arcrole/concept-label" '
+        'xlink:from="Sales" xlink:to="label_Sales"/>'
+        "</link:labelLink></link:linkbase>"
+    )
+
+
+def link(base, kind):
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        f"<link:linkbase {NS}>"
+        '<link:roleRef roleURI="http://example.com/role/rol_BS" '
+        f'xlink:type="simple" xlink:href="{base}.xsd#rol_BS"/>'
+        f'<link:{kind}Link xlink:type="extended" '
+        'xlink:role="http://example.com/role/rol_BS">'
+        f'<link:loc xlink:type="locator" xlink:href="{base}.xsd#{base}_Sales" '
+        'xlink:label="Sales"/>'
+        f'<link:loc xlink:type="locator" xlink:href="{base}.xsd#{base}_Profit" '
+        'xlink:label="Profit"/>'
+        f'<link:{kind}Arc xlink:type="arc" '
+        'xlink:arcrole="http://example.com/arcrole/parent-child" '
+        'xlink:from="Sales" xlink:to="Profit" order="1.0" weight="1.0"/>'
+        f"</link:{kind}Link></link:linkbase>"
+    )
+
+
+def ixbrl(facts):
+    context = (
+        '<xbrli:context id="{id}"><xbrli:entity>'
+        '<xbrli:identifier scheme="http://www.xbrl.tdnet.info/jp/tse/tdnet">'
+        "12345</xbrli:identifier></xbrli:entity><xbrli:period>{period}"
+        "</xbrli:period></xbrli:context>"
+    )
+    contexts = context.format(
+        id="CurrentYearInstant",
+        period="<xbrli:instant>2024-03-31</xbrli:instant>",
+    ) + context.format(
+        id="CurrentYearDuration",
+        period=(
+            "<xbrli:startDate>2023-04-01</xbrli:startDate>"
+            "<xbrli:endDate>2024-03-31</xbrli:endDate>"
+        ),
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<html xmlns="http://www.w3.org/1999/xhtml" '
+        'xmlns:ix="http://www.xbrl.org/2008/inlineXBRL" '
+        'xmlns:ixt="http://www.xbrl.org/inlineXBRL/transformation/2011-07-31" '
+        'xmlns:xbrli="http://www.xbrl.org/2003/instance" '
+        'xmlns:tse-ed-t="http://www.xbrl.tdnet.info/jp/tse/tdnet/ed/t/2014-01-12">'
+        '<head><title>test</title></head><body><div style="display:none">'
+        f"<ix:header><ix:resources>{contexts}</ix:resources></ix:header>"
+        f"</div><div>{''.join(facts)}</div></body></html>"
+    )
+
+
+def non_numeric(name, value):
+    return (
+        f'<ix:nonNumeric name="tse-ed-t:{name}" '
+        f'contextRef="CurrentYearInstant">{value}</ix:nonNumeric>'
+    )
+
+
+NET_SALES = (
+    '<ix:nonFraction name="tse-ed-t:NetSales" '
+    'contextRef="CurrentYearDuration" unitRef="JPY" decimals="-6" '
+    'scale="6" format="ixt:numdotdecimal">1,234</ix:nonFraction>'
+)
+
+
+@pytest.fixture
+def xbrl_zip(tmp_path):
+    """解析できる最小構成のXBRLファイル(zip)を作成"""
+    summary = f"XBRLData/Summary/{SM}"
+    attachment = f"XBRLData/Attachment/{FR}"
+    members = {
+        f"{summary}-ixbrl.htm": ixbrl(
+            [
+                non_numeric("CompanyName", "テスト株式会社"),
+                non_numeric("SecuritiesCode", "12345"),
+                non_numeric("DocumentName", "決算短信〔日本基準〕(連結)"),
+                NET_SALES,
+            ]
+        ),
+        f"{summary}.xsd": schema(
+            SM,
+            [
+                (f"{SM}-lab.xml", "labelLinkbaseRef"),
+                (f"{SM}-def.xml", "definitionLinkbaseRef"),
+                (
+                    f"http://www.xbrl.tdnet.info/taxonomy/{TAXONOMY_LABEL}",
+                    "labelLinkbaseRef",
+                ),
+            ],
+        ),
+        f"{summary}-lab.xml": label(SM),
+        f"{summary}-def.xml": link(SM, "definition"),
+        f"XBRLData/Attachment/0101010-acbs01-{FR}-ixbrl.htm": ixbrl(
+            [NET_SALES]
+        ),
+        f"{attachment}.xsd": schema(
+            FR,
+            [
+                (f"{FR}-lab.xml", "labelLinkbaseRef"),
+                (f"{FR}-cal.xml", "calculationLinkbaseRef"),
+                (f"{FR}-pre.xml", "presentationLinkbaseRef"),
+            ],
+        ),
+        f"{attachment}-lab.xml": label(FR),
+        f"{attachment}-cal.xml": link(FR, "calculation"),
+        f"{attachment}-pre.xml": link(FR, "presentation"),
+    }
+    zip_path = tmp_path / "081220240510412345.zip"
+    with zipfile.ZipFile(zip_path, "w") as zf:
+        for name, content in members.items():
+            zf.writestr(name, content)
+    return zip_path.as_posix()
+
+
+@pytest.fixture
+def output_dir(get_taxonomy_dir, tmp_path):
+    # 参照するタクソノミを一時ディレクトリに複製
+    xml_file = tmp_path / "output" / "taxonomy" / TAXONOMY_LABEL
+    xml_file.parent.mkdir(parents=True)
+    shutil.copy(get_taxonomy_dir / TAXONOMY_LABEL, xml_file)
+    return (tmp_path / "output").as_posix()
+
+
+def test_zip_mode_matches_extract_mode(xbrl_zip, output_dir):
+    with XBRLModel(xbrl_zip, output_dir, extract=True) as model:
+        expected = model.get_all_items()
+    with XBRLModel(xbrl_zip, output_dir, extract=False) as model:
+        assert model.directory_path == xbrl_zip
+        result = model.get_all_items()
+
+    keys = {item["key"] for item in expected}
+    assert {"ix_non_numeric", "ix_non_fraction", "cal_link_arcs"} <= keys
+    assert result == expected
+
+
+def test_default_extracts(xbrl_zip, output_dir):
+    with XBRLModel(xbrl_zip, output_dir) as model:
+        directory_path = model.directory_path
+        assert directory_path != xbrl_zip
+
+
+def test_trusted_matches_validated(xbrl_zip, output_dir):
+    with XBRLModel(xbrl_zip, output_dir, extract=False) as model:
+        assert not model.trusted
+        expected = model.get_all_items()
+    with XBRLModel(
+        xbrl_zip, output_dir, extract=False, trusted=True
+    ) as model:
+        result = model.get_all_items()
+        # 各マネージャーのパーサーに指定が渡る
+        parsers = (
+            model.ixbrl_manager.parsers
+            + model.label_manager.parsers
+            + model.cal_link_manager.parsers
+            + model.schema_index.parsers
+        )
+        assert all(parser.trusted for parser in parsers)
+
+    # 検証を省略しても同じアイテムになる
+    keys = {item["key"] for item in expected}
+    assert {"ix_non_numeric", "ix_non_fraction", "sc_linkbase_ref"} <= keys
+    assert result == expected
@@ -1,13 +1,20 @@
 import os
 import random
 import shutil
+import threading
 import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
+from urllib.parse import parse_qs, urlparse
 
 import pytest
 from pandas import DataFrame
 
 from app.ix_parser import BaseXBRLParser
+from app.ix_parser.source_file_lookup import (
+    SourceFileLookup,
+    get_source_file_lookup,
+)
 
 
 @pytest.fixture
@@ -133,3 +140,58 @@ def test_create(get_output_dir):
     parser = BaseXBRLParser.create(url, output_path.as_posix())
     assert isinstance(parser, BaseXBRLParser)
     shutil.rmtree(output_path)
+
+
+@pytest.fixture
+def source_file_api():
+    """登録済みのsource_file_idに200を返す存在確認API"""
+    registered = {"known"}
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = parse_qs(urlparse(self.path).query)
+            source_file_id = query["source_file_id"][0]
+            received.append(source_file_id)
+            self.send_response(
+                200 if source_file_id in registered else 404
+            )
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/exists/", received
+    server.shutdown()
+    server.server_close()
+
+
+def test_source_file_lookup(source_file_api):
+    api_url, received = source_file_api
+    lookup = SourceFileLookup(api_url)
+
+    # まとめて問い合わせ、重複したIDは1回だけ問い合わせる
+    result = lookup.resolve(["known", "new", "known"])
+    assert result == {"known": True, "new": False}
+    assert sorted(received) == ["known", "new"]
+
+    # 登録済みのIDは再度問い合わせない
+    assert lookup.exists("known")
+    assert not lookup.exists("new")
+    assert sorted(received) == ["known", "new", "new"]
+    assert lookup.request_count == 3
+
+    # 挿入済みとして登録したIDは問い合わせない
+    lookup.add(["new"])
+    assert lookup.resolve(["known", "new"]) == {"known": True, "new": True}
+    assert len(received) == 3
+    lookup.close()
+
+    assert get_source_file_lookup(None) is None
+    assert get_source_file_lookup(api_url) is get_source_file_lookup(
+        api_url
+    )
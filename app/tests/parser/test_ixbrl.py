@@ -66,3 +66,62 @@ def test_non_fraction(get_parser):
     assert len(result) > 0
     # column check
     assert sorted(IxNonFraction.keys()) == sorted(result.columns.tolist())
+
+
+IXBRL_FR = """<?xml version="1.0" encoding="UTF-8"?>
+<html xmlns="http://www.w3.org/1999/xhtml"
+  xmlns:ix="http://www.xbrl.org/2008/inlineXBRL"
+  xmlns:xbrli="http://www.xbrl.org/2003/instance"
+  xmlns:xbrldi="http://xbrl.org/2006/xbrldi"
+  xmlns:tse-ed-t="http://www.xbrl.tdnet.info/jp/tse/tdnet/ed/t/2014-01-12">
+<body>
+<ix:header><ix:resources>
+<xbrli:context id="CurrentYearDuration_ConsolidatedMember">
+<xbrli:period><xbrli:startDate>2023-04-01</xbrli:startDate>
+<xbrli:endDate>2024-03-31</xbrli:endDate></xbrli:period>
+<xbrli:scenario><xbrldi:explicitMember
+ dimension="tse-ed-t:ConsolidatedNonconsolidatedAxis"
+>tse-ed-t:ConsolidatedMember</xbrldi:explicitMember></xbrli:scenario>
+</xbrli:context>
+</ix:resources></ix:header>
+<ix:nonNumeric name="tse-ed-t:BalanceSheetTextBlock"
+ contextRef="CurrentYearDuration_ConsolidatedMember" escape="true">
+<ix:nonFraction name="tse-ed-t:NetSales"
+ contextRef="CurrentYearDuration_ConsolidatedMember" unitRef="JPY"
+ decimals="-6" scale="6" sign="-">1,234</ix:nonFraction>
+</ix:nonNumeric>
+<ix:nonNumeric name="tse-ed-t:Note"
+ contextRef="CurrentYearDuration_ConsolidatedMember">注記</ix:nonNumeric>
+</body>
+</html>
+"""
+
+
+def test_set_ix_facts(tmp_path):
+    ixbrl_file = (
+        tmp_path
+        / "0101010-acbs01-tse-acedjpfr-12345-2024-03-31-01-2024-05-10-ixbrl.htm"
+    )
+    ixbrl_file.write_text(IXBRL_FR, encoding="utf-8")
+    head_item_key = "00000000-0000-0000-0000-000000000000"
+
+    parser = IxbrlParser(
+        ixbrl_file.as_posix(), head_item_key=head_item_key
+    )
+    single_pass_parser = IxbrlParser(
+        ixbrl_file.as_posix(),
+        head_item_key=head_item_key,
+        single_pass=True,
+    )
+    # single_passの場合は初期化時に要素を検索しない
+    assert single_pass_parser.ixbrl_role is None
+
+    facts = single_pass_parser.set_ix_facts().ix_facts
+    assert facts["ixbrl_role"] == parser.ixbrl_role
+    assert facts["ixbrl_role"]["en_label"] == "BalanceSheet"
+    assert facts["ix_non_fraction"] == parser.set_ix_non_fraction().data
+    assert facts["ix_non_numeric"] == parser.set_ix_non_numeric().data
+    assert facts["ix_context"] == parser.set_ix_context().data
+    assert len(facts["ix_non_fraction"]) == 1
+    assert len(facts["ix_non_numeric"]) == 2
+    assert len(facts["ix_context"]) == 1
@@ -1,9 +1,17 @@
+import shutil
+import zipfile
+
 import pandas as pd
 import pytest
 
 from app.exception import TagNotFoundError, TypeOfXBRLIsDifferent
-from app.ix_parser import LabelParser
+from app.exception.xbrl_parser_exception import (
+    ParserEngineNotSupportedError,
+)
+from app.ix_parser import LabelParser, zip_source
+from app.ix_parser.taxonomy_cache import TaxonomyCache, taxonomy_cache
 from app.ix_tag import LabelArc, LabelLoc, LabelRoleRefs, LabelValue
+from app.utils import Utils
 
 
 @pytest.fixture
@@ -79,3 +87,205 @@ def test_role_refs(get_parser):
         )
     except TagNotFoundError:
         assert True
+
+
+@pytest.mark.parametrize(
+    "method",
+    ["link_labels", "link_label_locs", "link_label_arcs", "role_refs"],
+)
+def test_lxml_engine(get_taxonomy_dir, method):
+    label_file = (
+        get_taxonomy_dir
+        / "jp/tse/tdnet/ed/t/2014-01-12/tse-ed-t-2014-01-12-lab.xml"
+    ).as_posix()
+    head_item_key = "00000000-0000-0000-0000-000000000000"
+    bs4_parser = LabelParser(label_file, head_item_key=head_item_key)
+    lxml_parser = LabelParser(
+        label_file, head_item_key=head_item_key, engine="lxml"
+    )
+    # lxmlエンジンはツリーを構築しない
+    assert lxml_parser.engine == "lxml"
+    expected = getattr(bs4_parser, method)().to_dict()
+    result = getattr(lxml_parser, method)().to_dict()
+    assert len(result) > 0
+    assert result == expected
+
+
+@pytest.mark.parametrize("engine", ["bs4", "lxml"])
+@pytest.mark.parametrize(
+    "method",
+    ["link_labels", "link_label_locs", "link_label_arcs", "role_refs"],
+)
+def test_trusted(get_taxonomy_dir, engine, method):
+    label_file = (
+        get_taxonomy_dir
+        / "jp/tse/tdnet/ed/t/2014-01-12/tse-ed-t-2014-01-12-lab.xml"
+    ).as_posix()
+    head_item_key = "00000000-0000-0000-0000-000000000000"
+    parser = LabelParser(label_file, head_item_key=head_item_key)
+    # 既定では検証してタグを生成する
+    assert not parser.trusted
+    trusted_parser = LabelParser(
+        label_file,
+        head_item_key=head_item_key,
+        engine=engine,
+        trusted=True,
+    )
+    expected = getattr(parser, method)().to_dict()
+    result = getattr(trusted_parser, method)().to_dict()
+    assert len(result) > 0
+    assert result == expected
+
+
+def test_not_engine(get_taxonomy_dir):
+    label_file = (
+        get_taxonomy_dir
+        / "jpdei/2013-08-31/label/jpdei_2013-08-31_lab.xml"
+    ).as_posix()
+    with pytest.raises(ParserEngineNotSupportedError):
+        LabelParser(label_file, engine="html")
+
+
+def test_taxonomy_cache(get_taxonomy_dir, tmp_path):
+    path = "jp/tse/tdnet/ed/t/2014-01-12/tse-ed-t-2014-01-12-lab.xml"
+    url = f"http://www.xbrl.tdnet.info/taxonomy/{path}"
+    # タクソノミを一時ディレクトリに複製
+    xml_file = tmp_path / "taxonomy" / path
+    xml_file.parent.mkdir(parents=True)
+    shutil.copy(get_taxonomy_dir / path, xml_file)
+    output_dir = tmp_path.as_posix()
+    taxonomy_cache.clear()
+
+    first = LabelParser(url, output_dir, head_item_key="first")
+    expected = first.link_labels().to_dict()
+    assert taxonomy_cache.misses == 1
+
+    # 2回目はキャッシュから取得し、ツリーを構築しない
+    second = LabelParser(url, output_dir, head_item_key="second")
+    result = second.link_labels().to_dict()
+    assert taxonomy_cache.hits == 1
+    assert second._BaseXBRLParser__soup is None
+    assert result == expected
+
+    # キャッシュを利用しない場合は毎回解析する
+    third = LabelParser(url, output_dir, use_cache=False)
+    assert third.link_labels().to_dict() == expected
+    assert taxonomy_cache.hits == 1
+    taxonomy_cache.clear()
+
+
+def test_taxonomy_cache_evict():
+    cache = TaxonomyCache(max_bytes=1024)
+    rows = [
+        LabelLoc(
+            xlink_type="locator",
+            xlink_schema="a.xsd",
+            xlink_href="a.xsd#a",
+            xlink_label=f"label_{i}",
+            source_file_id="id",
+        )
+        for i in range(2)
+    ]
+    size = cache.estimate_size(rows)
+    cache.max_bytes = size * 2
+    cache.put("a", rows)
+    cache.put("b", rows)
+    assert cache.get("a") == rows
+    # 上限を超えると最も参照されていない結果から破棄する
+    cache.put("c", rows)
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.current_bytes <= cache.max_bytes
+
+
+@pytest.mark.parametrize("engine", ["bs4", "lxml"])
+def test_zip_member(get_taxonomy_dir, tmp_path, engine):
+    label_file = (
+        get_taxonomy_dir
+        / "jp/tse/tdnet/ed/t/2014-01-12/tse-ed-t-2014-01-12-lab.xml"
+    )
+    zip_file = tmp_path / "filing.zip"
+    member = "XBRLData/Summary/tse-ed-t-2014-01-12-lab.xml"
+    with zipfile.ZipFile(zip_file, "w") as z:
+        z.write(label_file, member)
+
+    # zipファイルを解凍せずにメンバーを読み込む
+    path = zip_source.to_zip_path(zip_file.as_posix(), member)
+    assert zip_source.exists(path)
+    assert not zip_source.exists(path + ".bak")
+    head_item_key = "00000000-0000-0000-0000-000000000000"
+    parser = LabelParser(path, head_item_key=head_item_key, engine=engine)
+    expected = LabelParser(
+        label_file.as_posix(), head_item_key=head_item_key
+    )
+    assert parser.basename == expected.basename
+    assert (
+        parser.link_labels().to_dict() == expected.link_labels().to_dict()
+    )
+    assert list(tmp_path.iterdir()) == [zip_file]
+
+
+@pytest.mark.parametrize("engine", ["bs4", "lxml"])
+def test_iter_methods(get_taxonomy_dir, engine):
+    label_file = (
+        get_taxonomy_dir
+        / "jp/tse/tdnet/ed/t/2014-01-12/tse-ed-t-2014-01-12-lab.xml"
+    )
+    head_item_key = "00000000-0000-0000-0000-000000000000"
+    parser = LabelParser(
+        label_file.as_posix(), head_item_key=head_item_key, engine=engine
+    )
+
+    # ジェネレーターはリストと同じ結果を1件ずつ返す
+    for method in ["link_labels", "link_label_locs", "link_label_arcs"]:
+        rows = getattr(parser, f"iter_{method}")()
+        assert not isinstance(rows, list)
+        rows = list(rows)
+        assert len(rows) > 0
+        assert rows == getattr(parser, method)().data
+
+
+def test_release(get_taxonomy_dir):
+    label_file = (
+        get_taxonomy_dir
+        / "jp/tse/tdnet/ed/t/2014-01-12/tse-ed-t-2014-01-12-lab.xml"
+    )
+    parser = LabelParser(label_file.as_posix())
+    assert not parser.is_loaded
+
+    data = parser.link_labels().data
+    assert parser.is_loaded
+
+    # ツリーを破棄しても解析結果は保持する
+    parser.release()
+    assert not parser.is_loaded
+    assert parser.data is data
+
+    # 再度参照すると読み込み直す
+    assert parser.soup is not None
+    assert parser.is_loaded
+    assert parser.link_labels().data == data
+
+
+def test_lazy_resolve(get_taxonomy_dir, tmp_path):
+    # URLのファイルは抽出するまで取得しない
+    url = "http://example.invalid/taxonomy/tse-ed-t-2014-01-12-lab.xml"
+    parser = LabelParser(url, output_path=tmp_path.as_posix())
+    assert not parser.is_resolved
+    assert parser.basename == "tse-ed-t-2014-01-12-lab.xml"
+    assert parser.source_file_id == str(Utils.string_to_uuid(url))
+    assert parser.xbrl_type == "sm"
+    assert list(tmp_path.iterdir()) == []
+
+    label_file = (
+        get_taxonomy_dir
+        / "jp/tse/tdnet/ed/t/2014-01-12/tse-ed-t-2014-01-12-lab.xml"
+    )
+    parser = LabelParser(label_file.as_posix())
+    assert not parser.is_resolved
+    assert not parser.is_loaded
+
+    # 抽出メソッドの初回参照時に解決して読み込む
+    assert len(parser.link_labels().data) > 0
+    assert parser.is_resolved
+    assert parser.file_path == label_file.as_posix()
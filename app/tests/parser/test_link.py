@@ -1,4 +1,5 @@
 import pprint
+import shutil
 from pathlib import Path
 
 import pytest
@@ -10,6 +11,13 @@ from app.ix_parser import (
     DefLinkParser,
     PreLinkParser,
 )
+from app.ix_parser.taxonomy_artifact import (
+    ARTIFACT_SCHEMA,
+    ARTIFACT_SUFFIX,
+    TaxonomyArtifactStore,
+    taxonomy_artifact_store,
+)
+from app.ix_parser.taxonomy_cache import taxonomy_cache
 from app.ix_tag import LinkArc, LinkBase, LinkLoc, LinkRole, LinkTag
 
 
@@ -121,3 +129,147 @@ def test_link_tags(cal_link_parser):
     # 取得したデータをテスト出力
     print("[test_link_tags]" + "*" * 80 + "\n")
     pprint.pprint(values)
+
+
+@pytest.mark.parametrize(
+    "method",
+    ["link_roles", "link_locs", "link_arcs", "link_base", "link_tags"],
+)
+def test_lxml_engine(get_taxonomy_dir, method):
+    def_file = (
+        get_taxonomy_dir
+        / "jpdei/2013-08-31/r/jpdei_000100-000_2013-08-31_def.xml"
+    ).as_posix()
+    head_item_key = "00000000-0000-0000-0000-000000000000"
+    bs4_parser = DefLinkParser(def_file, head_item_key=head_item_key)
+    lxml_parser = DefLinkParser(
+        def_file, head_item_key=head_item_key, engine="lxml"
+    )
+    expected = getattr(bs4_parser, method)().to_dict()
+    result = getattr(lxml_parser, method)().to_dict()
+    assert len(result) > 0
+    assert result == expected
+
+
+@pytest.mark.parametrize("engine", ["bs4", "lxml"])
+@pytest.mark.parametrize(
+    "method",
+    ["link_roles", "link_locs", "link_arcs", "link_base", "link_tags"],
+)
+def test_trusted(get_taxonomy_dir, engine, method):
+    def_file = (
+        get_taxonomy_dir
+        / "jpdei/2013-08-31/r/jpdei_000100-000_2013-08-31_def.xml"
+    ).as_posix()
+    head_item_key = "00000000-0000-0000-0000-000000000000"
+    parser = DefLinkParser(def_file, head_item_key=head_item_key)
+    # 既定では検証してタグを生成する
+    assert not parser.trusted
+    trusted_parser = DefLinkParser(
+        def_file, head_item_key=head_item_key, engine=engine, trusted=True
+    )
+    expected = getattr(parser, method)().to_dict()
+    result = getattr(trusted_parser, method)().to_dict()
+    assert len(result) > 0
+    assert result == expected
+
+
+@pytest.mark.parametrize(
+    "method", ["link_roles", "link_locs", "link_arcs"]
+)
+def test_taxonomy_artifact(
+    get_taxonomy_dir, tmp_path, monkeypatch, method
+):
+    path = "jpdei/2013-08-31/r/jpdei_000100-000_2013-08-31_def.xml"
+    url = f"http://disclosure.edinet-fsa.go.jp/taxonomy/{path}"
+    # タクソノミを一時ディレクトリに複製
+    xml_file = tmp_path / "taxonomy" / path
+    xml_file.parent.mkdir(parents=True)
+    shutil.copy(get_taxonomy_dir / path, xml_file)
+    output_dir = tmp_path.as_posix()
+    monkeypatch.setattr(taxonomy_artifact_store, "enabled", True)
+
+    first = DefLinkParser(url, output_dir, head_item_key="first")
+    getattr(first, method)()
+    assert TaxonomyArtifactStore.artifact_path(xml_file).exists()
+
+    # プロセス内のキャッシュを破棄してもアーティファクトから取得する
+    taxonomy_cache.clear()
+    second = DefLinkParser(url, output_dir, head_item_key="second")
+    result = getattr(second, method)().to_dict()
+    assert second._BaseXBRLParser__soup is None
+
+    # head_item_keyは差し替えられ、解析した結果と一致する
+    expected = getattr(
+        DefLinkParser(url, output_dir, "second", use_cache=False), method
+    )().to_dict()
+    assert len(result) > 0
+    assert result == expected
+    taxonomy_cache.clear()
+
+
+def test_taxonomy_artifact_disabled(get_taxonomy_dir, tmp_path):
+    path = "jpdei/2013-08-31/r/jpdei_000100-000_2013-08-31_def.xml"
+    url = f"http://disclosure.edinet-fsa.go.jp/taxonomy/{path}"
+    xml_file = tmp_path / "taxonomy" / path
+    xml_file.parent.mkdir(parents=True)
+    shutil.copy(get_taxonomy_dir / path, xml_file)
+
+    # 既定ではアーティファクトを保存せず、プロセス内のキャッシュのみ使用する
+    assert not taxonomy_artifact_store.enabled
+    DefLinkParser(url, tmp_path.as_posix()).link_arcs()
+    assert list(xml_file.parent.iterdir()) == [xml_file]
+    taxonomy_cache.clear()
+
+    # 無効な場合は既存のアーティファクトも読み込まない
+    rows = [LinkTag(head_item_key="a", xlink_type="extended")]
+    TaxonomyArtifactStore(enabled=True).save(xml_file, "link_tags", rows)
+    assert TaxonomyArtifactStore().load(xml_file, "link_tags") is None
+
+
+def test_taxonomy_artifact_stale(tmp_path):
+    xml_file = tmp_path / "sample_def.xml"
+    xml_file.write_text("<linkbase/>")
+    store = TaxonomyArtifactStore(enabled=True)
+    rows = [LinkTag(head_item_key="a", xlink_type="extended")]
+    store.save(xml_file, "link_tags", rows)
+    assert store.load(xml_file, "link_tags") == rows
+    assert store.load(xml_file, "link_locs") is None
+
+    # XMLファイルが更新された場合は破棄する
+    xml_file.write_text("<linkbase></linkbase>")
+    assert store.load(xml_file, "link_tags") is None
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        b"cmoved_module\nLinkTag\n.",
+        b"capp.ix_tag\nRenamedTag\n.",
+        b"not a pickle",
+    ],
+)
+def test_taxonomy_artifact_unreadable(tmp_path, content):
+    xml_file = tmp_path / "sample_def.xml"
+    xml_file.write_text("<linkbase/>")
+    store = TaxonomyArtifactStore(enabled=True)
+    # クラスの移動や名前の変更で読み込めない場合は存在しないものとして扱う
+    TaxonomyArtifactStore.artifact_path(xml_file).write_bytes(content)
+    assert store.load(xml_file, "link_tags") is None
+
+    # 次の保存時に上書きする
+    rows = [LinkTag(head_item_key="a", xlink_type="extended")]
+    store.save(xml_file, "link_tags", rows)
+    assert store.load(xml_file, "link_tags") == rows
+
+
+def test_taxonomy_artifact_schema(tmp_path):
+    xml_file = tmp_path / "sample_def.xml"
+    xml_file.write_text("<linkbase/>")
+    # 形式の識別子を含まない古いアーティファクトは読み込まない
+    path = TaxonomyArtifactStore.artifact_path(xml_file)
+    assert ARTIFACT_SCHEMA in path.name
+    legacy_path = tmp_path / f"sample_def.xml{ARTIFACT_SUFFIX}"
+    legacy_path.write_bytes(b"cmoved_module\nLinkTag\n.")
+    store = TaxonomyArtifactStore(enabled=True)
+    assert store.load(xml_file, "link_tags") is None
@@ -1,6 +1,15 @@
+from decimal import Decimal
+
 import pytest
 
-from app.ix_tag import BaseTag
+from app.ix_tag import (
+    BaseTag,
+    IxNonFraction,
+    LabelLoc,
+    LabelValue,
+    LinkArc,
+    SourceFile,
+)
 
 
 @pytest.fixture
@@ -19,3 +28,54 @@ def test_base_tag_instance(base_tag):
     base_tag2 = BaseTag()
 
     assert base_tag.__eq__(base_tag2)
+
+
+@pytest.mark.parametrize(
+    "tag_class, data",
+    [
+        (
+            IxNonFraction,
+            {
+                "head_item_key": "head",
+                "context": [
+                    "CurrentYearDuration",
+                    "NonConsolidatedMember",
+                ],
+                "name": "jppfs_cor_NetSales",
+                "xsi_nil": False,
+                "decimals": "-6",
+                "numeric": Decimal("-1234.50"),
+                "source_file_id": "source",
+            },
+        ),
+        (
+            LinkArc,
+            {
+                "attr_value": "BalanceSheet",
+                "xlink_from": "from",
+                "xlink_to": "to",
+                "xlink_order": 1.0,
+                "source_file_id": "source",
+            },
+        ),
+        (
+            LabelValue,
+            {
+                "xlink_label": "label",
+                "xlink_role": "role",
+                "label": 100,
+                "unknown": "ignored",
+            },
+        ),
+        (SourceFile, {"name": "a.xsd", "url": "http://example.com"}),
+        (LabelLoc, {}),
+    ],
+)
+def test_trusted(tag_class, data):
+    tag = tag_class(**data)
+    trusted = tag_class.trusted(**data)
+
+    assert type(trusted) is tag_class
+    assert trusted.item_key == tag.item_key
+    assert trusted.model_dump() == tag.model_dump()
+    assert trusted == tag
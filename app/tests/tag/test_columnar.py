@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from pandas import DataFrame
+
+from app.ix_tag import ColumnarResult, LabelValue
+from app.ix_tag import columnar as columnar_module
+
+
+@pytest.fixture
+def tags():
+    return [
+        LabelValue(
+            xlink_label=f"label_{i}",
+            xlink_role="role",
+            label=f"ラベル{i}",
+            source_file_id="source",
+        )
+        for i in range(3)
+    ]
+
+
+def test_from_tags(tags):
+    result = ColumnarResult.from_tags(tags)
+
+    assert len(result) == 3
+    assert result.tag_class is LabelValue
+    assert result.names == list(tags[0].__dict__)
+    assert result["xlink_label"] == ["label_0", "label_1", "label_2"]
+    assert result.to_records() == [tag.__dict__ for tag in tags]
+
+
+def test_to_pandas(tags):
+    df = ColumnarResult.from_tags(tags).to_pandas()
+
+    assert df.equals(DataFrame([tag.__dict__ for tag in tags]))
+    assert ColumnarResult.from_tags([]).to_pandas().shape == (0, 0)
+
+
+def test_to_numpy(tags):
+    arrays = ColumnarResult.from_tags(tags).to_numpy()
+
+    assert isinstance(arrays["label"], np.ndarray)
+    assert arrays["label"].tolist() == ["ラベル0", "ラベル1", "ラベル2"]
+
+
+def test_to_arrow(tags, monkeypatch):
+    monkeypatch.setattr(columnar_module, "pyarrow", None)
+    with pytest.raises(ImportError):
+        ColumnarResult.from_tags(tags).to_arrow()
+
+
+def test_missing_columns():
+    result = ColumnarResult.from_tags([{"a": 1}, {"b": 2}])
+
+    assert result.columns == {"a": [1, None], "b": [None, 2]}
+
+    result = ColumnarResult.concat([result, ColumnarResult({"c": [3]})])
+
+    assert len(result) == 3
+    assert result.columns == {
+        "a": [1, None, None],
+        "b": [None, 2, None],
+        "c": [None, None, 3],
+    }
+
+
+def test_invalid_columns():
+    with pytest.raises(ValueError):
+        ColumnarResult({"a": [1], "b": [1, 2]})
@@ -0,0 +1,107 @@
+import json
+from decimal import Decimal
+from typing import Optional
+
+import pytest
+from pydantic import BaseModel
+
+import app.utils.utils as utils_module
+from app.utils import Utils
+
+
+class Value(BaseModel):
+    name: str
+    value: Optional[Decimal] = None
+
+
+ROWS = [
+    {"name": "売上高", "value": Decimal("1234.5"), "items": (1, 2)},
+    Value(name="利益", value=Decimal("-0.25")),
+    {"name": "資産", "value": None, "nested": [Value(name="a")]},
+]
+
+
+@pytest.fixture(params=["orjson", "json"])
+def encoder(request, monkeypatch):
+    """orjsonと標準のjsonの両方でエンコードする"""
+    if request.param == "json":
+        monkeypatch.setattr(utils_module, "orjson", None)
+    elif utils_module.orjson is None:
+        pytest.skip("orjsonがインストールされていません。")
+    return request.param
+
+
+def test_json_dumps(encoder):
+    encoded = Utils.json_dumps(ROWS)
+    assert isinstance(encoded, bytes)
+    # Decimalは数値、pydanticのモデルは辞書、タプルはリストになる
+    assert json.loads(encoded) == [
+        {"name": "売上高", "value": 1234.5, "items": [1, 2]},
+        {"name": "利益", "value": -0.25},
+        {
+            "name": "資産",
+            "value": None,
+            "nested": [{"name": "a", "value": None}],
+        },
+    ]
+    # 日本語はエスケープせずにUTF-8で出力する
+    assert "売上高".encode("utf-8") in encoded
+    assert json.loads(encoded) == Utils.to_json_compatible(ROWS)
+
+
+def test_json_dumps_parity(monkeypatch):
+    if utils_module.orjson is None:
+        pytest.skip("orjsonがインストールされていません。")
+    encoded = Utils.json_dumps(ROWS)
+    monkeypatch.setattr(utils_module, "orjson", None)
+    # orjsonと標準のjsonで同じバイト列になる
+    assert Utils.json_dumps(ROWS) == encoded
+
+
+def test_json_dumps_unsupported(encoder):
+    with pytest.raises(TypeError):
+        Utils.json_dumps({"value": object()})
+
+
+def rows(count, size=1):
+    return [{"value": "x" * size} for _ in range(count)]
+
+
+def test_group_rows_max_rows():
+    groups = list(Utils.group_rows(rows(5), 2, 1024))
+    assert [len(chunk) for chunk, _ in groups] == [2, 2, 1]
+    for chunk, encoded_chunk in groups:
+        assert [json.loads(encoded) for encoded in encoded_chunk] == chunk
+
+
+def test_group_rows_max_bytes():
+    # 1行は{"value":"xxxxxxxxxx"} (22バイト) + 区切りの1バイト
+    groups = list(Utils.group_rows(rows(5, size=10), 100, 50))
+    assert [len(chunk) for chunk, _ in groups] == [2, 2, 1]
+
+
+def test_group_rows_large_row():
+    # 1行で上限を超える場合は、その行だけのグループにする
+    data = rows(1) + rows(1, size=100) + rows(2)
+    groups = list(Utils.group_rows(data, 100, 50))
+    assert [len(chunk) for chunk, _ in groups] == [1, 1, 2]
+    assert groups[1][0] == rows(1, size=100)
+
+
+def test_chunk_json(encoder):
+    data = rows(5, size=10)
+    chunks = Utils.chunk_json(data, 2, 1024)
+    assert len(chunks) == 3
+    # チャンクはエンコード済みのJSON配列で、元の行を順に含む
+    decoded = [json.loads(chunk) for chunk in chunks]
+    assert [len(chunk) for chunk in decoded] == [2, 2, 1]
+    assert sum(decoded, []) == data
+    for chunk in Utils.chunk_json(data, 100, 50):
+        assert len(chunk) - 2 < 50
+
+
+def test_chunk_json_single_large_row():
+    data = rows(1, size=200)
+    chunks = Utils.chunk_json(data, 100, 50)
+    assert len(chunks) == 1
+    assert json.loads(chunks[0]) == data
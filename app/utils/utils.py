@@ -13,6 +13,12 @@ from urllib.parse import urlparse
 
 import requests
 from datetimejp import JDate
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # orjsonがない環境では標準のjsonを使用
+    orjson = None
 
 
 class Utils:
@@ -244,3 +250,103 @@ class Utils:
         raise TypeError(
             f"Object of type {obj.__class__.__name__} is not JSON serializable"
         )
+
+    def json_encoder(obj):
+        """
+        JSONエンコーダーのdefault関数です。
+        Decimalは数値、pydanticのモデルは辞書としてエンコードします。
+        """
+        if isinstance(obj, BaseModel):
+            return obj.model_dump()
+        return Utils.decimal_encoder(obj)
+
+    def json_dumps(obj) -> bytes:
+        """
+        オブジェクトをUTF-8のJSONにエンコードします。
+        orjsonがインストールされている場合はorjsonを使用します。
+        Decimalは数値、pydanticのモデルは辞書としてエンコードします。
+        """
+        if orjson is not None:
+            return orjson.dumps(obj, default=Utils.json_encoder)
+        return json.dumps(
+            obj,
+            ensure_ascii=False,
+            separators=(",", ":"),
+            default=Utils.json_encoder,
+        ).encode("utf-8")
+
+    def to_json_compatible(obj):
+        """
+        オブジェクトをJSON互換の値に変換します。
+        json.dumps(default=decimal_encoder)とjson.loadsの往復と同じ値を、
+        文字列を経由せずに作成します。pydanticのモデルは辞書、Decimalは
+        float、タプルはリストに変換します。
+        """
+        if isinstance(obj, BaseModel):
+            obj = obj.model_dump()
+        if isinstance(obj, dict):
+            if not all(isinstance(key, str) for key in obj):
+                # 文字列以外のキーはJSONの規則で変換
+                return json.loads(
+                    json.dumps(obj, default=Utils.json_encoder)
+                )
+            return {
+                key: Utils.to_json_compatible(value)
+                for key, value in obj.items()
+            }
+        if isinstance(obj, (list, tuple)):
+            return [Utils.to_json_compatible(value) for value in obj]
+        if isinstance(obj, Decimal):
+            return float(obj)
+        return obj
+
+    def group_rows(rows: list, max_rows: int, max_bytes: int):
+        """
+        リストを行数とJSONのバイト数の上限でグループに分割し、
+        (行のリスト, エンコード済みの行のリスト)を順に返します。
+        1行で上限のバイト数を超える場合は、その行だけのグループにします。
+        """
+        chunk, encoded_chunk = [], []
+        chunk_bytes = 0
+        for row in rows:
+            encoded = Utils.json_dumps(row)
+            # 区切りのカンマ分を加算
+            row_bytes = len(encoded) + 1
+            if chunk and (
+                len(chunk) >= max_rows
+                or chunk_bytes + row_bytes > max_bytes
+            ):
+                yield chunk, encoded_chunk
+                chunk, encoded_chunk = [], []
+                chunk_bytes = 0
+            chunk.append(row)
+            encoded_chunk.append(encoded)
+            chunk_bytes += row_bytes
+        yield chunk, encoded_chunk
+
+    def write_json_lines(rows, file_path) -> int:
+        """
+        行を1行ずつJSON Lines形式でファイルに書き込みます。
+        行をリストに保持しないため、ジェネレーターをそのまま渡せます。
+        書き込んだ行数を返します。
+        """
+        count = 0
+        with open(file_path, "wb") as f:
+            for row in rows:
+                f.write(Utils.json_dumps(row))
+                f.write(b"\n")
+                count += 1
+        return count
+
+    def chunk_json(rows: list, max_rows: int, max_bytes: int) -> list:
+        """
+        リストを行数とJSONのバイト数の上限で分割し、チャンクごとに
+        エンコード済みのJSON配列(bytes)を返します。
+        各行のエンコードは1回だけ行います。
+        """
+        return [
+            b"[" + b",".join(encoded_chunk) + b"]"
+            for _, encoded_chunk in Utils.group_rows(
+                rows, max_rows, max_bytes
+            )
+        ]